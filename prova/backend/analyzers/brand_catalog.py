@@ -0,0 +1,224 @@
+"""
+Catálogo de marcas para detecção de ativos (logos, ícones, CSS)
+O catálogo (data/rules/brands.json) lista, por marca, os apelidos que
+aparecem em nomes de arquivo/URLs de ativos, os domínios oficiais e os
+widgets da marca que qualquer site embute (fontes, reCAPTCHA, pixel:
+"embeds", que não contam como ativo copiado). Todos os apelidos de todas
+as marcas formam um único autômato Aho-Corasick: as referências de ativos
+da página (img, ícones, url() de CSS, og:image...) são coletadas numa
+única passada pelo DOM e casadas numa única varredura, com custo que não
+cresce com o tamanho do catálogo
+"""
+
+import json
+import os
+import re
+from bisect import bisect_right
+from urllib.parse import urlsplit
+
+from .dom_visitor import DomRule, register_rule
+from .keyword_matcher import build_automaton
+
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'rules', 'brands.json'
+)
+
+# Apelidos curtos só casam delimitados (ex: "bb" em "bb-logo.png", não em "abbey")
+MIN_SUBSTRING_LENGTH = 4
+MAX_REF_LENGTH = 2048
+MAX_EVIDENCE = 20
+
+CSS_URL_PATTERN = re.compile(r'''url\(\s*['"]?([^'")\s]+)|@import\s+['"]([^'"]+)''', re.IGNORECASE)
+
+# Atributos de cada tag que apontam para ativos (ou os descrevem)
+ASSET_ATTRIBUTES = {
+    'img': ('src', 'srcset', 'data-src', 'alt', 'title'),
+    'source': ('src', 'srcset'),
+    'input': ('src',),
+    'link': ('href',),
+    'object': ('data',),
+    'embed': ('src',),
+    'video': ('poster',),
+    'meta': ('content',),
+}
+
+# <meta> só interessa quando descreve a imagem da página (og:image, ícones)
+META_IMAGE_NAMES = ('og:image', 'twitter:image', 'msapplication-tileimage')
+# <link> só interessa quando é ícone (stylesheet, preconnect, canonical... não são logos)
+ICON_LINK_RELS = {'icon', 'apple-touch-icon', 'apple-touch-icon-precomposed', 'mask-icon'}
+
+
+def load_catalog(path=None):
+    """Carregar o catálogo de marcas (lista de {brand, aliases, domains, embeds, boundary})"""
+    path = path or os.environ.get('BRAND_CATALOG_PATH', DEFAULT_CATALOG_PATH)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _css_urls(css):
+    for match in CSS_URL_PATTERN.finditer(css):
+        yield match.group(1) or match.group(2)
+
+
+def tag_asset_refs(tag):
+    """Referências de ativos de um elemento (atributos, style e bloco <style>)"""
+    refs = []
+    attributes = ASSET_ATTRIBUTES.get(tag.name, ())
+    if tag.name == 'meta':
+        name = (tag.get('property') or tag.get('name') or '').lower()
+        if name not in META_IMAGE_NAMES:
+            attributes = ()
+    elif tag.name == 'link':
+        rel = tag.get('rel') or []
+        rels = {value.lower() for value in (rel if isinstance(rel, list) else str(rel).split())}
+        if not rels & ICON_LINK_RELS:
+            attributes = ()
+    for attribute in attributes:
+        value = tag.get(attribute)
+        if value:
+            refs.append((tag.name, value if isinstance(value, str) else ' '.join(value)))
+
+    style = tag.get('style')
+    if style and 'url' in style.lower():
+        refs.extend(('css', url) for url in _css_urls(style))
+    if tag.name == 'style' and tag.string:
+        refs.extend(('css', url) for url in _css_urls(tag.string))
+    return refs
+
+
+def _clean_refs(refs):
+    # data: URIs não têm nome de arquivo; só o começo de refs muito longas importa
+    return [(kind, value[:MAX_REF_LENGTH]) for kind, value in refs if not value.startswith('data:')]
+
+
+def collect_asset_refs(soup):
+    """
+    Referências de ativos da página numa única passada pelo DOM
+
+    Returns:
+        lista de (tipo, valor) - ex: ('img', 'paypal-logo.png'), ('css', '/bg/itau.jpg')
+    """
+    refs = []
+    for tag in soup.find_all(True):
+        refs.extend(tag_asset_refs(tag))
+    return _clean_refs(refs)
+
+
+@register_rule
+class AssetRefsRule(DomRule):
+    """Referências de ativos coletadas na passada única do DomVisitor"""
+
+    name = 'asset_refs'
+    tags = tuple(ASSET_ATTRIBUTES) + ('style',)
+    attributes = ('style',)
+
+    def __init__(self):
+        self.refs = []
+
+    def visit(self, tag):
+        self.refs.extend(tag_asset_refs(tag))
+
+    def result(self):
+        return _clean_refs(self.refs)
+
+
+def _owns(domain, official_domains):
+    return any(domain == official or domain.endswith('.' + official) for official in official_domains)
+
+
+def ref_location(ref):
+    """Host (sem www.) e caminho de uma referência absoluta; ('', '') se for relativa"""
+    if ref.startswith('//'):
+        ref = 'https:' + ref
+    parts = urlsplit(ref)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return '', ''
+    host = parts.hostname.lower()
+    return (host[4:] if host.startswith('www.') else host), parts.path
+
+
+def _embedded(host, path, embeds):
+    for embed in embeds:
+        embed_host, _, embed_path = embed.partition('/')
+        if (host == embed_host or host.endswith('.' + embed_host)) and path.startswith('/' + embed_path):
+            return True
+    return False
+
+
+class BrandCatalog:
+    """Autômato único sobre os apelidos de todas as marcas do catálogo"""
+
+    def __init__(self, entries):
+        self.entries = {entry['brand']: entry for entry in entries}
+
+        patterns = {}
+        for entry in entries:
+            for alias in entry['aliases']:
+                alias = alias.lower()
+                boundary = entry.get('boundary', False) or len(alias) < MIN_SUBSTRING_LENGTH
+                patterns.setdefault(alias, (len(alias), boundary, []))[2].append(entry['brand'])
+        self.automaton = build_automaton(patterns)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def owns(self, brand, domain):
+        """O domínio pertence à marca? (domínios oficiais; sem eles, o nome da marca no domínio)"""
+        entry = self.entries[brand]
+        if entry.get('domains'):
+            return _owns(domain, entry['domains'])
+        return any(alias.lower() in domain for alias in entry['aliases'])
+
+    def embedded(self, brand, ref):
+        """
+        A referência é um widget/serviço da marca embutido em sites de terceiros?
+        (fontes, reCAPTCHA, pixel, SDK: "embeds" do catálogo, host[/caminho])
+        """
+        embeds = self.entries[brand].get('embeds')
+        if not embeds:
+            return False
+        host, path = ref_location(ref)
+        return bool(host) and _embedded(host, path, embeds)
+
+    def match_refs(self, refs):
+        """
+        Marcas citadas nas referências de ativos (uma varredura para todas)
+
+        Returns:
+            lista de (marca, índice da referência), sem repetição
+        """
+        if not refs:
+            return []
+        text = '\n'.join(value.lower() for _, value in refs)
+        starts = []
+        offset = 0
+        for _, value in refs:
+            starts.append(offset)
+            offset += len(value) + 1
+
+        found = []
+        seen = set()
+        for end, (length, boundary, brands) in self.automaton.iter(text):
+            start = end - length + 1
+            if boundary and (
+                (start > 0 and text[start - 1].isalnum()) or
+                (end + 1 < len(text) and text[end + 1].isalnum())
+            ):
+                continue
+            ref_index = bisect_right(starts, start) - 1
+            for brand in brands:
+                if (brand, ref_index) not in seen:
+                    seen.add((brand, ref_index))
+                    found.append((brand, ref_index))
+        return found
+
+
+_default_catalog = None
+
+
+def default_brand_catalog():
+    """Catálogo compartilhado com as marcas padrão (compilado uma única vez)"""
+    global _default_catalog
+    if _default_catalog is None:
+        _default_catalog = BrandCatalog(load_catalog())
+    return _default_catalog
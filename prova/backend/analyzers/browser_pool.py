@@ -0,0 +1,364 @@
+"""
+Pool de navegadores headless aquecidos para o ScreenshotAnalyzer
+Cada captura pega um Firefox já iniciado (checkout), navega e o devolve
+(checkin) na aba about:blank e com todo o estado do perfil apagado pelo
+contexto privilegiado do Firefox (Services.clearData, CLEAR_ALL: cookies de
+todos os domínios da cadeia, armazenamento, IndexedDB, service workers e
+cache HTTP); se a limpeza falhar o navegador é descartado, nunca reaproveitado
+sujo. O custo de iniciar o navegador (segundos) sai do caminho da requisição. Um
+navegador é reciclado (perfil novo) depois de BROWSER_MAX_PAGES páginas,
+quando a árvore de processos passa de BROWSER_MAX_RSS_MB, quando falha no
+health check ou quando o WebDriver dá erro. A fila de espera é limitada:
+com BROWSER_MAX_WAITERS requisições esperando, a próxima falha na hora
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+from selenium.common.exceptions import TimeoutException
+
+logger = logging.getLogger(__name__)
+
+# Configuráveis por variável de ambiente
+BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 2))
+BROWSER_MAX_PAGES = int(os.environ.get('BROWSER_MAX_PAGES', 50))
+BROWSER_MAX_RSS_MB = int(os.environ.get('BROWSER_MAX_RSS_MB', 1024))
+BROWSER_MAX_WAITERS = int(os.environ.get('BROWSER_MAX_WAITERS', 8))
+BROWSER_CHECKOUT_TIMEOUT = float(os.environ.get('BROWSER_CHECKOUT_TIMEOUT', 5))
+PAGE_LOAD_TIMEOUT = 5
+
+FIREFOX_PATHS = [
+    '/snap/firefox/7084/usr/lib/firefox/firefox',  # Snap Firefox
+    '/snap/firefox/current/usr/lib/firefox/firefox',  # Snap com link current
+    '/usr/lib/firefox/firefox',  # Firefox tradicional
+    '/usr/bin/firefox',
+    '/snap/bin/firefox',
+    '/usr/local/bin/firefox'
+]
+
+# Roda no contexto chrome: apaga o estado de todas as origens, não só da página atual
+CLEAR_ALL_DATA_SCRIPT = (
+    'const done = arguments[arguments.length - 1];'
+    'Services.clearData.deleteData(Ci.nsIClearDataService.CLEAR_ALL, () => done(true));'
+)
+
+
+class BrowserPoolExhausted(RuntimeError):
+    """Nenhum navegador livre a tempo, ou fila de espera cheia"""
+
+
+def launch_firefox(page_load_timeout=PAGE_LOAD_TIMEOUT, proxy=None):
+    """
+    Iniciar um Firefox headless (perfil temporário novo, navegação privada)
+    proxy: (host, porta) de um proxy HTTP para todo o tráfego (ver render_proxy)
+    """
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('-private')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    # Contexto chrome pelo WebDriver (limpeza de estado no checkin; exigido a partir do Firefox 138)
+    options.add_argument('-remote-allow-system-access')
+
+    # Otimizações para velocidade
+    options.set_preference('permissions.default.image', 2)  # Não carregar imagens
+    options.set_preference('dom.ipc.plugins.enabled.libflashplayer.so', False)
+    options.set_preference('javascript.enabled', True)  # Manter JS para layout
+    options.set_preference('permissions.default.stylesheet', 2)  # Não carregar CSS externo
+    options.set_preference('permissions.default.media', 2)  # Não carregar media
+    # Nada de cache em disco nem restauração de sessão entre páginas
+    options.set_preference('browser.cache.disk.enable', False)
+    options.set_preference('browser.sessionstore.resume_from_crash', False)
+    if proxy is not None:
+        host, port = proxy
+        options.set_preference('network.proxy.type', 1)
+        for scheme in ('http', 'ssl'):
+            options.set_preference(f'network.proxy.{scheme}', host)
+            options.set_preference(f'network.proxy.{scheme}_port', port)
+        options.set_preference('network.proxy.no_proxies_on', '')
+        options.set_preference('network.proxy.allow_hijacking_localhost', True)
+        # A página pré-carregada é aberta em http://: sem promoção automática para https
+        options.set_preference('dom.security.https_first', False)
+        options.set_preference('dom.security.https_only_mode', False)
+
+    for path in FIREFOX_PATHS:
+        if os.path.exists(path):
+            options.binary_location = path
+            break
+
+    driver = webdriver.Firefox(options=options, service=Service(log_path=os.devnull))
+    driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+
+def descendant_pids(pid):
+    """PIDs de todos os descendentes do processo (geckodriver -> firefox -> abas), via /proc"""
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                # O nome do processo (entre parênteses) pode conter espaços
+                fields = f.read().rsplit(b')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    found = []
+    stack = list(children.get(pid, ()))
+    while stack:
+        current = stack.pop()
+        found.append(current)
+        stack.extend(children.get(current, ()))
+    return found
+
+
+def process_tree_rss(pid):
+    """Memória residente (bytes) do processo e de todos os descendentes"""
+    descendants = descendant_pids(pid)
+    if descendants is None:
+        return None
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for current in [pid] + descendants:
+        try:
+            with open(f'/proc/{current}/statm', 'rb') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+class PooledBrowser:
+    """Navegador do pool: driver, páginas servidas e saúde"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+        self.created_at = time.monotonic()
+
+    @property
+    def pid(self):
+        process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        return process.pid if process is not None else None
+
+    def rss_bytes(self):
+        pid = self.pid
+        return process_tree_rss(pid) if pid else None
+
+    def healthy(self):
+        try:
+            return self.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def reset(self):
+        """
+        Voltar para about:blank e apagar todo o estado do perfil
+        Erro aqui propaga: o pool descarta o navegador em vez de reaproveitá-lo
+        """
+        self.driver.get('about:blank')
+        with self.driver.context(self.driver.CONTEXT_CHROME):
+            self.driver.execute_async_script(CLEAR_ALL_DATA_SCRIPT)
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar navegador: {e}")
+
+
+class BrowserPool:
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES, max_rss_mb=BROWSER_MAX_RSS_MB,
+                 max_waiters=BROWSER_MAX_WAITERS, checkout_timeout=BROWSER_CHECKOUT_TIMEOUT,
+                 launcher=launch_firefox):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.max_waiters = max_waiters
+        self.checkout_timeout = checkout_timeout
+        self.launcher = launcher
+        self._idle = []
+        self._total = 0  # navegadores vivos ou iniciando
+        self._waiters = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._counters = {
+            'checkouts': 0, 'launches': 0, 'launch_failures': 0, 'exhausted': 0,
+            'recycled_pages': 0, 'recycled_memory': 0, 'recycled_unhealthy': 0, 'recycled_broken': 0
+        }
+
+    def _launch(self):
+        try:
+            browser = PooledBrowser(self.launcher())
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._counters['launch_failures'] += 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters['launches'] += 1
+        return browser
+
+    def _discard(self, browser, reason):
+        browser.quit()
+        with self._cond:
+            self._total -= 1
+            self._counters[f'recycled_{reason}'] += 1
+            self._cond.notify()
+        # Substituto aquecido em segundo plano (a próxima captura não paga o início)
+        threading.Thread(target=self._replenish, name='browser-replenish', daemon=True).start()
+
+    def _replenish(self):
+        with self._cond:
+            if self._closed or self._total >= self.size:
+                return
+            self._total += 1
+        try:
+            browser = self._launch()
+        except Exception as e:
+            logger.warning(f"Navegador substituto não iniciado: {e}")
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append(browser)
+                self._cond.notify()
+                return
+            self._total -= 1
+        browser.quit()
+
+    def checkout(self, timeout=None):
+        """Pegar um navegador livre (ou iniciar um, se o pool não estiver cheio)"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._closed:
+                raise BrowserPoolExhausted('Pool de navegadores encerrado')
+            if not self._idle and self._total >= self.size and self._waiters >= self.max_waiters:
+                self._counters['exhausted'] += 1
+                raise BrowserPoolExhausted(f'Fila de screenshots cheia ({self._waiters} esperando)')
+            self._waiters += 1
+            try:
+                while not self._idle and self._total >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        self._counters['exhausted'] += 1
+                        raise BrowserPoolExhausted(f'Nenhum navegador livre em {timeout}s')
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+            self._counters['checkouts'] += 1
+            if self._idle:
+                browser = self._idle.pop()
+            else:
+                self._total += 1
+                browser = None
+
+        if browser is None:
+            return self._launch()
+        if not browser.healthy():
+            self._discard(browser, 'unhealthy')
+            return self.checkout(max(0.0, deadline - time.monotonic()))
+        return browser
+
+    def checkin(self, browser):
+        """Devolver o navegador limpo ao pool, ou reciclá-lo"""
+        browser.pages += 1
+        if browser.broken or self._closed:
+            return self._discard(browser, 'broken')
+        if browser.pages >= self.max_pages:
+            return self._discard(browser, 'pages')
+        rss = browser.rss_bytes()
+        if rss is not None and rss > self.max_rss_bytes:
+            return self._discard(browser, 'memory')
+        try:
+            browser.reset()
+        except Exception as e:
+            logger.warning(f"Limpeza do navegador falhou, descartando: {e}")
+            return self._discard(browser, 'broken')
+        with self._cond:
+            self._idle.append(browser)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """with pool.lease() as browser: browser.driver.get(url) ..."""
+        browser = self.checkout(timeout)
+        try:
+            yield browser
+        except TimeoutException:
+            # Página lenta: o navegador segue bom (reset() interrompe o carregamento)
+            raise
+        except Exception:
+            # Erro do WebDriver no meio da captura: estado desconhecido, não reaproveitar
+            browser.broken = True
+            raise
+        finally:
+            self.checkin(browser)
+
+    def warm(self, count=None):
+        """Iniciar navegadores antes da primeira requisição"""
+        browsers = []
+        for _ in range(min(count or self.size, self.size)):
+            try:
+                browsers.append(self.checkout())
+            except Exception as e:
+                logger.warning(f"Navegador não iniciado no aquecimento: {e}")
+                break
+        for browser in browsers:
+            with self._cond:
+                self._idle.append(browser)
+                self._cond.notify()
+        return len(browsers)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'alive': self._total,
+                'idle': len(self._idle),
+                'in_use': self._total - len(self._idle),
+                'waiters': self._waiters,
+                'max_waiters': self.max_waiters,
+                'max_pages': self.max_pages,
+                **self._counters
+            }
+
+    def close(self):
+        """Encerrar todos os navegadores livres (os em uso são encerrados no checkin)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for browser in idle:
+            browser.quit()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_browser_pool():
+    """Pool de navegadores compartilhado do processo"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool()
+        return _default_pool
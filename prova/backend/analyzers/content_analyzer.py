@@ -2,75 +2,260 @@
 Analisador de Conteúdo de Páginas Web
 """
 
-import requests
-from bs4 import BeautifulSoup
 import re
 from urllib.parse import urlparse
-import hashlib
+import os
+from .page_document import PageDocument
+from .oauth_analyzer import OAuthAnalyzer
+from .cpu_pool import CpuPoolError, default_cpu_pool, register_preload
+from .script_scanner import ScriptScanner
+from .brand_catalog import MAX_EVIDENCE, default_brand_catalog
+from .dom_visitor import DomRule, TagListRule, register_rule
+from .kit_fingerprint import fingerprint_page
+from .favicon_hashes import FaviconLinksRule
+from .net_engine import NetError, default_net_engine
+
+# Limites da busca da página (configuráveis por variável de ambiente)
+MAX_CONTENT_BYTES = int(os.environ.get('CONTENT_MAX_BYTES', 2 * 1024 * 1024))
+FETCH_DEADLINE_SECONDS = float(os.environ.get('CONTENT_FETCH_DEADLINE', 15))
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+
+HIDDEN_STYLE_PATTERN = re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden')
+
+
+# Regras de DOM das verificações abaixo: todas alimentadas pela mesma
+# passada do DomVisitor (document.dom[...])
+
+@register_rule
+class ScriptsRule(TagListRule):
+    name = 'scripts'
+    tags = ('script',)
+
+
+@register_rule
+class IframesRule(TagListRule):
+    name = 'iframes'
+    tags = ('iframe',)
+
+
+@register_rule
+class LinksRule(TagListRule):
+    name = 'links'
+    tags = ('a',)
+
+
+@register_rule
+class MetaKeywordsRule(DomRule):
+    """Primeira <meta name="keywords">"""
+
+    name = 'meta_keywords'
+    tags = ('meta',)
 
-class ContentAnalyzer:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.meta = None
+
+    def visit(self, tag):
+        if self.meta is None and tag.get('name') == 'keywords':
+            self.meta = tag
+
+    def result(self):
+        return self.meta
+
+
+@register_rule
+class HiddenElementsRule(DomRule):
+    """Elementos ocultos por style (display:none / visibility:hidden)"""
+
+    name = 'hidden_elements'
+    attributes = ('style',)
+
+    def __init__(self):
+        self.count = 0
+
+    def visit(self, tag):
+        if HIDDEN_STYLE_PATTERN.search(tag['style']):
+            self.count += 1
+
+    def result(self):
+        return self.count
+
+
+def decode_body(body, charset):
+    """Decodificar o corpo da página (sem charset no cabeçalho, assumir UTF-8)"""
+    try:
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+_page_analyzers = None
+
+
+@register_preload
+def preload_page_analyzers():
+    """Analisadores de página do worker do pool de CPU (regras e catálogos compilados uma vez)"""
+    global _page_analyzers
+    if _page_analyzers is None:
+        _page_analyzers = (ContentAnalyzer(), OAuthAnalyzer())
+    return _page_analyzers
+
+
+def analyze_page_task(url, body, charset, fetch_info):
+    """
+    Tarefa do pool de CPU: bytes da página -> resultados compactos
+    O parse é feito uma vez e alimenta as verificações de conteúdo e de
+    OAuth; a árvore fica no worker e volta só o resultado de OAuth em 'oauth'
+    """
+    content_analyzer, oauth_analyzer = preload_page_analyzers()
+    results = content_analyzer.analyze_page(url, decode_body(body, charset), fetch_info)
+    document = results.pop('document', None)
+    if document is not None:
+        results['oauth'] = oauth_analyzer.analyze(document.soup, url, document=document)
+    return results
+
+
+class ContentAnalyzer:
+    def __init__(self, max_bytes=MAX_CONTENT_BYTES, deadline=FETCH_DEADLINE_SECONDS, net_engine=None,
+                 brand_catalog=None, cpu_pool=None):
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.script_scanner = ScriptScanner()
+        self.brand_catalog = brand_catalog or default_brand_catalog()
+        self.net = net_engine or default_net_engine()
+        self.cpu_pool = cpu_pool or default_cpu_pool()
+    
+    def fetch(self, url):
+        """Buscar a página (invólucro síncrono de fetch_async)"""
+        return self.net.run(self.fetch_async(url))
+    
+    async def fetch_async(self, url):
+        """
+        Buscar a página em streaming, com limite de bytes e prazo total
+        
+        O corpo é lido em blocos até max_bytes (bytes já descomprimidos) ou até
+        estourar o prazo total; o que foi lido até ali é analisado. Conteúdo
+        binário é recusado pelo Content-Type, ou pelos primeiros bytes quando
+        o servidor não informa o tipo
+        
+        Returns:
+            (html, info) - info com status, tipo, bytes lidos e truncamento
+        """
+        body, info = await self.fetch_bytes_async(url)
+        return decode_body(body, info.pop('charset')), info
+    
+    async def fetch_bytes_async(self, url):
+        """Buscar a página sem decodificar (bytes, info com 'charset')"""
+        return await self.net.fetch(
+            url,
+            max_bytes=self.max_bytes,
+            deadline=self.deadline,
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT,
+            text_only=True
+        )
     
     def analyze(self, url):
-        """Executar análise completa de conteúdo"""
+        """Executar análise completa de conteúdo (invólucro síncrono de analyze_async)"""
+        results = self.net.run(self.analyze_async(url))
+        results.pop('page', None)
+        return results
+    
+    async def analyze_async(self, url):
+        """
+        Buscar a página no loop de rede e analisá-la no pool de CPU
+        (parse, verificações de conteúdo e de OAuth; o resultado de OAuth vem em 'oauth'
+        e o documento baixado em 'page')
+        """
+        try:
+            # Buscar conteúdo da página (streaming, limitado em bytes e tempo)
+            body, fetch_info = await self.fetch_bytes_async(url)
+        except NetError as e:
+            return {'risk_score': 0, 'checks': {}, 'error': f'Erro ao acessar URL: {str(e)}'}
+        except Exception as e:
+            return {'risk_score': 0, 'checks': {}, 'error': f'Erro na análise: {str(e)}'}
+        
+        charset = fetch_info.pop('charset')
+        try:
+            results = await self.cpu_pool.run(analyze_page_task, url, body, charset, fetch_info)
+        except CpuPoolError as e:
+            return {'risk_score': 0, 'checks': {}, 'fetch': fetch_info, 'error': f'Erro na análise: {str(e)}'}
+        
+        # Documento analisado, para o screenshot renderizar a mesma página
+        # (bytes, não serializável: quem chama retira antes de responder);
+        # truncado, o navegador baixa a página inteira
+        if fetch_info['truncated']:
+            return results
+        results['page'] = {
+            'url': fetch_info['final_url'],
+            'body': body,
+            'content_type': fetch_info['content_type'],
+            'charset': charset,
+            'status_code': fetch_info['status_code']
+        }
+        return results
+    
+    def analyze_page(self, url, html_content, fetch_info=None):
+        """Analisar o HTML de uma página já baixada"""
         results = {
             'risk_score': 0,
             'checks': {}
         }
         
         try:
-            # Buscar conteúdo da página
-            response = self.session.get(url, timeout=10, allow_redirects=True)
-            html_content = response.text
-            soup = BeautifulSoup(html_content, 'html.parser')
+            if fetch_info is not None:
+                results['fetch'] = fetch_info
+                results['truncated'] = fetch_info['truncated']
+            # HTML/texto/URL em minúsculas e palavras-chave calculados uma vez por página
+            # (não serializável: analyze_page_task o retira antes de devolver o resultado)
+            document = PageDocument(url, html_content)
+            results['document'] = document
+            
+            # Impressão digital estrutural (índice de kits de phishing conhecidos)
+            results['fingerprint'] = fingerprint_page(document.soup, document.dom['dom_tokens'])
+            # Ícones declarados (estágio de favicon, antes do screenshot)
+            results['favicon_links'] = document.dom[FaviconLinksRule.name]
             
             # 1. Detectar formulários de login
-            login_forms = self.detect_login_forms(soup)
+            login_forms = self.detect_login_forms(document)
             results['checks']['login_forms'] = login_forms
             results['risk_score'] += login_forms['risk_score']
             
             # 2. Verificar solicitações de informações sensíveis
-            sensitive_info = self.check_sensitive_info_requests(soup)
+            sensitive_info = self.check_sensitive_info_requests(document)
             results['checks']['sensitive_info'] = sensitive_info
             results['risk_score'] += sensitive_info['risk_score']
             
             # 3. Detectar logos e imagens de marcas
-            brand_detection = self.detect_brand_logos(soup, url)
+            brand_detection = self.detect_brand_logos(document)
             results['checks']['brand_logos'] = brand_detection
             results['risk_score'] += brand_detection['risk_score']
             
             # 4. Análise de scripts maliciosos
-            script_analysis = self.analyze_scripts(soup)
+            script_analysis = self.analyze_scripts(document)
             results['checks']['scripts'] = script_analysis
             results['risk_score'] += script_analysis['risk_score']
             
             # 5. Detectar técnicas de manipulação
-            manipulation = self.detect_manipulation_techniques(soup, html_content)
+            manipulation = self.detect_manipulation_techniques(document)
             results['checks']['manipulation'] = manipulation
             results['risk_score'] += manipulation['risk_score']
             
             # 6. Verificar práticas SEO maliciosas
-            seo_analysis = self.analyze_seo_practices(soup)
+            seo_analysis = self.analyze_seo_practices(document)
             results['checks']['seo'] = seo_analysis
             results['risk_score'] += seo_analysis['risk_score']
             
             # 7. Detectar temporizadores de urgência
-            urgency_timers = self.detect_urgency_timers(soup, html_content)
+            urgency_timers = self.detect_urgency_timers(document)
             results['checks']['urgency_timers'] = urgency_timers
             results['risk_score'] += urgency_timers['risk_score']
             
             # 8. Análise de OAuth suspeito
-            oauth_analysis = self.analyze_oauth(soup)
+            oauth_analysis = self.analyze_oauth(document)
             results['checks']['oauth'] = oauth_analysis
             results['risk_score'] += oauth_analysis['risk_score']
             
-        except requests.RequestException as e:
-            results['error'] = f'Erro ao acessar URL: {str(e)}'
-            results['risk_score'] = 0
         except Exception as e:
             results['error'] = f'Erro na análise: {str(e)}'
         
@@ -79,7 +264,7 @@ class ContentAnalyzer:
         
         return results
     
-    def detect_login_forms(self, soup):
+    def detect_login_forms(self, document):
         """Detectar formulários de login"""
         result = {
             'risk_score': 0,
@@ -88,18 +273,16 @@ class ContentAnalyzer:
             'details': []
         }
         
-        forms = soup.find_all('form')
-        
-        for form in forms:
+        for form, inputs in document.dom['forms']:
             # Procurar campos de senha
-            password_fields = form.find_all('input', {'type': 'password'})
+            password_fields = [input_tag for input_tag in inputs if input_tag.get('type') == 'password']
             
             if password_fields:
                 result['found'] = True
                 result['count'] += 1
                 
                 # Verificar campos sensíveis
-                form_fields = [input_tag.get('name', '') for input_tag in form.find_all('input')]
+                form_fields = [input_tag.get('name', '') for input_tag in inputs]
                 
                 sensitive_fields = []
                 for field in form_fields:
@@ -123,134 +306,114 @@ class ContentAnalyzer:
         
         return result
     
-    def check_sensitive_info_requests(self, soup):
+    def check_sensitive_info_requests(self, document):
         """Verificar solicitações de informações sensíveis"""
         result = {
             'risk_score': 0,
             'requests_found': []
         }
         
-        # Palavras-chave sensíveis
-        sensitive_keywords = [
-            'credit card', 'cartão de crédito', 'cvv', 'security code',
-            'social security', 'ssn', 'cpf', 'tax id',
-            'bank account', 'conta bancária', 'routing number',
-            'passport', 'passaporte', 'driver license',
-            'mother maiden name', 'nome de solteira'
-        ]
-        
-        text_content = soup.get_text().lower()
-        
-        for keyword in sensitive_keywords:
-            if keyword in text_content:
-                result['requests_found'].append(keyword)
-                result['risk_score'] += 10
+        # Palavras-chave sensíveis (data/rules/keywords.json: sensitive_info)
+        for keyword in document.text_hits['sensitive_info']:
+            result['requests_found'].append(keyword)
+            result['risk_score'] += 10
         
         # Limitar score máximo
         result['risk_score'] = min(50, result['risk_score'])
         
         return result
     
-    def detect_brand_logos(self, soup, url):
-        """Detectar logos de marcas conhecidas"""
+    def detect_brand_logos(self, document):
+        """Detectar logos e ativos de marcas conhecidas (img, ícones, CSS)"""
         result = {
             'risk_score': 0,
-            'brands_detected': []
+            'brands_detected': [],
+            'assets': []
         }
         
-        # Marcas para verificar
-        brands = ['paypal', 'amazon', 'google', 'microsoft', 'apple', 'facebook', 
-                  'netflix', 'ebay', 'bank', 'banco', 'bradesco', 'itau', 'santander']
-        
-        # Verificar imagens
-        images = soup.find_all('img')
+        domain = urlparse(document.url).netloc.lower().split(':')[0]
+        refs = document.dom['asset_refs']
         
-        domain = urlparse(url).netloc.lower()
+        # Catálogo inteiro (data/rules/brands.json) contra todas as referências, numa varredura
+        for brand, ref_index in self.brand_catalog.match_refs(refs):
+            # Ativo de marca numa página fora dos domínios da marca
+            # (widgets da marca embutidos em qualquer site não contam)
+            if self.brand_catalog.owns(brand, domain) or self.brand_catalog.embedded(brand, refs[ref_index][1]):
+                continue
+            if brand not in result['brands_detected']:
+                result['brands_detected'].append(brand)
+            if len(result['assets']) < MAX_EVIDENCE:
+                kind, ref = refs[ref_index]
+                result['assets'].append({'brand': brand, 'kind': kind, 'ref': ref[:200]})
+            result['risk_score'] += 20
         
-        for img in images:
-            src = img.get('src', '').lower()
-            alt = img.get('alt', '').lower()
-            
-            for brand in brands:
-                if brand in src or brand in alt:
-                    # Se detectar logo de marca mas domínio não corresponde
-                    if brand not in domain:
-                        result['brands_detected'].append(brand)
-                        result['risk_score'] += 20
+        result['asset_refs_checked'] = len(refs)
         
         # Limitar score
         result['risk_score'] = min(60, result['risk_score'])
         
         return result
     
-    def analyze_scripts(self, soup):
+    def analyze_scripts(self, document):
         """Analisar scripts para detectar código malicioso"""
         result = {
             'risk_score': 0,
-            'suspicious_patterns': []
+            'suspicious_patterns': [],
+            'known_libraries': []
         }
         
-        scripts = soup.find_all('script')
-        
-        # Padrões suspeitos
-        suspicious_patterns = [
-            (r'eval\s*\(', 'eval() - possível ofuscação'),
-            (r'document\.write\s*\(', 'document.write() - possível injeção'),
-            (r'fromCharCode', 'fromCharCode - possível ofuscação'),
-            (r'unescape\s*\(', 'unescape() - possível ofuscação'),
-            (r'String\.fromCharCode', 'String.fromCharCode - ofuscação'),
-            (r'window\.location\s*=', 'Redirecionamento via JavaScript'),
-            (r'document\.cookie', 'Acesso a cookies'),
-            (r'addEventListener\s*\(\s*["\']contextmenu', 'Bloqueio de menu de contexto'),
-            (r'oncontextmenu\s*=', 'Bloqueio de clique direito')
-        ]
-        
-        for script in scripts:
+        for script in document.dom['scripts']:
             script_content = script.string or ''
             
-            for pattern, description in suspicious_patterns:
-                if re.search(pattern, script_content, re.IGNORECASE):
-                    result['suspicious_patterns'].append(description)
-                    result['risk_score'] += 10
+            # Bibliotecas conhecidas (allowlist por hash) não são varridas
+            library = self.script_scanner.known_library(script_content)
+            if library:
+                result['known_libraries'].append(library)
+                continue
+            
+            # Todos os padrões suspeitos numa única passada pelo script
+            for description in self.script_scanner.scan(script_content):
+                result['suspicious_patterns'].append(description)
+                result['risk_score'] += 10
         
         # Limitar score
         result['risk_score'] = min(50, result['risk_score'])
         
         return result
     
-    def detect_manipulation_techniques(self, soup, html_content):
+    def detect_manipulation_techniques(self, document):
         """Detectar técnicas de manipulação"""
         result = {
             'risk_score': 0,
             'techniques_found': []
         }
+        markers = document.html_hits['html_markers']
         
         # 1. Bloqueio de clique direito
-        if 'oncontextmenu' in html_content.lower():
+        if 'oncontextmenu' in markers:
             result['techniques_found'].append('Bloqueio de clique direito')
             result['risk_score'] += 15
         
         # 2. Ocultar URL real
-        if 'window.location' in html_content and 'href' in html_content:
+        if 'window.location' in markers and 'href' in markers:
             result['techniques_found'].append('Possível ocultação de URL')
             result['risk_score'] += 10
         
         # 3. Iframes ocultos
-        iframes = soup.find_all('iframe')
-        for iframe in iframes:
+        for iframe in document.dom['iframes']:
             style = iframe.get('style', '')
             if 'display:none' in style or 'visibility:hidden' in style:
                 result['techniques_found'].append('Iframe oculto')
                 result['risk_score'] += 20
         
         # 4. Popups automáticos
-        if 'window.open' in html_content:
+        if 'window.open' in markers:
             result['techniques_found'].append('Popup automático')
             result['risk_score'] += 10
         
         return result
     
-    def analyze_seo_practices(self, soup):
+    def analyze_seo_practices(self, document):
         """Analisar práticas SEO maliciosas"""
         result = {
             'risk_score': 0,
@@ -258,7 +421,7 @@ class ContentAnalyzer:
         }
         
         # Keyword stuffing
-        meta_keywords = soup.find('meta', {'name': 'keywords'})
+        meta_keywords = document.dom['meta_keywords']
         if meta_keywords:
             keywords = meta_keywords.get('content', '')
             if len(keywords.split(',')) > 50:
@@ -266,43 +429,33 @@ class ContentAnalyzer:
                 result['risk_score'] += 10
         
         # Cloaking (texto oculto)
-        hidden_elements = soup.find_all(style=re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden'))
-        if len(hidden_elements) > 10:
+        if document.dom['hidden_elements'] > 10:
             result['issues'].append('Excesso de elementos ocultos')
             result['risk_score'] += 15
         
         return result
     
-    def detect_urgency_timers(self, soup, html_content):
+    def detect_urgency_timers(self, document):
         """Detectar temporizadores de urgência"""
         result = {
             'risk_score': 0,
             'timers_found': False
         }
         
-        # Palavras-chave de urgência
-        urgency_keywords = [
-            'expires in', 'expira em', 'tempo limitado', 'limited time',
-            'act now', 'aja agora', 'última chance', 'last chance',
-            'countdown', 'contagem regressiva'
-        ]
-        
-        text_content = soup.get_text().lower()
-        
-        for keyword in urgency_keywords:
-            if keyword in text_content:
-                result['timers_found'] = True
-                result['risk_score'] += 10
-                break
+        # Palavras-chave de urgência (data/rules/keywords.json: urgency)
+        if document.text_hits['urgency']:
+            result['timers_found'] = True
+            result['risk_score'] += 10
         
         # Verificar scripts de countdown
-        if 'setinterval' in html_content.lower() or 'countdown' in html_content.lower():
+        markers = document.html_hits['html_markers']
+        if 'setinterval' in markers or 'countdown' in markers:
             result['timers_found'] = True
             result['risk_score'] += 10
         
         return result
     
-    def analyze_oauth(self, soup):
+    def analyze_oauth(self, document):
         """Analisar solicitações OAuth suspeitas"""
         result = {
             'risk_score': 0,
@@ -311,9 +464,7 @@ class ContentAnalyzer:
         }
         
         # Procurar por OAuth
-        links = soup.find_all('a')
-        
-        for link in links:
+        for link in document.dom['links']:
             href = link.get('href', '')
             
             if 'oauth' in href.lower() or 'authorize' in href.lower():
@@ -0,0 +1,261 @@
+"""
+Pool de processos para as etapas de CPU
+Parse de HTML com as verificações de conteúdo/OAuth, hash perceptual do
+screenshot e inferência do modelo rodam fora do processo do Flask, sem
+disputar o GIL com as requisições. Entram bytes (HTML bruto, PNG, vetor de
+features) e saem resultados compactos (dicts, strings): a árvore do
+BeautifulSoup e a imagem decodificada nunca cruzam a fronteira do processo
+
+Cada worker roda as funções registradas com @register_preload ao iniciar
+(modelo carregado, regras compiladas); cada tarefa tem prazo, e o pool é
+reciclado depois de CPU_TASKS_PER_WORKER tarefas por worker ou quando uma
+tarefa estoura o prazo (o worker preso é encerrado à força)
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Configuráveis por variável de ambiente (CPU_WORKERS=0: tarefas em threads do próprio processo)
+CPU_WORKERS = int(os.environ.get('CPU_WORKERS', min(4, os.cpu_count() or 1)))
+CPU_TASK_TIMEOUT = float(os.environ.get('CPU_TASK_TIMEOUT', 20))
+CPU_TASKS_PER_WORKER = int(os.environ.get('CPU_TASKS_PER_WORKER', 500))
+# 'forkserver': os workers nascem de um servidor limpo (sem as threads do Flask, do
+# NetEngine e do treinador, que um 'fork' copiaria no meio de uma operação).
+# Com 'spawn'/'forkserver' o script principal é reexecutado como __mp_main__ nos
+# workers: a inicialização da aplicação precisa ficar protegida (ver app.py)
+CPU_POOL_START_METHOD = os.environ.get('CPU_POOL_START_METHOD', 'forkserver')
+# Importados uma vez no servidor do forkserver: cada worker já nasce com eles carregados
+FORKSERVER_PRELOAD = ['analyzers.content_analyzer', 'analyzers.ml_classifier', 'analyzers.screenshot_workers']
+# Quanto cada tarefa de aquecimento segura o worker (obriga as demais a irem para outros workers)
+CPU_WARM_HOLD_SECONDS = 0.05
+
+PRELOADS = []
+
+
+def register_preload(fn):
+    """Registrar uma função executada em cada worker ao iniciar (carregar modelo, compilar regras)"""
+    PRELOADS.append(fn)
+    return fn
+
+
+def process_context(start_method):
+    """Contexto de multiprocessing; no forkserver o servidor pré-carrega os analisadores (não o __main__)"""
+    context = multiprocessing.get_context(start_method)
+    if start_method == 'forkserver':
+        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return context
+
+
+def _init_worker(preloads):
+    # Referências por nome: funcionam com qualquer método de início
+    for module_name, name in preloads:
+        getattr(importlib.import_module(module_name), name)()
+
+
+def _warm_up(hold):
+    time.sleep(hold)
+    return os.getpid()
+
+
+class CpuPoolError(RuntimeError):
+    """Tarefa não concluída pelo pool (worker morto ou pool encerrado)"""
+
+
+class CpuTaskTimeout(CpuPoolError):
+    """Tarefa estourou o prazo (o worker é encerrado e o pool reciclado)"""
+
+
+def _terminate(processes):
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def _reap(processes, pending, grace):
+    # Deixa as tarefas do pool aposentado terminarem e encerra quem sobrar
+    wait(pending, timeout=grace)
+    _terminate(processes)
+
+
+class CpuPool:
+    def __init__(self, workers=CPU_WORKERS, task_timeout=CPU_TASK_TIMEOUT,
+                 tasks_per_worker=CPU_TASKS_PER_WORKER, start_method=CPU_POOL_START_METHOD):
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.tasks_per_worker = tasks_per_worker
+        self.start_method = start_method
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = set()
+        self._submitted = 0
+        self._counters = {
+            'tasks': 0, 'completed': 0, 'errors': 0, 'timeouts': 0, 'recycles': 0, 'in_flight': 0
+        }
+
+    @property
+    def inline(self):
+        """Sem workers: as tarefas rodam em threads do próprio processo"""
+        return self.workers <= 0
+
+    def _current_executor(self):
+        if self._executor is not None and self._submitted >= self.workers * self.tasks_per_worker:
+            self._retire()
+        if self._executor is None:
+            preloads = [(fn.__module__, fn.__name__) for fn in PRELOADS]
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=process_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(preloads,)
+            )
+            self._pending = set()
+            self._submitted = 0
+        return self._executor
+
+    def _retire(self, stuck=None):
+        """
+        Aposentar o executor atual
+        Com tarefa presa, seus workers são encerrados já (as outras tarefas em
+        andamento falham com CpuPoolError); na reciclagem comum, as tarefas
+        pendentes têm até task_timeout para terminar
+        """
+        executor, pending = self._executor, self._pending
+        self._executor = None
+        self._counters['recycles'] += 1
+        # Processos capturados antes do shutdown (o executor esquece a lista ao terminar)
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False)
+        if stuck is not None:
+            _terminate(processes)
+        else:
+            threading.Thread(
+                target=_reap, args=(processes, list(pending), self.task_timeout), name='cpu-pool-reaper', daemon=True
+            ).start()
+
+    def _discard(self, executor, future=None):
+        with self._lock:
+            if self._executor is executor:
+                self._retire(stuck=future)
+
+    def _done(self, pending, future):
+        pending.discard(future)
+        with self._lock:
+            self._counters['in_flight'] -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._counters['errors'] += 1
+            else:
+                self._counters['completed'] += 1
+
+    def submit(self, fn, *args):
+        """Enviar uma tarefa (fn e argumentos precisam ser serializáveis); retorna (executor, future)"""
+        with self._lock:
+            executor = self._current_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._retire()
+                raise CpuPoolError(f'Pool de CPU indisponível: {e}')
+            pending = self._pending
+            pending.add(future)
+            self._submitted += 1
+            self._counters['tasks'] += 1
+            self._counters['in_flight'] += 1
+        future.add_done_callback(lambda f: self._done(pending, f))
+        return executor, future
+
+    def _timed_out(self, executor, future, timeout):
+        with self._lock:
+            self._counters['timeouts'] += 1
+        self._discard(executor, future)
+        return CpuTaskTimeout(f'Tarefa de CPU excedeu {timeout}s')
+
+    def call(self, fn, *args, timeout=None):
+        """Executar fn(*args) num worker e esperar o resultado (bloqueante)"""
+        timeout = timeout or self.task_timeout
+        if self.inline:
+            return fn(*args)
+        executor, future = self.submit(fn, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise self._timed_out(executor, future, timeout)
+        except BrokenProcessPool as e:
+            self._discard(executor)
+            raise CpuPoolError(f'Worker de CPU encerrado: {e}')
+
+    async def run(self, fn, *args, timeout=None):
+        """Executar fn(*args) num worker sem bloquear o event loop"""
+        timeout = timeout or self.task_timeout
+        if self.inline:
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._counters['timeouts'] += 1
+                raise CpuTaskTimeout(f'Tarefa de CPU excedeu {timeout}s')
+        executor, future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(executor, future, timeout)
+        except BrokenProcessPool as e:
+            self._discard(executor)
+            raise CpuPoolError(f'Worker de CPU encerrado: {e}')
+
+    def warm(self):
+        """
+        Iniciar os workers já (carregam o modelo agora, não na primeira requisição)
+        Retorna depois que todos os workers responderam (PIDs distintos)
+        """
+        if self.inline:
+            return []
+        deadline = time.monotonic() + self.task_timeout
+        pids = set()
+        while len(pids) < self.workers:
+            futures = [self.submit(_warm_up, CPU_WARM_HOLD_SECONDS)[1] for _ in range(self.workers)]
+            try:
+                pids.update(future.result(max(0, deadline - time.monotonic())) for future in futures)
+            except FutureTimeoutError:
+                raise CpuTaskTimeout(
+                    f'Aquecimento do pool de CPU excedeu {self.task_timeout}s ({len(pids)}/{self.workers} workers)'
+                )
+        return sorted(pids)
+
+    def stats(self):
+        """Contadores de tarefas e estado dos workers"""
+        with self._lock:
+            executor = self._executor
+            processes = list((executor._processes or {}).values()) if executor is not None else []
+            return {
+                'workers': self.workers,
+                'start_method': None if self.inline else self.start_method,
+                'alive_workers': sum(1 for process in processes if process.is_alive()),
+                'task_timeout': self.task_timeout,
+                'tasks_per_worker': self.tasks_per_worker,
+                **self._counters
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_cpu_pool():
+    """Pool de CPU compartilhado do processo"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = CpuPool()
+        return _default_pool
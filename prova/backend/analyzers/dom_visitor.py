@@ -0,0 +1,174 @@
+"""
+Visitante de DOM em uma passada
+Cada verificação (regra) declara as tags e os atributos que lhe interessam
+e é registrada com @register_rule. O DomVisitor percorre a árvore uma única
+vez e entrega cada elemento só às regras interessadas; na mesma passada
+monta o texto visível (equivalente a soup.get_text()). Substitui a dúzia de
+soup.find_all() que as verificações de conteúdo e OAuth faziam por página
+"""
+
+from bs4.element import NavigableString, Tag
+
+RULES = {}
+
+
+def register_rule(cls):
+    """Registrar uma regra (classe DomRule) no visitante padrão"""
+    RULES[cls.name] = cls
+    return cls
+
+
+class DomRule:
+    """
+    Verificação alimentada pelo DomVisitor (uma instância por página)
+
+    tags: nomes de tag de interesse; attributes: atributos de interesse em
+    qualquer tag; all_tags: receber todos os elementos. visit() é chamado
+    uma vez por elemento, mesmo que ele interesse por tag e por atributo
+    """
+
+    name = None
+    tags = ()
+    attributes = ()
+    all_tags = False
+
+    def visit(self, tag):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class TagListRule(DomRule):
+    """Regra que só guarda os elementos de interesse, na ordem do documento"""
+
+    def __init__(self):
+        self.found = []
+
+    def visit(self, tag):
+        self.found.append(tag)
+
+    def result(self):
+        return self.found
+
+
+# Regra compartilhada pelas verificações de conteúdo e de OAuth
+@register_rule
+class FormsRule(DomRule):
+    """Formulários com seus inputs (inclusive os de formulários aninhados)"""
+
+    name = 'forms'
+    tags = ('form', 'input')
+
+    def __init__(self):
+        self.forms = []
+        self._index = {}
+
+    def visit(self, tag):
+        if tag.name == 'form':
+            self._index[id(tag)] = len(self.forms)
+            self.forms.append((tag, []))
+            return
+        for parent in tag.parents:
+            index = self._index.get(id(parent))
+            if index is not None:
+                self.forms[index][1].append(tag)
+
+    def result(self):
+        return self.forms
+
+
+class DomFacts:
+    """Resultados das regras para uma página (acesso por nome da regra)"""
+
+    def __init__(self, visitor, root, results, text, nodes):
+        self._visitor = visitor
+        self._root = root
+        self.results = results
+        self.text = text
+        self.nodes = nodes
+        self.traversals = 1
+
+    def __getitem__(self, name):
+        if name not in self.results:
+            # Regra registrada depois da passada (módulo importado mais tarde)
+            self.results.update(self._visitor.walk_rules(self._root, [RULES[name]]))
+            self.traversals += 1
+        return self.results[name]
+
+
+class DomVisitor:
+    def __init__(self, rules=None):
+        self._rules = rules
+        self._dispatch = None
+        self._dispatch_key = None
+
+    def rule_classes(self):
+        return list((self._rules or RULES).values())
+
+    def _build_dispatch(self, rule_classes):
+        by_tag, by_attribute, every = {}, {}, []
+        for index, rule in enumerate(rule_classes):
+            if rule.all_tags:
+                every.append(index)
+                continue
+            for name in rule.tags:
+                by_tag.setdefault(name, []).append(index)
+            for attribute in rule.attributes:
+                by_attribute.setdefault(attribute, []).append(index)
+        return by_tag, by_attribute, every
+
+    def walk(self, root):
+        """Percorrer a árvore uma vez alimentando todas as regras e o texto"""
+        rule_classes = self.rule_classes()
+        key = tuple(rule_classes)
+        if key != self._dispatch_key:
+            self._dispatch = self._build_dispatch(rule_classes)
+            self._dispatch_key = key
+        results, text, nodes = self._walk(root, rule_classes, self._dispatch, collect_text=True)
+        return DomFacts(self, root, results, text, nodes)
+
+    def walk_rules(self, root, rule_classes):
+        """Passada extra só para as regras indicadas"""
+        results, _, _ = self._walk(root, rule_classes, self._build_dispatch(rule_classes), collect_text=False)
+        return results
+
+    @staticmethod
+    def _walk(root, rule_classes, dispatch, collect_text):
+        by_tag, by_attribute, every = dispatch
+        rules = [rule() for rule in rule_classes]
+        every_rules = [rules[i] for i in every]
+        text_types = getattr(root, 'interesting_string_types', None) or (NavigableString,)
+        parts = []
+        nodes = 0
+
+        for node in root.descendants:
+            if isinstance(node, Tag):
+                nodes += 1
+                for rule in every_rules:
+                    rule.visit(node)
+
+                interested = by_tag.get(node.name)
+                if by_attribute and node.attrs:
+                    for attribute in node.attrs:
+                        indexes = by_attribute.get(attribute)
+                        if indexes:
+                            interested = (interested or []) + indexes
+                if interested:
+                    if len(interested) > 1:
+                        interested = dict.fromkeys(interested)  # sem repetir a regra
+                    for index in interested:
+                        rules[index].visit(node)
+            elif collect_text and type(node) in text_types:
+                parts.append(node)
+
+        results = {rule.name: rule.result() for rule in rules}
+        return results, ''.join(parts), nodes
+
+
+_default_visitor = DomVisitor()
+
+
+def default_visitor():
+    """Visitante com todas as regras registradas"""
+    return _default_visitor
@@ -1,13 +1,36 @@
 """
 Email Blacklist Analyzer - Verifica se domínio está em blacklists de spam
 Usa DNSBL (DNS-based Blackhole List) para verificar reputação
+
+Todas as zonas são consultadas ao mesmo tempo, cada uma com o próprio
+prazo. A varredura para quando a soma dos pesos das listagens já chegou
+ao teto do score (MAX_RISK_SCORE) e a reputação já é 'very_bad': daí em
+diante nem o score nem a faixa mudam, só a contagem de listagens fica
+parcial. Zonas que estouram o prazo várias vezes seguidas ficam fora das
+próximas varreduras por um tempo
 """
-import socket
+import asyncio
+import os
+import time
 import dns.resolver
 from urllib.parse import urlparse
+from .net_engine import default_net_engine
+
+# Configuráveis por variável de ambiente
+DNSBL_TIMEOUT = float(os.environ.get('DNSBL_TIMEOUT', 2))
+DNSBL_MAX_CONSECUTIVE_TIMEOUTS = int(os.environ.get('DNSBL_MAX_CONSECUTIVE_TIMEOUTS', 3))
+DNSBL_SKIP_SECONDS = float(os.environ.get('DNSBL_SKIP_SECONDS', 300))
+
+# Listagens para cada faixa de reputação
+VERY_BAD_LISTINGS = 3
+BAD_LISTINGS = 2
+MAX_RISK_SCORE = 100
+DEFAULT_DNSBL_WEIGHT = 15
 
 class EmailBlacklistAnalyzer:
-    def __init__(self):
+    def __init__(self, net_engine=None, timeout=DNSBL_TIMEOUT, zone_timeouts=None,
+                 max_consecutive_timeouts=DNSBL_MAX_CONSECUTIVE_TIMEOUTS, skip_seconds=DNSBL_SKIP_SECONDS):
+        self.net = net_engine or default_net_engine()
         # Lista de DNSBLs públicos confiáveis
         self.dnsbl_servers = [
             'zen.spamhaus.org',      # Spamhaus - o mais respeitado
@@ -31,19 +54,63 @@ class EmailBlacklistAnalyzer:
             'psbl.surriel.com': 15,
             'bl.mailspike.net': 20
         }
+        
+        # Prazo de cada zona (segundos); zonas sem entrada usam `timeout`
+        self.timeout = timeout
+        self.zone_timeouts = dict(zone_timeouts or {})
+        
+        # Saúde das zonas: depois de max_consecutive_timeouts timeouts seguidos a zona
+        # fica fora por skip_seconds; passado o intervalo, volta em teste (um novo
+        # timeout a tira de novo, uma resposta zera a contagem)
+        self.max_consecutive_timeouts = max_consecutive_timeouts
+        self.skip_seconds = skip_seconds
+        # Só é usado dentro do loop do motor de rede: sem lock
+        self._zones = {}
+        self._sweeps = {'sweeps': 0, 'stopped_early': 0}
+    
+    def _zone(self, dnsbl_server):
+        zone = self._zones.get(dnsbl_server)
+        if zone is None:
+            zone = self._zones[dnsbl_server] = {
+                'queries': 0, 'listed': 0, 'timeouts': 0, 'errors': 0,
+                'consecutive_timeouts': 0, 'skipped': 0, 'skip_until': 0.0
+            }
+        return zone
+    
+    def zone_available(self, dnsbl_server, now=None):
+        """A zona entra na varredura? (fora enquanto estiver suspensa por timeouts)"""
+        zone = self._zone(dnsbl_server)
+        return (now or time.monotonic()) >= zone['skip_until']
+    
+    def _record(self, dnsbl_server, status):
+        zone = self._zone(dnsbl_server)
+        zone['queries'] += 1
+        if status == 'timeout':
+            zone['timeouts'] += 1
+            zone['consecutive_timeouts'] += 1
+            if zone['consecutive_timeouts'] >= self.max_consecutive_timeouts:
+                zone['skip_until'] = time.monotonic() + self.skip_seconds
+            return
+        if status == 'error':
+            zone['errors'] += 1
+        elif status == 'listed':
+            zone['listed'] += 1
+        zone['consecutive_timeouts'] = 0
     
     def get_ip_from_domain(self, domain):
         """
         Resolve o domínio para obter o endereço IP
         """
+        return self.net.run(self.get_ip_from_domain_async(domain))
+    
+    async def get_ip_from_domain_async(self, domain):
         try:
             # Limpar domínio
             domain = domain.replace('https://', '').replace('http://', '')
             domain = domain.split('/')[0]
             domain = domain.split(':')[0]
             
-            ip = socket.gethostbyname(domain)
-            return ip
+            return await self.net.resolve_ip(domain)
         except Exception as e:
             return None
     
@@ -63,69 +130,143 @@ class EmailBlacklistAnalyzer:
         """
         Verifica se o IP está listado em um DNSBL específico
         """
+        return self.net.run(self.check_dnsbl_async(ip, dnsbl_server))
+    
+    async def check_dnsbl_async(self, ip, dnsbl_server):
+        status, response = await self.query_dnsbl_async(ip, dnsbl_server)
+        return status == 'listed', response
+    
+    async def query_dnsbl_async(self, ip, dnsbl_server):
+        """
+        Consultar uma zona com o prazo dela
+        
+        Returns:
+            (status, resposta): status 'listed', 'not_listed', 'timeout' ou 'error'
+        """
+        reversed_ip = self.reverse_ip(ip)
+        if not reversed_ip:
+            return 'error', None
+        
+        # Construir query DNSBL: reversed_ip.dnsbl_server
+        query = f"{reversed_ip}.{dnsbl_server}"
+        timeout = self.zone_timeouts.get(dnsbl_server, self.timeout)
+        
         try:
-            reversed_ip = self.reverse_ip(ip)
-            if not reversed_ip:
-                return False, None
-            
-            # Construir query DNSBL: reversed_ip.dnsbl_server
-            query = f"{reversed_ip}.{dnsbl_server}"
-            
-            # Tentar resolver
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = 2
-            resolver.lifetime = 2
-            
-            try:
-                answers = resolver.resolve(query, 'A')
-                # Se resolveu, está na blacklist
-                return True, str(answers[0])
-            except dns.resolver.NXDOMAIN:
-                # Não está na blacklist
-                return False, None
-            except dns.resolver.NoAnswer:
-                return False, None
-            except dns.resolver.Timeout:
-                return False, None
-            
-        except Exception as e:
-            return False, None
+            answers = await self.net.resolve(query, 'A', lifetime=timeout)
+            # Se resolveu, está na blacklist
+            status, response = 'listed', answers[0]
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            # Não está na blacklist
+            status, response = 'not_listed', None
+        except dns.resolver.Timeout:
+            # Sem resposta no prazo: não verificado (não é "não listado")
+            status, response = 'timeout', None
+        except Exception:
+            status, response = 'error', None
+        
+        self._record(dnsbl_server, status)
+        return status, response
     
     def check_domain_reputation(self, domain):
         """
         Verifica reputação do domínio em múltiplas blacklists
         """
+        return self.net.run(self.check_domain_reputation_async(domain))
+    
+    async def check_domain_reputation_async(self, domain):
         results = {
             'listed_in': [],
             'not_listed_in': [],
-            'failed_checks': []
+            'failed_checks': [],
+            'skipped_checks': [],
+            'stopped_early': False
         }
         
-        ip = self.get_ip_from_domain(domain)
+        ip = await self.get_ip_from_domain_async(domain)
         if not ip:
             return None, results
         
+        # Zonas suspensas por timeouts repetidos ficam de fora
+        now = time.monotonic()
+        zones = []
         for dnsbl in self.dnsbl_servers:
-            is_listed, response = self.check_dnsbl(ip, dnsbl)
-            
-            if is_listed:
-                results['listed_in'].append({
-                    'dnsbl': dnsbl,
-                    'response': response
-                })
-            elif response is None and not is_listed:
-                # Conseguiu verificar, não está listado
-                results['not_listed_in'].append(dnsbl)
+            if self.zone_available(dnsbl, now):
+                zones.append(dnsbl)
             else:
-                # Falha na verificação
-                results['failed_checks'].append(dnsbl)
+                self._zone(dnsbl)['skipped'] += 1
+                results['skipped_checks'].append(dnsbl)
+        
+        # Todas as zonas consultadas ao mesmo tempo; para quando score e faixa não mudam mais
+        self._sweeps['sweeps'] += 1
+        tasks = {asyncio.ensure_future(self.query_dnsbl_async(ip, dnsbl)): dnsbl for dnsbl in zones}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    dnsbl = tasks[task]
+                    status, response = task.result()
+                    if status == 'listed':
+                        results['listed_in'].append({
+                            'dnsbl': dnsbl,
+                            'response': response
+                        })
+                    elif status == 'not_listed':
+                        results['not_listed_in'].append(dnsbl)
+                    else:
+                        # Falha na verificação (timeout/erro)
+                        results['failed_checks'].append(dnsbl)
+                if pending and self._result_settled(results['listed_in']):
+                    results['stopped_early'] = True
+                    self._sweeps['stopped_early'] += 1
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Ordem da configuração (as respostas chegam em qualquer ordem)
+        order = {dnsbl: i for i, dnsbl in enumerate(self.dnsbl_servers)}
+        results['listed_in'].sort(key=lambda item: order[item['dnsbl']])
+        results['not_listed_in'].sort(key=order.get)
+        results['failed_checks'].sort(key=order.get)
+        if pending:
+            results['skipped_checks'] = sorted(
+                results['skipped_checks'] + [tasks[task] for task in pending], key=order.get
+            )
         
         return ip, results
     
+    def listing_weight(self, dnsbl_server):
+        return self.dnsbl_weights.get(dnsbl_server, DEFAULT_DNSBL_WEIGHT)
+    
+    def _result_settled(self, listed_in):
+        """Score no teto e reputação 'very_bad': as zonas restantes não mudam o resultado"""
+        return (len(listed_in) >= VERY_BAD_LISTINGS and
+                sum(self.listing_weight(item['dnsbl']) for item in listed_in) >= MAX_RISK_SCORE)
+    
+    def stats(self):
+        """Varreduras e saúde de cada zona"""
+        now = time.monotonic()
+        return dict(
+            self._sweeps,
+            zones={
+                dnsbl: dict(
+                    {key: value for key, value in zone.items() if key != 'skip_until'},
+                    suspended_for=round(max(0.0, zone['skip_until'] - now), 1)
+                )
+                for dnsbl, zone in self._zones.items()
+            }
+        )
+    
     def analyze(self, domain):
         """
         Análise completa de blacklist de email
         """
+        return self.net.run(self.analyze_async(domain))
+    
+    async def analyze_async(self, domain):
         result = {
             'ip': None,
             'checked': False,
@@ -144,7 +285,7 @@ class EmailBlacklistAnalyzer:
                 domain = parsed.netloc
             
             # Obter IP e verificar
-            ip, check_results = self.check_domain_reputation(domain)
+            ip, check_results = await self.check_domain_reputation_async(domain)
             
             if not ip:
                 result['details'].append('⚠️ Não foi possível resolver IP para verificação de blacklist')
@@ -162,20 +303,18 @@ class EmailBlacklistAnalyzer:
                 
                 # Calcular risk score baseado nos DNSBLs em que está listado
                 for item in check_results['listed_in']:
-                    dnsbl = item['dnsbl']
-                    weight = self.dnsbl_weights.get(dnsbl, 15)
-                    result['risk_score'] += weight
+                    result['risk_score'] += self.listing_weight(item['dnsbl'])
                 
                 # Limitar a 100
-                result['risk_score'] = min(100, result['risk_score'])
+                result['risk_score'] = min(MAX_RISK_SCORE, result['risk_score'])
                 
                 # Determinar reputação
-                if result['listed_count'] >= 3:
+                if result['listed_count'] >= VERY_BAD_LISTINGS:
                     result['reputation'] = 'very_bad'
                     result['details'].append(
                         f'🚨 ALTA REPUTAÇÃO NEGATIVA: Listado em {result["listed_count"]} blacklists'
                     )
-                elif result['listed_count'] >= 2:
+                elif result['listed_count'] >= BAD_LISTINGS:
                     result['reputation'] = 'bad'
                     result['details'].append(
                         f'⚠️ Reputação negativa: Listado em {result["listed_count"]} blacklists'
@@ -206,6 +345,15 @@ class EmailBlacklistAnalyzer:
                 result['details'].append(
                     f'ℹ️ {len(check_results["failed_checks"])} verificações falharam (timeout/erro)'
                 )
+            if check_results['stopped_early']:
+                result['details'].append(
+                    f'ℹ️ Varredura encerrada com reputação crítica '
+                    f'({len(check_results["skipped_checks"])} blacklists não consultadas)'
+                )
+            elif check_results['skipped_checks']:
+                result['details'].append(
+                    f'ℹ️ {len(check_results["skipped_checks"])} blacklists puladas (timeouts repetidos)'
+                )
             
             return result
             
@@ -0,0 +1,383 @@
+"""
+Favicon: detector de clones barato, antes do screenshot
+Kits de phishing quase sempre trazem o favicon da marca imitada. O ícone
+declarado na página (<link rel="icon">, inclusive data: URI) ou, sem ele,
+/favicon.ico é baixado pelo motor de rede compartilhado (uma requisição
+pequena) e vira:
+  - SHA-256 dos bytes (cópia exata do arquivo da marca)
+  - phash de 64 bits da imagem (o mesmo ícone reexportado ou redimensionado)
+A base de favicons das marcas (training/favicon_index.py) é um artefato
+versionado (ModelArtifactStore, memory-map): bytes exatos por busca binária
+e phash por XOR + popcount sobre a coluna inteira (centenas de ícones:
+microssegundos). Uma correspondência confiante dá o veredito de clone sem
+abrir navegador
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import time
+from io import BytesIO
+from urllib.parse import unquote_to_bytes, urljoin, urlparse
+
+import imagehash
+import numpy as np
+from PIL import Image, ImageStat
+
+from .brand_catalog import default_brand_catalog
+from .cpu_pool import CpuPoolError, default_cpu_pool
+from .dom_visitor import DomRule, register_rule
+from .hamming import hamming_distances
+from .model_store import ModelArtifactStore, ServingArtifact, register_engine
+from .net_engine import NetError, default_net_engine
+from .reference_hashes import hash_bytes
+
+# Configuráveis por variável de ambiente
+FAVICON_MAX_BYTES = int(os.environ.get('FAVICON_MAX_BYTES', 256 * 1024))
+FAVICON_DEADLINE = float(os.environ.get('FAVICON_DEADLINE', 3))
+# Distância de Hamming máxima do phash (64 bits) para uma correspondência confiante
+FAVICON_PHASH_THRESHOLD = int(os.environ.get('FAVICON_PHASH_THRESHOLD', 4))
+
+MAX_ICON_LINKS = 4
+MAX_DATA_URI_LENGTH = 64 * 1024
+# Ícones lisos (uma cor só) têm o mesmo phash de qualquer outro ícone liso
+MIN_ICON_STDDEV = 8.0
+HASH_SIZE = 8
+HASH_IMAGE_SIZE = 64
+
+# Rels de <link> que apontam para o favicon (na ordem de preferência)
+ICON_RELS = ('icon', 'apple-touch-icon', 'apple-touch-icon-precomposed')
+
+
+@register_rule
+class FaviconLinksRule(DomRule):
+    """hrefs de <link rel="icon"> (e apple-touch-icon) coletados na passada única do DomVisitor"""
+
+    name = 'favicon_links'
+    tags = ('link',)
+
+    def __init__(self):
+        self.links = []
+
+    def visit(self, tag):
+        rel = tag.get('rel') or []
+        rels = {value.lower() for value in (rel if isinstance(rel, list) else str(rel).split())}
+        href = (tag.get('href') or '').strip()
+        if not href or len(href) > MAX_DATA_URI_LENGTH:
+            return
+        for rank, name in enumerate(ICON_RELS):
+            if name in rels:
+                self.links.append((rank, len(self.links), href))
+                return
+
+    def result(self):
+        return [href for _, _, href in sorted(self.links)[:MAX_ICON_LINKS]]
+
+
+def favicon_hashes(data):
+    """
+    Bytes do ícone -> {'sha256', 'phash', 'size'}
+    phash é None quando a imagem não decodifica (ex: SVG) ou é lisa demais
+    """
+    hashes = {'sha256': hashlib.sha256(data).hexdigest(), 'phash': None, 'size': None}
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()  # ICO: o maior tamanho do arquivo
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        return hashes
+
+    hashes['size'] = '{}x{}'.format(*image.size)
+    # Transparência sobre fundo branco, como o navegador mostra na aba
+    rgba = image.convert('RGBA')
+    flat = Image.alpha_composite(Image.new('RGBA', rgba.size, (255, 255, 255, 255)), rgba).convert('L')
+    if ImageStat.Stat(flat).stddev[0] < MIN_ICON_STDDEV:
+        return hashes
+    phash = imagehash.phash(flat.resize((HASH_IMAGE_SIZE, HASH_IMAGE_SIZE), Image.LANCZOS), hash_size=HASH_SIZE)
+    hashes['phash'] = hash_bytes(phash).hex()
+    return hashes
+
+
+def favicon_hashes_task(data):
+    """Tarefa do pool de CPU: bytes do ícone -> hashes (a imagem decodificada não sai do worker)"""
+    return favicon_hashes(data)
+
+
+def digest_prefix(sha256_hex):
+    """Primeiros 64 bits do SHA-256 (chave da busca exata)"""
+    return np.uint64(int(sha256_hex[:16], 16))
+
+
+def phash_word(phash_hex):
+    return np.uint64(int(phash_hex, 16))
+
+
+@register_engine
+class FaviconIndex:
+    """
+    Favicons imutáveis das marcas: um registro por arquivo de ícone
+    Hashes presentes em mais de uma marca são ambíguos e não decidem:
+    SHA-256 repetido sai da busca exata e phash próximo ao de outra marca
+    sai da busca por distância
+    """
+
+    kind = 'favicon_index'
+
+    def __init__(self, digests, digest_ids, phashes, phash_valid, brand_ids, brands,
+                 phash_threshold=FAVICON_PHASH_THRESHOLD):
+        self.digests = digests          # prefixos de SHA-256 ordenados (uint64)
+        self.digest_ids = digest_ids    # entrada de cada prefixo
+        self.phashes = phashes          # (n, 1) uint64
+        self.phash_valid = phash_valid  # 1 se o phash decide sozinho
+        self.brand_ids = brand_ids
+        self.brands = brands
+        self.phash_threshold = phash_threshold
+
+    @classmethod
+    def build(cls, entries, phash_threshold=FAVICON_PHASH_THRESHOLD):
+        """Montar o índice a partir de entradas {brand, sha256, phash (hex ou None)}"""
+        brands = sorted({entry['brand'] for entry in entries})
+        brand_index = {brand: i for i, brand in enumerate(brands)}
+        brand_ids = np.array([brand_index[entry['brand']] for entry in entries], dtype=np.int32)
+
+        # Busca exata: SHA-256 de uma marca só (o mesmo arquivo em duas marcas não decide)
+        owners = {}
+        for i, entry in enumerate(entries):
+            owners.setdefault(entry['sha256'], set()).add(entry['brand'])
+        exact = [
+            (digest_prefix(entry['sha256']), i) for i, entry in enumerate(entries)
+            if len(owners[entry['sha256']]) == 1
+        ]
+        exact.sort(key=lambda item: (int(item[0]), item[1]))
+        digests = np.array([digest for digest, _ in exact], dtype=np.uint64)
+        digest_ids = np.array([i for _, i in exact], dtype=np.int64)
+
+        phashes = np.array(
+            [phash_word(entry['phash']) if entry.get('phash') else 0 for entry in entries], dtype=np.uint64
+        ).reshape(-1, 1)
+        phash_valid = np.array([bool(entry.get('phash')) for entry in entries], dtype=np.uint8)
+        for i in np.flatnonzero(phash_valid):
+            distances = hamming_distances(phashes, phashes[i])
+            rivals = (distances <= phash_threshold) & (brand_ids != brand_ids[i]) & (phash_valid == 1)
+            if rivals.any():
+                phash_valid[i] = 0
+
+        return cls(digests, digest_ids, phashes, phash_valid, brand_ids, brands, phash_threshold)
+
+    @classmethod
+    def from_arrays(cls, arrays, info):
+        return cls(
+            arrays['digests'], arrays['digest_ids'], arrays['phashes'], arrays['phash_valid'],
+            arrays['brand_ids'], info['brands'], info['phash_threshold']
+        )
+
+    def arrays(self):
+        return {
+            'digests': self.digests,
+            'digest_ids': self.digest_ids,
+            'phashes': self.phashes,
+            'phash_valid': self.phash_valid,
+            'brand_ids': self.brand_ids
+        }
+
+    def info(self):
+        return {'brands': self.brands, 'phash_threshold': self.phash_threshold, 'entries': len(self)}
+
+    def __len__(self):
+        return len(self.brand_ids)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def lookup(self, hashes):
+        """
+        Procurar o favicon no índice
+
+        Returns:
+            dict com match ('exact'|'near'), entry, brand, distance e similarity, ou None
+        """
+        digest = digest_prefix(hashes['sha256'])
+        i = int(np.searchsorted(self.digests, digest))
+        if i < len(self.digests) and self.digests[i] == digest:
+            entry = int(self.digest_ids[i])
+            return self._match('exact', entry, 0)
+
+        if not hashes.get('phash') or len(self) == 0:
+            return None
+        distances = hamming_distances(self.phashes, phash_word(hashes['phash']))
+        distances[self.phash_valid == 0] = HASH_SIZE * HASH_SIZE + 1
+        best = int(np.argmin(distances))
+        if distances[best] > self.phash_threshold:
+            return None
+        return self._match('near', best, int(distances[best]))
+
+    def _match(self, kind, entry, distance):
+        return {
+            'match': kind,
+            'entry': entry,
+            'brand': self.brands[int(self.brand_ids[entry])],
+            'distance': distance,
+            # Mesma escala do screenshot: 100 idêntico, 50 em cima do limite
+            'similarity': round(100 - 50 * distance / max(1, self.phash_threshold), 1)
+        }
+
+
+class FaviconHashStore(ServingArtifact):
+    """Base de favicons em uso pelo servidor (troca de versão sem reiniciar)"""
+
+    def __init__(self, store=None):
+        super().__init__(store or ModelArtifactStore('models/favicon_index'), 'Favicons de referência')
+        if self.load_current():
+            print(f"✓ Favicons de referência {self.serving.version} carregados "
+                  f"({len(self.serving.engine):,} ícones de {len(self.serving.engine.brands)} marcas)")
+
+    def lookup(self, hashes):
+        """Marca dona do favicon (ou None; sem base carregada, sempre None)"""
+        self.refresh()
+        serving = self.serving
+        if serving is None or len(serving.engine) == 0:
+            return None
+        match = serving.engine.lookup(hashes)
+        if match:
+            match['index_version'] = serving.version
+        return match
+
+
+def decode_data_uri(uri):
+    """Corpo de um data: URI (None se malformado)"""
+    header, sep, payload = uri[5:].partition(',')
+    if not sep:
+        return None
+    try:
+        if header.lower().endswith(';base64'):
+            return base64.b64decode(payload, validate=False)
+        return unquote_to_bytes(payload)
+    except (binascii.Error, ValueError):
+        return None
+
+
+class FaviconAnalyzer:
+    def __init__(self, net_engine=None, cpu_pool=None, index=None, brand_catalog=None,
+                 max_bytes=FAVICON_MAX_BYTES, deadline=FAVICON_DEADLINE):
+        self.net = net_engine or default_net_engine()
+        self.cpu_pool = cpu_pool or default_cpu_pool()
+        self.index = index or FaviconHashStore()
+        self.brand_catalog = brand_catalog or default_brand_catalog()
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        # Só é usado dentro do loop do motor de rede: sem lock
+        self._stats = {
+            'checks': 0, 'skipped_no_index': 0, 'requests': 0, 'inline_icons': 0, 'no_icon': 0,
+            'exact': 0, 'near': 0, 'official_domain': 0, 'unknown_brand': 0, 'errors': 0
+        }
+
+    @staticmethod
+    def candidate_urls(url, links=None):
+        """Ícones a tentar, na ordem: os declarados na página e /favicon.ico"""
+        candidates = []
+        for href in links or ():
+            if href.lower().startswith('data:'):
+                candidates.append(href)
+                continue
+            absolute = urljoin(url, href)
+            if urlparse(absolute).scheme in ('http', 'https'):
+                candidates.append(absolute)
+        candidates.append(urljoin(url, '/favicon.ico'))
+        return list(dict.fromkeys(candidates))
+
+    async def fetch_icon(self, candidate):
+        """Bytes do ícone (None se não houver ícone utilizável nesse endereço)"""
+        if candidate.lower().startswith('data:'):
+            self._stats['inline_icons'] += 1
+            return decode_data_uri(candidate)
+
+        self._stats['requests'] += 1
+        try:
+            body, info = await self.net.fetch(
+                candidate, max_bytes=self.max_bytes, deadline=self.deadline,
+                connect_timeout=self.deadline, read_timeout=self.deadline
+            )
+        except NetError:
+            return None
+        # Página de erro servida com 200 (comum em /favicon.ico inexistente) não é ícone
+        if info['status_code'] != 200 or info['truncated'] or (info['content_type'] or '').startswith('text/html'):
+            return None
+        return body or None
+
+    async def analyze_async(self, url, links=None):
+        """
+        Baixar o favicon da página e procurá-lo na base das marcas
+        (para no primeiro ícone obtido: em geral uma única requisição)
+
+        Returns:
+            dict com is_clone, cloned_brand, similarity_score, match, hashes e details
+        """
+        results = {
+            'checked': False,
+            'icon_url': None,
+            'hashes': None,
+            'match': None,
+            'is_clone': False,
+            'cloned_brand': None,
+            'similarity_score': 0,
+            'details': []
+        }
+        self._stats['checks'] += 1
+
+        # Sem base publicada não há com o que comparar: nem baixar o ícone
+        self.index.refresh()
+        if self.index.version is None:
+            self._stats['skipped_no_index'] += 1
+            return results
+
+        start = time.perf_counter()
+        for candidate in self.candidate_urls(url, links):
+            data = await self.fetch_icon(candidate)
+            if not data:
+                continue
+            try:
+                results['hashes'] = await self.cpu_pool.run(favicon_hashes_task, data)
+            except CpuPoolError:
+                self._stats['errors'] += 1
+                continue
+            results['icon_url'] = candidate if not candidate.lower().startswith('data:') else 'data:'
+            break
+        results['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        if results['hashes'] is None:
+            self._stats['no_icon'] += 1
+            results['details'].append('ℹ️ Favicon não encontrado')
+            return results
+
+        results['checked'] = True
+        match = self.index.lookup(results['hashes'])
+        if match is None:
+            return results
+
+        domain = urlparse(url if url.startswith('http') else 'https://' + url).netloc.lower().split(':')[0]
+        brand = match['brand']
+        # Sem domínios oficiais no catálogo não há como descartar o site da própria
+        # marca: a correspondência não é conclusiva (falha fechada, nada de clone)
+        if brand not in self.brand_catalog.entries:
+            self._stats['unknown_brand'] += 1
+            results['details'].append(f'ℹ️ Favicon de {brand}, marca sem domínios oficiais no catálogo - ignorado')
+            return results
+        if self.brand_catalog.owns(brand, domain):
+            self._stats['official_domain'] += 1
+            results['details'].append(f'✓ Favicon oficial de {brand} no domínio da marca')
+            return results
+
+        self._stats[match['match']] += 1
+        results['match'] = match
+        results['is_clone'] = True
+        results['cloned_brand'] = brand
+        results['similarity_score'] = match['similarity']
+        if match['match'] == 'exact':
+            results['details'].append(f'🚨 Favicon idêntico ao de {brand.upper()}')
+        else:
+            results['details'].append(f"🚨 Favicon quase idêntico ao de {brand.upper()} (distância {match['distance']})")
+        return results
+
+    def stats(self):
+        return dict(self._stats, index_version=self.index.version)
@@ -2,12 +2,11 @@
 Geolocation Analyzer - Análise de localização geográfica do servidor
 Verifica país de hospedagem, ASN e reputação do provedor
 """
-import requests
-import socket
-import dns.resolver
+from .net_engine import default_net_engine
 
 class GeolocationAnalyzer:
-    def __init__(self):
+    def __init__(self, net_engine=None):
+        self.net = net_engine or default_net_engine()
         # Países considerados de alto risco para phishing
         self.high_risk_countries = [
             'CN',  # China
@@ -48,13 +47,15 @@ class GeolocationAnalyzer:
         """
         Resolve o domínio para obter o endereço IP
         """
+        return self.net.run(self.get_ip_from_domain_async(domain))
+    
+    async def get_ip_from_domain_async(self, domain):
         try:
             # Remove protocolo se presente
             domain = domain.replace('https://', '').replace('http://', '')
             domain = domain.split('/')[0]
             
-            ip = socket.gethostbyname(domain)
-            return ip
+            return await self.net.resolve_ip(domain)
         except Exception as e:
             return None
     
@@ -62,16 +63,11 @@ class GeolocationAnalyzer:
         """
         Obtém informações de geolocalização usando ip-api.com (gratuito)
         """
+        return self.net.run(self.get_geolocation_async(ip))
+    
+    async def get_geolocation_async(self, ip):
         try:
-            response = requests.get(
-                f'http://ip-api.com/json/{ip}',
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            return None
-            
+            return await self.net.get_json(f'http://ip-api.com/json/{ip}', timeout=5)
         except Exception as e:
             return None
     
@@ -100,6 +96,9 @@ class GeolocationAnalyzer:
         """
         Análise completa de geolocalização
         """
+        return self.net.run(self.analyze_async(domain))
+    
+    async def analyze_async(self, domain):
         result = {
             'ip': None,
             'country': None,
@@ -120,7 +119,7 @@ class GeolocationAnalyzer:
         
         try:
             # Obter IP do domínio
-            ip = self.get_ip_from_domain(domain)
+            ip = await self.get_ip_from_domain_async(domain)
             if not ip:
                 result['details'].append('Não foi possível resolver IP do domínio')
                 return result
@@ -128,7 +127,7 @@ class GeolocationAnalyzer:
             result['ip'] = ip
             
             # Obter dados de geolocalização
-            geo_data = self.get_geolocation(ip)
+            geo_data = await self.get_geolocation_async(ip)
             if not geo_data:
                 result['details'].append('Não foi possível obter dados de geolocalização')
                 return result
@@ -0,0 +1,22 @@
+"""
+Distância de Hamming vetorizada entre hashes em palavras uint64
+Compartilhada pelos índices de kits (simhash), de screenshots
+(phash/dhash/colorhash) e de favicons (phash): XOR com o alvo e popcount
+por tabela de 256 entradas sobre os bytes do resultado
+"""
+
+import numpy as np
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def hamming_distances(values, target):
+    """
+    Distância de Hamming entre cada hash e o alvo
+
+    Args:
+        values: array uint64 (n,) com hashes de 64 bits ou (n, palavras)
+        target: np.uint64 ou array uint64 (palavras,)
+    """
+    xor = np.ascontiguousarray(np.bitwise_xor(values, target))
+    return _POPCOUNT[xor.view(np.uint8)].reshape(len(xor), -1).sum(axis=1, dtype=np.int64)
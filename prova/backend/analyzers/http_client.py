@@ -0,0 +1,152 @@
+"""
+Cliente HTTP síncrono de saída (usado pelo proxy de renderização)
+Uma requests.Session com pool de conexões keep-alive (urllib3), limite de
+conexões simultâneas por host, timeouts e User-Agent padronizados. Os
+analisadores usam o NetEngine (aiohttp), que reaproveita daqui o
+User-Agent e o limite de conexões por host
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+DEFAULT_TIMEOUT = (5, 10)  # (conexão, leitura) em segundos
+
+# Limites do pool (configuráveis por variável de ambiente)
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', 8))
+MAX_POOLED_HOSTS = int(os.environ.get('HTTP_MAX_POOLED_HOSTS', 128))
+HOST_SLOT_TIMEOUT = float(os.environ.get('HTTP_HOST_SLOT_TIMEOUT', 10))
+
+
+class HostLimitError(requests.ConnectionError):
+    """Nenhuma conexão livre para o host dentro do tempo de espera"""
+
+
+class _HostSlots:
+    """Semáforo por host; o registro some quando não há requisições em andamento"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    @contextmanager
+    def acquire(self, host, timeout):
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = [threading.BoundedSemaphore(self.limit), 0]
+            slot[1] += 1
+        try:
+            if not slot[0].acquire(timeout=timeout):
+                raise HostLimitError(f'Limite de {self.limit} conexões simultâneas para {host} atingido')
+            try:
+                yield
+            finally:
+                slot[0].release()
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._slots[host]
+
+    def in_flight(self):
+        with self._lock:
+            return {host: slot[1] for host, slot in self._slots.items()}
+
+
+class HTTPClient:
+    def __init__(self, max_per_host=MAX_CONNECTIONS_PER_HOST, max_hosts=MAX_POOLED_HOSTS,
+                 timeout=DEFAULT_TIMEOUT, user_agent=USER_AGENT, slot_timeout=HOST_SLOT_TIMEOUT):
+        self.timeout = timeout
+        self.slot_timeout = slot_timeout
+        self.max_per_host = max_per_host
+
+        # pool_maxsize: conexões keep-alive guardadas por host;
+        # pool_connections: quantos hosts mantêm pool (LRU)
+        self.adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_per_host, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update({'User-Agent': user_agent})
+
+        self._slots = _HostSlots(max_per_host)
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'errors': 0, 'host_limit_rejections': 0, 'total_seconds': 0.0}
+
+    def _record(self, started, error=None):
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['total_seconds'] += time.perf_counter() - started
+            if isinstance(error, HostLimitError):
+                self._stats['host_limit_rejections'] += 1
+            elif error is not None:
+                self._stats['errors'] += 1
+
+    def request(self, method, url, **kwargs):
+        """Requisição com corpo já lido (a conexão volta ao pool)"""
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        try:
+            with self._slots.acquire(urlparse(url).netloc.lower(), self.slot_timeout):
+                response = self.session.request(method, url, **kwargs)
+                response.content  # ler o corpo antes de liberar a vaga do host
+        except Exception as e:
+            self._record(started, e)
+            raise
+        self._record(started)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    @contextmanager
+    def stream(self, method, url, **kwargs):
+        """Resposta em streaming; a vaga do host é liberada ao sair do bloco"""
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        error = None
+        try:
+            with self._slots.acquire(urlparse(url).netloc.lower(), self.slot_timeout):
+                with self.session.request(method, url, stream=True, **kwargs) as response:
+                    yield response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record(started, error)
+
+    def stats(self):
+        """Estatísticas do cliente e dos pools de conexão por host"""
+        pools = {}
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f'{key.key_scheme}://{key.key_host}:{key.key_port}'] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle_connections': pool.pool.qsize() if pool.pool else 0
+            }
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        opened = sum(pool['connections_opened'] for pool in pools.values())
+        requests_served = sum(pool['requests'] for pool in pools.values())
+        stats.update(
+            total_seconds=round(stats['total_seconds'], 3),
+            max_connections_per_host=self.max_per_host,
+            pooled_hosts=len(pools),
+            connections_opened=opened,
+            connection_reuse_ratio=round(1 - opened / requests_served, 3) if requests_served else None,
+            in_flight=self._slots.in_flight(),
+            pools=pools
+        )
+        return stats
+
@@ -0,0 +1,246 @@
+"""
+Motor de inferência de baixa latência para o Random Forest
+Exporta as árvores treinadas do scikit-learn para arrays NumPy planos
+e avalia todas as árvores ao mesmo tempo, sem despacho de threads (joblib)
+"""
+
+import numpy as np
+
+# Marcador de folha usado pelo scikit-learn (sklearn.tree._tree.TREE_LEAF)
+TREE_LEAF = -1
+
+
+class CompiledForest:
+    """
+    Floresta compilada em arrays planos (um nó por posição):
+
+    - feature:   índice da feature testada no nó (0 nas folhas)
+    - threshold: limiar do teste `x[feature] <= threshold`
+    - children:  filhos intercalados, children[2 * nó + vai_para_esquerda]
+                 (nas folhas os dois apontam para o próprio nó)
+    - value:     probabilidades de cada classe no nó
+    - roots:     índice global da raiz de cada árvore
+
+    Como as folhas apontam para si mesmas, basta descer `max_depth` níveis
+    em todas as árvores simultaneamente para chegar às folhas.
+    """
+
+    kind = 'random_forest'
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 classes, feature_importances=None):
+        # Os arrays são usados como recebidos (podem ser memory-mapped)
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_features = None
+        if feature_importances is not None:
+            self.feature_importances_ = np.asarray(feature_importances, dtype=np.float64)
+            self.n_features = len(self.feature_importances_)
+        else:
+            self.feature_importances_ = None
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compilar um RandomForestClassifier (ou ExtraTreesClassifier) treinado"""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError('Somente florestas com uma única saída são suportadas')
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == TREE_LEAF
+            own_index = np.arange(n_nodes, dtype=np.int64) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            left = np.where(is_leaf, own_index, tree.children_left + offset)
+            right = np.where(is_leaf, own_index, tree.children_right + offset)
+            children.append(np.stack([right, left], axis=1).ravel())
+
+            # Normalizar contagens (versões antigas do sklearn) para probabilidades
+            node_values = tree.value[:, 0, :].astype(np.float64)
+            totals = node_values.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            values.append(node_values / totals)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            classes=model.classes_,
+            feature_importances=model.feature_importances_
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, info):
+        """Reconstruir a floresta a partir dos arrays salvos por `arrays()` e de `info()`"""
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            children=arrays['children'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=info['max_depth'],
+            classes=arrays['classes'],
+            feature_importances=arrays.get('feature_importances')
+        )
+
+    def info(self):
+        """Parâmetros escalares gravados no manifest"""
+        return {'max_depth': self.max_depth, 'n_estimators': self.n_estimators}
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays do modelo"""
+        return sum(arr.nbytes for arr in (
+            self.feature, self.threshold, self.children, self.value, self.roots
+        ))
+
+    def arrays(self):
+        """Arrays que definem o modelo (usados para serialização)"""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'value': self.value,
+            'roots': self.roots,
+            'classes': self.classes_,
+            'feature_importances': self.feature_importances_
+        }
+
+    def apply(self, X):
+        """Índice global da folha alcançada em cada árvore, formato (n_amostras, n_árvores)"""
+        # O sklearn compara as features em float32 com limiares em float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_samples, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_samples, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            values = np.take(flat_X, row_offsets + np.take(self.feature, nodes))
+            go_left = values <= np.take(self.threshold, nodes)
+            nodes = np.take(self.children, 2 * nodes + go_left)
+
+        return nodes
+
+    def predict_proba(self, X):
+        """Média das probabilidades das folhas, como `RandomForestClassifier.predict_proba`"""
+        leaves = self.apply(X)
+        # Soma ao longo do primeiro eixo = acumulação árvore a árvore, na ordem do sklearn
+        proba = np.take(self.value, leaves.T, axis=0).sum(axis=0)
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        """Classe mais provável para cada amostra"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class CompiledLinear:
+    """
+    Modelo linear binário (regressão logística / SGD com log-loss)
+    compilado em coef + intercept: P(phishing) = sigmoid(x · coef + intercept)
+    """
+
+    kind = 'linear'
+
+    def __init__(self, coef, intercept, classes, feature_importances=None):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = np.asarray(classes)
+        if feature_importances is None:
+            weights = np.abs(np.asarray(coef, dtype=np.float64))
+            total = weights.sum()
+            feature_importances = weights / total if total > 0 else weights
+        self.feature_importances_ = np.asarray(feature_importances, dtype=np.float64)
+        self.n_features = len(self.coef)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compilar LogisticRegression ou SGDClassifier(loss='log_loss') treinado"""
+        if len(model.classes_) != 2:
+            raise ValueError('Somente modelos lineares binários são suportados')
+        return cls(
+            coef=np.asarray(model.coef_[0], dtype=np.float64),
+            intercept=np.asarray(model.intercept_[:1], dtype=np.float64),
+            classes=model.classes_
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, info):
+        """Reconstruir o modelo a partir dos arrays salvos por `arrays()`"""
+        return cls(
+            coef=arrays['coef'],
+            intercept=arrays['intercept'],
+            classes=arrays['classes'],
+            feature_importances=arrays.get('feature_importances')
+        )
+
+    def info(self):
+        """Parâmetros escalares gravados no manifest"""
+        return {'n_features': self.n_features}
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays do modelo"""
+        return self.coef.nbytes + self.intercept.nbytes
+
+    def arrays(self):
+        """Arrays que definem o modelo (usados para serialização)"""
+        return {
+            'coef': self.coef,
+            'intercept': self.intercept,
+            'classes': self.classes_,
+            'feature_importances': self.feature_importances_
+        }
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X @ self.coef + self.intercept[0]
+
+    def predict_proba(self, X):
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        """Classe mais provável para cada amostra"""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def compile_model(model):
+    """Compilar um modelo sklearn suportado; retorna (tipo, motor)"""
+    if hasattr(model, 'estimators_') and hasattr(model.estimators_[0], 'tree_'):
+        return 'random_forest', CompiledForest.from_sklearn(model)
+    if hasattr(model, 'coef_'):
+        return 'linear', CompiledLinear.from_sklearn(model)
+    raise ValueError(f'Modelo não suportado pelo motor de inferência: {type(model).__name__}')
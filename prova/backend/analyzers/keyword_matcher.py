@@ -0,0 +1,131 @@
+"""
+Busca de palavras-chave em uma passada (Aho-Corasick)
+Todas as listas de regras (informações sensíveis, urgência, OAuth...)
+são compiladas num único autômato; cada texto é percorrido uma vez e
+devolve os acertos de todas as categorias. As listas ficam em
+data/rules/keywords.json e podem ser trocadas sem mexer no código
+"""
+
+import json
+import os
+from collections import deque
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - fallback em Python puro
+    ahocorasick = None
+
+DEFAULT_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'rules', 'keywords.json'
+)
+
+
+def load_rules(path=None):
+    """Carregar as listas de palavras-chave (categoria -> lista) de um arquivo JSON"""
+    path = path or os.environ.get('KEYWORD_RULES_PATH', DEFAULT_RULES_PATH)
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    return {category: [keyword.lower() for keyword in keywords] for category, keywords in rules.items()}
+
+
+class _PythonAutomaton:
+    """Aho-Corasick em Python puro (usado quando o pyahocorasick não está instalado)"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for keyword, value in patterns.items():
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                    self.goto[state][char] = next_state
+                state = next_state
+            self.output[state] = (value,)
+
+        # Links de falha em largura; cada estado herda as saídas do seu sufixo
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0) if state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter(self, text):
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield end, value
+
+
+def build_automaton(patterns):
+    """
+    Autômato Aho-Corasick para um dict palavra -> valor
+    iter(texto) devolve (posição final, valor) de cada ocorrência
+    """
+    if ahocorasick is None:
+        return _PythonAutomaton(patterns)
+    automaton = ahocorasick.Automaton()
+    for keyword, value in patterns.items():
+        automaton.add_word(keyword, value)
+    automaton.make_automaton()
+    return automaton
+
+
+class KeywordMatcher:
+    """Autômato único sobre todas as categorias de regras"""
+
+    def __init__(self, rules):
+        self.rules = rules
+
+        # Uma palavra pode pertencer a várias categorias
+        patterns = {}
+        for category, keywords in rules.items():
+            for keyword in keywords:
+                patterns.setdefault(keyword, (keyword, []))[1].append(category)
+
+        self.automaton = build_automaton(patterns)
+
+    def scan(self, text):
+        """
+        Encontrar todas as palavras-chave num texto (já em minúsculas)
+
+        Returns:
+            dict categoria -> palavras encontradas (sem repetição, na ordem do texto)
+        """
+        hits = {category: [] for category in self.rules}
+        seen = set()
+        if not text:
+            return hits
+        for _, (keyword, categories) in self.automaton.iter(text):
+            if keyword in seen:
+                continue
+            seen.add(keyword)
+            for category in categories:
+                hits[category].append(keyword)
+        return hits
+
+
+_default_matcher = None
+
+
+def default_matcher():
+    """Matcher compartilhado com as regras padrão (compilado uma única vez)"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = KeywordMatcher(load_rules())
+    return _default_matcher
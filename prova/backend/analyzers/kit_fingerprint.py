@@ -0,0 +1,233 @@
+"""
+Impressão digital de kits de phishing
+Campanhas reaproveitam o mesmo HTML de kit em milhares de domínios
+descartáveis. A estrutura do DOM (tags, nomes de atributos, tipos/nomes de
+campos e classes; sem texto, URLs ou ids) vira uma sequência de tokens com:
+  - hash exato (64 bits) da sequência normalizada
+  - simhash de 64 bits sobre shingles de tokens (quase-duplicatas)
+O índice de kits conhecidos é um artefato versionado (ModelArtifactStore,
+memory-map): hash exato por busca binária e simhash por blocos (princípio
+da casa dos pombos: distância <= 3 em 64 bits => algum bloco de 16 bits
+idêntico), ambos em microssegundos mesmo com milhões de entradas
+"""
+
+import hashlib
+import time
+
+import numpy as np
+
+from .dom_visitor import DomRule, register_rule
+from .hamming import hamming_distances
+from .model_store import ModelArtifactStore, ServingArtifact, register_engine
+
+SHINGLE_SIZE = 4
+MIN_TOKENS = 40              # páginas muito pequenas (erro, parking) não são identificáveis
+HAMMING_THRESHOLD = 3
+N_BLOCKS = HAMMING_THRESHOLD + 1
+BLOCK_BITS = 64 // N_BLOCKS
+
+# Atributos cujo valor faz parte da estrutura do kit
+STRUCTURAL_ATTRIBUTES = {'type', 'name', 'method', 'autocomplete', 'class'}
+
+# Score de risco atribuído a uma página de kit conhecido
+KIT_MATCH_RISK = {'exact': 95, 'near': 85}
+
+def tag_token(tag):
+    """Token estrutural de um elemento: nome, atributos e valores estruturais"""
+    names = sorted(tag.attrs)
+    values = []
+    for name in names:
+        if name in STRUCTURAL_ATTRIBUTES:
+            value = tag.attrs[name]
+            value = ' '.join(value) if isinstance(value, list) else str(value)
+            values.append(f'{name}={value.lower()}')
+    token = f"{tag.name}[{','.join(names)}]"
+    if values:
+        token += '{' + ','.join(values) + '}'
+    return token
+
+
+def dom_tokens(soup):
+    """Sequência normalizada de tokens estruturais do DOM"""
+    return [tag_token(tag) for tag in soup.find_all(True)]
+
+
+@register_rule
+class DomTokensRule(DomRule):
+    """Tokens estruturais coletados na passada única do DomVisitor"""
+
+    name = 'dom_tokens'
+    all_tags = True
+
+    def __init__(self):
+        self.tokens = []
+
+    def visit(self, tag):
+        self.tokens.append(tag_token(tag))
+
+    def result(self):
+        return self.tokens
+
+
+def hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def simhash(tokens, shingle_size=SHINGLE_SIZE):
+    """Simhash de 64 bits: voto de cada bit sobre os hashes dos shingles"""
+    count = max(1, len(tokens) - shingle_size + 1)
+    hashes = np.fromiter(
+        (hash64('\x1f'.join(tokens[i:i + shingle_size]).encode()) for i in range(count)),
+        dtype='<u8', count=count
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    majority = bits.sum(axis=0) * 2 > count
+    return int(np.packbits(majority, bitorder='little').view('<u8')[0])
+
+
+def fingerprint_page(soup, tokens=None):
+    """
+    Impressão digital da página (tokens: já coletados pelo DomVisitor)
+
+    Returns:
+        {'exact', 'simhash' (hex de 64 bits), 'tokens'} ou None se a página for pequena demais
+    """
+    if tokens is None:
+        tokens = dom_tokens(soup)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    return {
+        'exact': f"{hash64(chr(10).join(tokens).encode()):016x}",
+        'simhash': f'{simhash(tokens):016x}',
+        'tokens': len(tokens)
+    }
+
+
+def block_values(simhashes, block):
+    return ((simhashes >> np.uint64(block * BLOCK_BITS)) & np.uint64((1 << BLOCK_BITS) - 1)).astype(np.uint16)
+
+
+@register_engine
+class KitIndex:
+    """Índice imutável de impressões digitais de kits conhecidos"""
+
+    kind = 'kit_index'
+
+    def __init__(self, exact, exact_ids, simhashes, domains, blocks, block_ids,
+                 hamming_threshold=HAMMING_THRESHOLD):
+        self.exact = exact
+        self.exact_ids = exact_ids
+        self.simhashes = simhashes
+        self.domains = domains
+        self.blocks = blocks
+        self.block_ids = block_ids
+        self.hamming_threshold = hamming_threshold
+
+    @classmethod
+    def build(cls, exact, simhashes, domains):
+        """Montar o índice a partir de arrays alinhados (uma entrada por kit)"""
+        exact = np.asarray(exact, dtype=np.uint64)
+        simhashes = np.asarray(simhashes, dtype=np.uint64)
+        domains = np.asarray(domains, dtype=np.uint32)
+
+        order = np.argsort(exact, kind='stable')
+        blocks, block_ids = [], []
+        for block in range(N_BLOCKS):
+            values = block_values(simhashes, block)
+            block_order = np.argsort(values, kind='stable')
+            blocks.append(values[block_order])
+            block_ids.append(block_order.astype(np.int64))
+
+        return cls(exact[order], order.astype(np.int64), simhashes, domains, blocks, block_ids)
+
+    @classmethod
+    def from_arrays(cls, arrays, info):
+        n_blocks = info['n_blocks']
+        if n_blocks != N_BLOCKS:
+            raise KeyError(f'n_blocks={n_blocks}')
+        return cls(
+            arrays['exact'], arrays['exact_ids'], arrays['simhash'], arrays['domains'],
+            [arrays[f'block{b}'] for b in range(n_blocks)],
+            [arrays[f'block{b}_ids'] for b in range(n_blocks)],
+            info['hamming_threshold']
+        )
+
+    def arrays(self):
+        arrays = {
+            'exact': self.exact,
+            'exact_ids': self.exact_ids,
+            'simhash': self.simhashes,
+            'domains': self.domains
+        }
+        for block in range(N_BLOCKS):
+            arrays[f'block{block}'] = self.blocks[block]
+            arrays[f'block{block}_ids'] = self.block_ids[block]
+        return arrays
+
+    def info(self):
+        return {'hamming_threshold': self.hamming_threshold, 'n_blocks': N_BLOCKS, 'entries': len(self)}
+
+    def __len__(self):
+        return len(self.simhashes)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def lookup(self, fingerprint):
+        """
+        Procurar a impressão digital no índice
+
+        Returns:
+            dict com match ('exact'|'near'), entry, distance e domains, ou None
+        """
+        exact = np.uint64(int(fingerprint['exact'], 16))
+        i = int(np.searchsorted(self.exact, exact))
+        if i < len(self.exact) and self.exact[i] == exact:
+            entry = int(self.exact_ids[i])
+            return {'match': 'exact', 'entry': entry, 'distance': 0, 'domains': int(self.domains[entry])}
+
+        target = np.uint64(int(fingerprint['simhash'], 16))
+        candidates = []
+        for block in range(N_BLOCKS):
+            value = block_values(target, block)
+            lo = np.searchsorted(self.blocks[block], value, side='left')
+            hi = np.searchsorted(self.blocks[block], value, side='right')
+            if hi > lo:
+                candidates.append(self.block_ids[block][lo:hi])
+        if not candidates:
+            return None
+
+        candidates = np.unique(np.concatenate(candidates))
+        distances = hamming_distances(self.simhashes[candidates], np.uint64(target))
+        best = int(np.argmin(distances))
+        if distances[best] > self.hamming_threshold:
+            return None
+        entry = int(candidates[best])
+        return {'match': 'near', 'entry': entry, 'distance': int(distances[best]), 'domains': int(self.domains[entry])}
+
+
+class KitFingerprintIndex(ServingArtifact):
+    """Índice de kits em uso pelo servidor (troca de versão sem reiniciar)"""
+
+    def __init__(self, store=None):
+        super().__init__(store or ModelArtifactStore('models/kit_index'), 'Índice de kits')
+        if self.load_current():
+            print(f"✓ Índice de kits {self.serving.version} carregado ({len(self.serving.engine):,} kits)")
+
+    def lookup(self, fingerprint):
+        """Kit conhecido correspondente à impressão digital (ou None)"""
+        if not fingerprint:
+            return None
+        self.refresh()
+        serving = self.serving
+        if serving is None or len(serving.engine) == 0:
+            return None
+
+        start = time.perf_counter()
+        match = serving.engine.lookup(fingerprint)
+        if match:
+            match['index_version'] = serving.version
+            match['lookup_us'] = round((time.perf_counter() - start) * 1e6, 1)
+            match['risk_score'] = KIT_MATCH_RISK[match['match']]
+        return match
@@ -0,0 +1,204 @@
+"""
+Modelo léxico de URL (sem rede)
+Usa apenas a string da URL: n-gramas de caracteres com hashing + as contagens
+léxicas do MLClassifier, num modelo linear esparso. Não depende de WHOIS,
+DNS ou do conteúdo da página, então o score sai em dezenas de microssegundos
+e serve como veredito preliminar e filtro de primeiro estágio
+"""
+
+import math
+import time
+from zlib import crc32
+
+import numpy as np
+
+from .ml_classifier import extract_url_features
+from .model_store import ModelArtifactStore, ServingArtifact, register_engine
+
+NGRAM_SIZES = (3, 4, 5)
+DEFAULT_HASH_BITS = 18
+
+# Contagens léxicas usadas como features densas (entram como log1p)
+COUNT_FEATURES = [
+    'url_length', 'num_dots', 'num_hyphens', 'num_underscores',
+    'num_special_chars', 'num_digits', 'has_ip', 'domain_length',
+    'num_subdomains', 'has_https'
+]
+
+# Limiares do veredito preliminar
+LIKELY_SAFE_THRESHOLD = 0.1
+LIKELY_PHISHING_THRESHOLD = 0.9
+
+
+def ngram_indices(url, n_buckets):
+    """Índices (com repetição) dos n-gramas de caracteres da URL no espaço de hashing"""
+    data = url.lower().encode('utf-8', 'ignore')
+    mask = n_buckets - 1
+    indices = []
+    append = indices.append
+    for n in NGRAM_SIZES:
+        for i in range(len(data) - n + 1):
+            append(crc32(data[i:i + n]) & mask)
+    return indices
+
+
+def count_features(url):
+    """Contagens léxicas em escala log1p, na ordem de COUNT_FEATURES"""
+    features = extract_url_features(url)
+    return [math.log1p(max(0, features[name])) for name in COUNT_FEATURES]
+
+
+@register_engine
+class LexicalURLModel:
+    """
+    Modelo linear sobre [n-gramas com hashing | contagens léxicas]
+    P(phishing) = sigmoid(intercept + Σ w[hash(ngram)] + Σ v[j] · log1p(contagem_j))
+    """
+
+    kind = 'lexical'
+
+    def __init__(self, weights, count_weights, intercept):
+        if len(weights) & (len(weights) - 1):
+            raise ValueError('O número de buckets de hashing deve ser potência de 2')
+        # weights pode ser memory-mapped; count_weights/intercept são minúsculos
+        self.weights = weights
+        self.count_weights = [float(v) for v in count_weights]
+        self.intercept = float(np.asarray(intercept).reshape(-1)[0])
+        self.n_buckets = len(weights)
+
+    @classmethod
+    def from_sklearn(cls, model, n_buckets):
+        """Separar coef_ de um modelo linear treinado em build_matrix()"""
+        coef = np.asarray(model.coef_[0], dtype=np.float32)
+        return cls(coef[:n_buckets], coef[n_buckets:], model.intercept_)
+
+    @classmethod
+    def from_arrays(cls, arrays, info):
+        return cls(arrays['weights'], arrays['count_weights'], arrays['intercept'])
+
+    def arrays(self):
+        return {
+            'weights': self.weights,
+            'count_weights': np.asarray(self.count_weights, dtype=np.float32),
+            'intercept': np.asarray([self.intercept], dtype=np.float64)
+        }
+
+    def info(self):
+        return {'n_buckets': self.n_buckets, 'ngram_sizes': list(NGRAM_SIZES)}
+
+    @property
+    def nbytes(self):
+        return self.weights.nbytes
+
+    def decision(self, url):
+        z = self.intercept + float(np.take(self.weights, ngram_indices(url, self.n_buckets)).sum())
+        for weight, value in zip(self.count_weights, count_features(url)):
+            z += weight * value
+        return z
+
+    def score(self, url):
+        """Probabilidade de phishing de uma URL"""
+        z = self.decision(url)
+        # sigmoid numericamente estável
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def predict_proba(self, urls):
+        """Probabilidades [legítima, phishing] para uma lista de URLs"""
+        positive = np.array([self.score(url) for url in urls])
+        return np.column_stack([1.0 - positive, positive])
+
+
+def build_matrix(urls, n_buckets):
+    """Matriz esparsa (CSR) de treino, com o mesmo layout usado em decision()"""
+    from scipy.sparse import csr_matrix
+
+    indices, data, indptr = [], [], [0]
+    for url in urls:
+        row = ngram_indices(url, n_buckets)
+        indices.extend(row)
+        data.extend([1.0] * len(row))
+        indices.extend(range(n_buckets, n_buckets + len(COUNT_FEATURES)))
+        data.extend(count_features(url))
+        indptr.append(len(indices))
+
+    matrix = csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(urls), n_buckets + len(COUNT_FEATURES))
+    )
+    matrix.sum_duplicates()
+    return matrix
+
+
+class LexicalURLClassifier(ServingArtifact):
+    """Veredito preliminar instantâneo a partir apenas da URL"""
+
+    def __init__(self, store=None):
+        super().__init__(store or ModelArtifactStore('models/lexical_artifacts'), 'Modelo léxico')
+        self.load_model()
+
+    def load_model(self):
+        """
+        Carregar a versão ativa, se houver
+        Nada é treinado ao iniciar: a versão vem de `python -m training.lexical`
+        """
+        if not self.store.current_version():
+            print("ℹ️ Nenhum modelo léxico publicado - veredito preliminar indisponível")
+        elif self.load_current():
+            print(f"✓ Modelo léxico {self.serving.version} carregado (memory-map, fonte: {self.training_source})")
+
+    @property
+    def training_source(self):
+        serving = self.serving
+        return serving.metadata.get('source') if serving else None
+
+    @property
+    def trained_on_labeled_data(self):
+        """
+        A versão em uso foi treinada com URLs rotuladas reais?
+        (modelos de URLs sintéticas não servem para descartar URLs: dão score
+        baixo a phishing real que foge dos padrões gerados)
+        """
+        self.refresh()
+        source = self.training_source
+        return bool(source) and source != 'synthetic'
+
+    def score(self, url):
+        """
+        Veredito preliminar (sem rede)
+
+        Returns:
+            dict com probabilidade, veredito e latência da inferência
+        """
+        self.refresh()
+        serving = self.serving
+        if serving is None:
+            return {
+                'phishing_probability': None,
+                'verdict': 'UNAVAILABLE',
+                'preliminary': True,
+                'model_version': None,
+                'inference_us': 0.0
+            }
+
+        start = time.perf_counter()
+        probability = serving.engine.score(url)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+
+        if probability >= LIKELY_PHISHING_THRESHOLD:
+            verdict = 'LIKELY_PHISHING'
+        elif probability <= LIKELY_SAFE_THRESHOLD:
+            verdict = 'LIKELY_SAFE'
+        else:
+            verdict = 'UNCERTAIN'
+
+        return {
+            'phishing_probability': probability,
+            'verdict': verdict,
+            'preliminary': True,
+            'model_version': serving.version,
+            'trained_on_labeled_data': self.training_source not in (None, 'synthetic'),
+            'inference_us': round(elapsed_us, 1)
+        }
@@ -4,7 +4,6 @@ Usa modelo pré-treinado com dataset público UCI Phishing Websites
 Dataset: 11.000+ URLs reais de phishing e legítimas
 """
 
-import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import joblib
@@ -13,131 +12,235 @@ from urllib.parse import urlparse
 import re
 import pandas as pd
 import requests
+import threading
+import time
+from datetime import datetime
+import sklearn
+from .cpu_pool import default_cpu_pool, register_preload
+from .inference_engine import CompiledForest
+from .model_store import ModelArtifactStore, ModelArtifactError
+
+# Ordem das features esperada pelo modelo
+FEATURE_COLUMNS = [
+    'url_length', 'num_dots', 'num_hyphens', 'num_underscores',
+    'num_special_chars', 'num_digits', 'has_ip', 'domain_length',
+    'num_subdomains', 'has_https', 'domain_age_days'
+]
+
+# Hiperparâmetros do Random Forest de produção
+FOREST_PARAMS = {
+    'n_estimators': 200,      # Mais árvores para melhor precisão
+    'max_depth': 15,          # Profundidade adequada
+    'min_samples_split': 4,
+    'min_samples_leaf': 2,
+    'max_features': 'sqrt',   # Melhora generalização
+    'random_state': 42,
+    'n_jobs': -1              # Paralelização
+}
+
+# Idade assumida quando o WHOIS não está disponível
+DEFAULT_DOMAIN_AGE_DAYS = 365
+
+def extract_url_features(url):
+    """Features léxicas da URL (todas as features do modelo exceto domain_age_days)"""
+    parsed = urlparse(url)
+    domain = parsed.netloc
+    
+    return {
+        'url_length': len(url),
+        'num_dots': url.count('.'),
+        'num_hyphens': url.count('-'),
+        'num_underscores': url.count('_'),
+        'num_special_chars': len(re.findall(r'[^a-zA-Z0-9]', url)),
+        'num_digits': len(re.findall(r'\d', url)),
+        'has_ip': 1 if re.search(r'\d+\.\d+\.\d+\.\d+', url) else 0,
+        'domain_length': len(domain),
+        'num_subdomains': len(domain.split('.')) - 2,
+        'has_https': 1 if url.startswith('https://') else 0
+    }
+
+# Modelo em uso nos workers do pool de CPU: {(raiz do store, versão): ServingModel}
+_worker_models = {}
+_worker_lock = threading.Lock()
+
+
+def _worker_serving(root, version):
+    with _worker_lock:
+        serving = _worker_models.get((root, version))
+        if serving is None:
+            serving = ModelArtifactStore(root).load(version, expected_schema=FEATURE_COLUMNS)
+            _worker_models.clear()  # só a versão em uso fica aberta
+            _worker_models[(root, version)] = serving
+        return serving
+
+
+@register_preload
+def preload_model():
+    """Carregar a versão ativa do modelo no worker (antes da primeira tarefa)"""
+    store = ModelArtifactStore()
+    version = store.current_version()
+    if version:
+        _worker_serving(store.root, version)
+
+
+def predict_task(root, version, feature_vector):
+    """
+    Tarefa do pool de CPU: vetor de features -> (probabilidades, importâncias)
+    A versão vem do processo principal, então um modelo recém-ativado vale
+    na próxima tarefa mesmo que o worker o tenha carregado antes
+    """
+    serving = _worker_serving(root, version)
+    return serving.predict_proba(feature_vector)[0].tolist(), serving.engine.feature_importances_.tolist()
+
 
 class MLClassifier:
-    def __init__(self):
+    def __init__(self, store=None, cpu_pool=None):
         self.model = None
         self.scaler = StandardScaler()
+        self.store = store or ModelArtifactStore()
+        self.cpu_pool = cpu_pool or default_cpu_pool()
+        self.serving = None
+        self.reload_interval = 5  # segundos entre verificações do ponteiro CURRENT
+        self._last_reload_check = 0.0
+        self._swap_lock = threading.Lock()
         self.load_or_train_model()
     
+    @property
+    def engine(self):
+        """Floresta compilada da versão em uso"""
+        return self.serving.engine if self.serving else None
+    
     def load_or_train_model(self):
-        """Carregar modelo existente ou treinar novo com dataset UCI"""
-        model_path = 'models/phishing_classifier.pkl'
-        scaler_path = 'models/scaler.pkl'
+        """Carregar a versão ativa do artefato ou treinar a primeira versão"""
+        if self.store.current_version():
+            # Artefato publicado: qualquer divergência é erro fatal (sem retreino silencioso)
+            self.swap_model(self.store.load(expected_schema=FEATURE_COLUMNS))
+            print(f"✓ Modelo pré-treinado {self.serving.version} carregado (memory-map)")
+            return
         
-        if os.path.exists(model_path) and os.path.exists(scaler_path):
+        legacy_model_path = 'models/phishing_classifier.pkl'
+        legacy_scaler_path = 'models/scaler.pkl'
+        
+        if os.path.exists(legacy_model_path) and os.path.exists(legacy_scaler_path):
+            # Migrar modelo no formato antigo (pickle avulso) para artefato versionado
             try:
-                self.model = joblib.load(model_path)
-                self.scaler = joblib.load(scaler_path)
-                print("✓ Modelo pré-treinado carregado com sucesso")
+                self.model = joblib.load(legacy_model_path)
+                self.scaler = joblib.load(legacy_scaler_path)
             except Exception as e:
-                print(f"Erro ao carregar modelo: {e}")
-                self.train_model()
+                raise ModelArtifactError(f'Modelo legado corrompido em models/: {e}')
+            self.publish_model({'source': 'legacy_pickle'})
+            print(f"✓ Modelo legado migrado para {self.serving.version}")
         else:
             # Treinar modelo com dataset UCI Phishing Websites
             print("🎓 Treinando modelo com dataset UCI Phishing Websites (11.000+ URLs)...")
             self.train_model()
     
+    def publish_model(self, metadata, activate=True):
+        """Publicar self.model/self.scaler como nova versão e (opcionalmente) colocá-la em uso"""
+        version = self.store.publish(
+            CompiledForest.from_sklearn(self.model),
+            self.scaler,
+            FEATURE_COLUMNS,
+            metadata=metadata,
+            sklearn_model=self.model,
+            activate=activate
+        )
+        if activate:
+            self.swap_model(self.store.load(version, expected_schema=FEATURE_COLUMNS))
+        return version
+    
+    def swap_model(self, serving):
+        """Trocar o modelo em uso (requisições em andamento mantêm a referência antiga)"""
+        with self._swap_lock:
+            self.serving = serving
+            self._last_reload_check = time.monotonic()
+    
+    def activate_version(self, version):
+        """Validar, ativar e colocar em uso uma versão publicada, sem reiniciar"""
+        serving = self.store.load(version, expected_schema=FEATURE_COLUMNS)
+        self.store.activate(version)
+        self.swap_model(serving)
+        return self.get_model_info()
+    
+    def refresh_model(self, force=False):
+        """
+        Recarregar se outro processo ativou uma nova versão (CURRENT mudou)
+        Em caso de artefato inválido, mantém a versão atual em uso
+        """
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval:
+            return False
+        self._last_reload_check = now
+        
+        version = self.store.current_version()
+        if not version or (self.serving and version == self.serving.version):
+            return False
+        
+        try:
+            self.swap_model(self.store.load(version, expected_schema=FEATURE_COLUMNS))
+            print(f"🔄 Modelo trocado para {version}")
+            return True
+        except ModelArtifactError as e:
+            print(f"⚠️ Versão {version} rejeitada, mantendo {self.serving.version if self.serving else None}: {e}")
+            return False
+    
+    def get_model_info(self):
+        """Informações da versão em uso e das versões disponíveis"""
+        serving = self.serving
+        return {
+            'version': serving.version if serving else None,
+            'created_at': serving.manifest.get('created_at') if serving else None,
+            'checksum': serving.manifest.get('checksum') if serving else None,
+            'feature_schema': serving.manifest.get('feature_schema') if serving else FEATURE_COLUMNS,
+            'metadata': serving.metadata if serving else {},
+            'available_versions': self.store.list_versions()
+        }
+    
     def download_uci_dataset(self):
-        """Baixar dataset UCI Phishing Websites"""
+        """
+        Baixar dataset UCI Phishing Websites
+        
+        Returns:
+            (X, y, checksum): arrays de features/labels e SHA-256 do CSV de origem
+        """
         try:
             # Dataset UCI Phishing - arquivo local backup
             dataset_path = 'data/phishing_dataset.csv'
             
             if os.path.exists(dataset_path):
+                # Import tardio: training.dataset_cache importa este módulo
+                from training.dataset_cache import load_training_arrays
+                
+                # Arrays memory-mapped do cache binário (CSV só é lido quando muda)
+                X, y, meta = load_training_arrays(dataset_path)
                 print("✓ Usando dataset local")
-                return pd.read_csv(dataset_path)
+                return X, y, meta['source_sha256']
             
             # Fallback: criar dataset sintético MUITO mais realista
             print("⚠️ Dataset UCI não disponível, usando dataset sintético realista")
-            return self.create_synthetic_realistic_dataset()
             
         except Exception as e:
             print(f"⚠️ Erro ao baixar dataset: {e}")
-            return self.create_synthetic_realistic_dataset()
+        
+        df = self.create_synthetic_realistic_dataset()
+        return df[FEATURE_COLUMNS].values, df['is_phishing'].values, None
     
     def create_synthetic_realistic_dataset(self):
         """Criar dataset sintético realista baseado em características de phishing conhecidas"""
-        np.random.seed(42)
-        n_samples = 2000
-        
-        # 1000 URLs Legítimas
-        legitimate_data = []
-        legitimate_domains = [
-            'google.com', 'facebook.com', 'amazon.com', 'microsoft.com', 'apple.com',
-            'twitter.com', 'linkedin.com', 'github.com', 'stackoverflow.com', 'wikipedia.org',
-            'reddit.com', 'youtube.com', 'instagram.com', 'netflix.com', 'spotify.com'
-        ]
-        
-        for _ in range(n_samples // 2):
-            domain = np.random.choice(legitimate_domains)
-            legitimate_data.append({
-                'url_length': np.random.randint(20, 50),
-                'num_dots': np.random.randint(1, 3),
-                'num_hyphens': np.random.randint(0, 2),
-                'num_underscores': 0,
-                'num_special_chars': np.random.randint(3, 8),
-                'num_digits': np.random.randint(0, 5),
-                'has_ip': 0,
-                'domain_length': len(domain),
-                'num_subdomains': np.random.randint(0, 2),
-                'has_https': 1,
-                'domain_age_days': np.random.randint(1000, 8000),
-                'is_phishing': 0
-            })
-        
-        # 1000 URLs Phishing
-        phishing_data = []
-        phishing_patterns = [
-            'verify-account', 'secure-login', 'update-payment', 'confirm-identity',
-            'bank-alert', 'suspended-account', 'unusual-activity', 'security-check'
-        ]
-        
-        for _ in range(n_samples // 2):
-            pattern = np.random.choice(phishing_patterns)
-            phishing_data.append({
-                'url_length': np.random.randint(60, 150),
-                'num_dots': np.random.randint(3, 8),
-                'num_hyphens': np.random.randint(3, 10),
-                'num_underscores': np.random.randint(2, 5),
-                'num_special_chars': np.random.randint(15, 35),
-                'num_digits': np.random.randint(8, 20),
-                'has_ip': np.random.choice([0, 1], p=[0.7, 0.3]),
-                'domain_length': np.random.randint(30, 70),
-                'num_subdomains': np.random.randint(2, 6),
-                'has_https': np.random.choice([0, 1], p=[0.6, 0.4]),
-                'domain_age_days': np.random.randint(0, 30),  # Domínios novos
-                'is_phishing': 1
-            })
+        # Import tardio: training.synthetic importa este módulo
+        from training.synthetic import CLASSIFIER_FALLBACK_PROFILE, generate_dataset
         
-        df = pd.DataFrame(legitimate_data + phishing_data)
-        return df.sample(frac=1).reset_index(drop=True)  # Shuffle
+        # 1000 URLs legítimas + 1000 URLs phishing, geradas de forma vetorizada
+        columns = generate_dataset(1000, profile=CLASSIFIER_FALLBACK_PROFILE, seed=42)
+        return pd.DataFrame(columns)
     
     def train_model(self):
         """Treinar modelo com dataset UCI Phishing Websites"""
-        # Baixar/carregar dataset
-        df = self.download_uci_dataset()
-        
-        # Separar features e labels
-        feature_columns = [
-            'url_length', 'num_dots', 'num_hyphens', 'num_underscores',
-            'num_special_chars', 'num_digits', 'has_ip', 'domain_length',
-            'num_subdomains', 'has_https', 'domain_age_days'
-        ]
-        
-        X = df[feature_columns].values
-        y = df['is_phishing'].values
+        # Baixar/carregar dataset (features e labels já separados)
+        X, y, dataset_checksum = self.download_uci_dataset()
         
         # Treinar modelo Random Forest otimizado
-        self.model = RandomForestClassifier(
-            n_estimators=200,      # Mais árvores para melhor precisão
-            max_depth=15,          # Profundidade adequada
-            min_samples_split=4,
-            min_samples_leaf=2,
-            max_features='sqrt',   # Melhora generalização
-            random_state=42,
-            n_jobs=-1              # Paralelização
-        )
+        self.model = RandomForestClassifier(**FOREST_PARAMS)
         
         # Normalizar features
         self.scaler.fit(X)
@@ -149,15 +252,23 @@ class MLClassifier:
         # Calcular acurácia
         accuracy = self.model.score(X_scaled, y)
         
-        # Salvar modelo E scaler
-        os.makedirs('models', exist_ok=True)
-        joblib.dump(self.model, 'models/phishing_classifier.pkl')
-        joblib.dump(self.scaler, 'models/scaler.pkl')
-        
         # Estatísticas
         phishing_count = sum(y == 1)
         legitimate_count = sum(y == 0)
         
+        # Publicar modelo E scaler como artefato versionado
+        self.publish_model({
+            'source': 'data/phishing_dataset.csv',
+            'dataset_sha256': dataset_checksum,
+            'trained_at': datetime.now().isoformat(),
+            'n_samples': int(len(X)),
+            'legitimate_count': int(legitimate_count),
+            'phishing_count': int(phishing_count),
+            'train_accuracy': float(accuracy),
+            'params': {k: v for k, v in self.model.get_params().items() if isinstance(v, (int, float, str, type(None)))},
+            'sklearn_version': sklearn.__version__
+        })
+        
         print(f"""
 ╔════════════════════════════════════════════════════════════╗
 ║  🎓 MODELO PRÉ-TREINADO CARREGADO                         ║
@@ -186,51 +297,67 @@ class MLClassifier:
             
             # Preparar para predição
             feature_vector = self.prepare_feature_vector(features)
-            feature_vector_scaled = self.scaler.transform([feature_vector])
             
-            # Predição
-            probability = self.model.predict_proba(feature_vector_scaled)[0]
+            # Predição (motor compilado, sem threads do joblib)
+            self.refresh_model()
+            serving = self.serving
+            probability = serving.predict_proba(feature_vector)[0]
+            self.fill_prediction(result, serving.version, probability, serving.engine.feature_importances_, features)
             
-            result['phishing_probability'] = float(probability[1])  # Probabilidade de phishing
-            result['legitimate_probability'] = float(probability[0])
-            result['confidence'] = float(max(probability))
+        except Exception as e:
+            result['error'] = str(e)
+        
+        return result
+    
+    async def classify_async(self, url, heuristic_results, content_results):
+        """Classificar URL com a inferência no pool de CPU (modelo pré-carregado nos workers)"""
+        result = {
+            'phishing_probability': 0.0,
+            'confidence': 0.0,
+            'features_used': {}
+        }
+        
+        try:
+            features = self.extract_features(url, heuristic_results, content_results)
+            result['features_used'] = features
+            feature_vector = self.prepare_feature_vector(features)
             
-            # Importância das features
-            feature_importance = self.model.feature_importances_
-            result['top_contributing_features'] = self.get_top_features(
-                feature_importance,
-                features
+            self.refresh_model()
+            version = self.serving.version
+            probability, feature_importance = await self.cpu_pool.run(
+                predict_task, self.store.root, version, feature_vector
             )
+            self.fill_prediction(result, version, probability, feature_importance, features)
             
         except Exception as e:
             result['error'] = str(e)
         
         return result
     
+    def fill_prediction(self, result, version, probability, feature_importance, features):
+        """Preencher o resultado com as probabilidades e as features mais importantes"""
+        result['model_version'] = version
+        
+        result['phishing_probability'] = float(probability[1])  # Probabilidade de phishing
+        result['legitimate_probability'] = float(probability[0])
+        result['confidence'] = float(max(probability))
+        
+        # Importância das features
+        result['top_contributing_features'] = self.get_top_features(
+            feature_importance,
+            features
+        )
+    
     def extract_features(self, url, heuristic_results, content_results):
         """Extrair features para ML"""
-        parsed = urlparse(url)
-        domain = parsed.netloc
-        
-        features = {
-            'url_length': len(url),
-            'num_dots': url.count('.'),
-            'num_hyphens': url.count('-'),
-            'num_underscores': url.count('_'),
-            'num_special_chars': len(re.findall(r'[^a-zA-Z0-9]', url)),
-            'num_digits': len(re.findall(r'\d', url)),
-            'has_ip': 1 if re.search(r'\d+\.\d+\.\d+\.\d+', url) else 0,
-            'domain_length': len(domain),
-            'num_subdomains': len(domain.split('.')) - 2,
-            'has_https': 1 if url.startswith('https://') else 0
-        }
+        features = extract_url_features(url)
         
         # Adicionar features dos resultados heurísticos
         if heuristic_results.get('checks', {}).get('whois'):
             whois_info = heuristic_results['checks']['whois'].get('info', {})
-            features['domain_age_days'] = whois_info.get('age_days', 365)
+            features['domain_age_days'] = whois_info.get('age_days', DEFAULT_DOMAIN_AGE_DAYS)
         else:
-            features['domain_age_days'] = 365
+            features['domain_age_days'] = DEFAULT_DOMAIN_AGE_DAYS
         
         # Adicionar features de conteúdo
         if content_results.get('checks', {}).get('login_forms'):
@@ -258,14 +385,8 @@ class MLClassifier:
     
     def get_top_features(self, importance, features):
         """Obter features mais importantes"""
-        feature_names = [
-            'url_length', 'num_dots', 'num_hyphens', 'num_underscores',
-            'num_special_chars', 'num_digits', 'has_ip', 'domain_length',
-            'num_subdomains', 'has_https', 'domain_age_days'
-        ]
-        
         # Criar lista de (feature, importance)
-        feature_importance = list(zip(feature_names, importance))
+        feature_importance = list(zip(FEATURE_COLUMNS, importance))
         
         # Ordenar por importância
         feature_importance.sort(key=lambda x: x[1], reverse=True)
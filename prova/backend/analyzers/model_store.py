@@ -0,0 +1,297 @@
+"""
+Artefatos de modelo versionados
+Cada versão é um diretório com arrays .npy (carregados com memory-map, então
+vários workers compartilham as mesmas páginas), um manifest.json com schema
+de features, metadados de treino e checksums, e um ponteiro CURRENT
+que permite trocar a versão ativa sem reiniciar o servidor. ServingArtifact
+é a base dos componentes que servem um artefato e acompanham o CURRENT
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from .inference_engine import CompiledForest, CompiledLinear
+
+FORMAT_VERSION = 1
+VERSION_PATTERN = re.compile(r'^v\d+$')  # nomes gerados por publish (ex: v0003)
+
+# Motores que podem ser gravados: tipo (manifest['kind']) -> classe
+ENGINE_TYPES = {
+    CompiledForest.kind: CompiledForest,
+    CompiledLinear.kind: CompiledLinear
+}
+
+
+def register_engine(engine_class):
+    """Registrar um novo tipo de motor (precisa de kind, arrays(), info() e from_arrays())"""
+    ENGINE_TYPES[engine_class.kind] = engine_class
+    return engine_class
+
+
+class ModelArtifactError(Exception):
+    """Artefato ausente, corrompido ou incompatível com o código em execução"""
+
+
+class ServingModel:
+    """Modelo pronto para servir: motor compilado + parâmetros do scaler"""
+
+    def __init__(self, version, engine, scaler_mean, scaler_scale, manifest):
+        self.version = version
+        self.engine = engine
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.manifest = manifest
+
+    @property
+    def metadata(self):
+        return self.manifest.get('metadata', {})
+
+    def scale(self, X):
+        """Mesma aritmética do StandardScaler.transform"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.scaler_mean is None:
+            return X
+        return (X - self.scaler_mean) / self.scaler_scale
+
+    def predict_proba(self, X):
+        return self.engine.predict_proba(self.scale(X))
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 de um arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelArtifactStore:
+    def __init__(self, root='models/artifacts'):
+        self.root = root
+        self.current_file = os.path.join(root, 'CURRENT')
+
+    def list_versions(self):
+        """Versões publicadas, da mais antiga para a mais nova"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if VERSION_PATTERN.match(name) and os.path.isfile(os.path.join(self.root, name, 'manifest.json'))
+        )
+
+    def current_version(self):
+        """Versão apontada por CURRENT (None se nada foi publicado)"""
+        try:
+            with open(self.current_file, 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def version_path(self, version):
+        """Diretório da versão; recusa nomes fora do padrão (ex: '../x' vindo da API) antes de tocar o disco"""
+        if not isinstance(version, str) or not VERSION_PATTERN.match(version):
+            raise ModelArtifactError(f'Nome de versão inválido: {version!r}')
+        return os.path.join(self.root, version)
+
+    def publish(self, engine, scaler, feature_schema, metadata=None, sklearn_model=None, activate=True):
+        """
+        Gravar uma nova versão de forma atômica (diretório temporário + rename)
+        `engine` é um dos motores de ENGINE_TYPES; `scaler` pode ser None
+
+        Returns:
+            nome da versão criada (ex: 'v0003')
+        """
+        os.makedirs(self.root, exist_ok=True)
+        versions = self.list_versions()
+        next_number = int(versions[-1][1:]) + 1 if versions else 1
+        version = f'v{next_number:04d}'
+
+        kind = getattr(engine, 'kind', None)
+        if ENGINE_TYPES.get(kind) is not type(engine):
+            raise ModelArtifactError(f'Motor não suportado: {type(engine).__name__}')
+
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        try:
+            arrays = {
+                name: array for name, array in engine.arrays().items() if array is not None
+            }
+            if scaler is not None:
+                arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+                arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+
+            files = {}
+            for name, array in arrays.items():
+                filename = f'{name}.npy'
+                np.save(os.path.join(staging, filename), np.ascontiguousarray(array))
+                files[filename] = file_sha256(os.path.join(staging, filename))
+
+            # Modelo sklearn original (para ferramentas offline; não é carregado ao servir)
+            if sklearn_model is not None:
+                joblib.dump(sklearn_model, os.path.join(staging, 'model.joblib'))
+                files['model.joblib'] = file_sha256(os.path.join(staging, 'model.joblib'))
+
+            manifest = {
+                'format_version': FORMAT_VERSION,
+                'version': version,
+                'kind': kind,
+                'created_at': datetime.now().isoformat(),
+                'feature_schema': list(feature_schema),
+                'engine': engine.info(),
+                'metadata': metadata or {},
+                'files': files,
+                'checksum': hashlib.sha256(
+                    ''.join(f'{name}:{files[name]}' for name in sorted(files)).encode()
+                ).hexdigest()
+            }
+            with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            # mkdtemp cria o diretório com 0700; workers de outros usuários precisam ler
+            os.chmod(staging, 0o755)
+            os.rename(staging, self.version_path(version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+
+        return version
+
+    def activate(self, version):
+        """Apontar CURRENT para a versão (troca atômica via os.replace)"""
+        self.version_path(version)
+        if version not in self.list_versions():
+            raise ModelArtifactError(f'Versão de modelo inexistente: {version}')
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.CURRENT-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_file)
+
+    def read_manifest(self, version):
+        manifest_path = os.path.join(self.version_path(version), 'manifest.json')
+        try:
+            with open(manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise ModelArtifactError(f'Manifest inválido em {manifest_path}: {e}')
+
+    def load(self, version=None, expected_schema=None, verify=True):
+        """
+        Carregar uma versão com memory-map; falha imediatamente em qualquer divergência
+
+        Raises:
+            ModelArtifactError: artefato ausente, checksum divergente ou schema incompatível
+        """
+        version = version or self.current_version()
+        if not version:
+            raise ModelArtifactError(f'Nenhuma versão de modelo publicada em {self.root}')
+
+        manifest = self.read_manifest(version)
+        path = self.version_path(version)
+
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ModelArtifactError(
+                f'{version}: formato {manifest.get("format_version")} não suportado (esperado {FORMAT_VERSION})'
+            )
+
+        if expected_schema is not None and manifest.get('feature_schema') != list(expected_schema):
+            raise ModelArtifactError(
+                f'{version}: schema de features incompatível: {manifest.get("feature_schema")}'
+            )
+
+        files = manifest.get('files', {})
+        for filename, expected_hash in files.items():
+            file_path = os.path.join(path, filename)
+            if not os.path.exists(file_path):
+                raise ModelArtifactError(f'{version}: arquivo ausente {filename}')
+            if verify and file_sha256(file_path) != expected_hash:
+                raise ModelArtifactError(f'{version}: checksum divergente em {filename}')
+
+        arrays = {}
+        for filename in files:
+            if filename.endswith('.npy'):
+                arrays[filename[:-4]] = np.load(os.path.join(path, filename), mmap_mode='r')
+
+        kind = manifest.get('kind')
+        if kind not in ENGINE_TYPES:
+            raise ModelArtifactError(f'{version}: tipo de modelo desconhecido: {kind}')
+
+        try:
+            engine = ENGINE_TYPES[kind].from_arrays(arrays, manifest.get('engine', {}))
+        except KeyError as e:
+            raise ModelArtifactError(f'{version}: componente ausente no artefato: {e}')
+
+        scaler_mean = arrays.get('scaler_mean')
+        scaler_scale = arrays.get('scaler_scale')
+        if scaler_mean is not None and len(scaler_mean) != len(manifest['feature_schema']):
+            raise ModelArtifactError(f'{version}: scaler não corresponde ao schema de features')
+
+        return ServingModel(version, engine, scaler_mean, scaler_scale, manifest)
+
+
+class ServingArtifact:
+    """
+    Artefato em uso por um componente do servidor (troca de versão sem reiniciar)
+    A cada `reload_interval` segundos confere o ponteiro CURRENT; uma versão
+    nova inválida é rejeitada e a atual continua em uso. Requisições em
+    andamento mantêm a referência que já pegaram de `serving`
+    """
+
+    reload_interval = 5  # segundos entre verificações do ponteiro CURRENT
+
+    def __init__(self, store, label):
+        self.store = store
+        self.label = label  # nome usado nas mensagens (ex: 'Índice de kits')
+        self.serving = None
+        self._last_reload_check = 0.0
+        self._swap_lock = threading.Lock()
+
+    @property
+    def version(self):
+        serving = self.serving
+        return serving.version if serving else None
+
+    def load_current(self):
+        """Carregar a versão ativa, se houver (True se carregou)"""
+        if not self.store.current_version():
+            return False
+        try:
+            self.swap(self.store.load())
+        except ModelArtifactError as e:
+            print(f"⚠️ {self.label}: versão ativa rejeitada: {e}")
+            return False
+        return True
+
+    def swap(self, serving):
+        with self._swap_lock:
+            self.serving = serving
+            self._last_reload_check = time.monotonic()
+
+    def refresh(self):
+        """Trocar de versão se o ponteiro CURRENT mudou (mantém a atual se a nova for inválida)"""
+        now = time.monotonic()
+        if now - self._last_reload_check < self.reload_interval:
+            return
+        self._last_reload_check = now
+
+        version = self.store.current_version()
+        if version and version != self.version:
+            try:
+                self.swap(self.store.load(version))
+            except ModelArtifactError as e:
+                print(f"⚠️ {self.label}: versão {version} rejeitada: {e}")
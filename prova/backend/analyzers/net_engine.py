@@ -0,0 +1,378 @@
+"""
+Motor de E/S de rede assíncrono
+Um único event loop (thread de fundo) concentra a parte de rede da análise:
+HTTP (aiohttp), DNS/DNSBL (dnspython assíncrono), inspeção TLS e
+geolocalização. Uma análise em andamento não segura threads esperando
+sockets, então o mesmo processo mantém centenas de análises em voo.
+Os analisadores expõem métodos *_async (rodam neste loop) e mantêm os
+métodos síncronos como invólucro via NetEngine.run()
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import ssl
+import threading
+import time
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from .http_client import MAX_CONNECTIONS_PER_HOST, USER_AGENT
+
+# Limites do motor (configuráveis por variável de ambiente)
+MAX_CONNECTIONS = int(os.environ.get('NET_MAX_CONNECTIONS', 512))
+DNS_TIMEOUT = float(os.environ.get('NET_DNS_TIMEOUT', 3))
+DNS_CACHE_SECONDS = 300
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+READ_CHUNK_SIZE = 64 * 1024
+
+# Content-Types aceitos como texto (o resto é tratado como binário)
+TEXT_CONTENT_TYPES = (
+    'text/', 'application/xhtml+xml', 'application/xml',
+    'application/javascript', 'application/json'
+)
+
+
+class NetError(IOError):
+    """Falha de rede (conexão, timeout, resposta interrompida)"""
+
+
+class ContentFetchError(NetError):
+    """Resposta recusada antes da análise (ex: conteúdo binário)"""
+
+
+async def _getaddrinfo(host, port, family):
+    """Resolução pelo sistema (/etc/hosts, nomes locais); usa o executor do loop"""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, family=family, type=socket.SOCK_STREAM)
+    return [sockaddr[0] for _, _, _, _, sockaddr in infos]
+
+
+class _AsyncDNSResolver(AbstractResolver):
+    """Resolver do aiohttp sobre dnspython (sem getaddrinfo em threads)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        addresses = await self.engine.resolve_addresses(host, family)
+        if not addresses:
+            raise OSError(f'Não foi possível resolver {host}')
+        return [
+            {
+                'hostname': host, 'host': address, 'port': port,
+                'family': socket.AF_INET6 if ':' in address else socket.AF_INET,
+                'proto': 0, 'flags': socket.AI_NUMERICHOST
+            }
+            for address in addresses
+        ]
+
+    async def close(self):
+        pass
+
+
+class NetEngine:
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_per_host=MAX_CONNECTIONS_PER_HOST,
+                 user_agent=USER_AGENT, dns_timeout=DNS_TIMEOUT):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.user_agent = user_agent
+        self.dns_timeout = dns_timeout
+        self.resolver = dns.asyncresolver.Resolver()
+
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {
+            kind: {'calls': 0, 'errors': 0, 'in_flight': 0}
+            for kind in ('http', 'dns', 'tls')
+        }
+        self._pool_stats = {'connections_opened': 0, 'connections_reused': 0, 'queued_for_slot': 0}
+
+    # --- loop de fundo e invólucro síncrono ---
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='net-engine', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, coro):
+        """Agendar uma corrotina no loop do motor (concurrent.futures.Future)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro, timeout=None):
+        """Executar uma corrotina no loop do motor e esperar o resultado (uso síncrono)"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError('NetEngine.run() chamado dentro do loop do motor - use await')
+        return self.submit(coro).result(timeout)
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                resolver=_AsyncDNSResolver(self),
+                ttl_dns_cache=DNS_CACHE_SECONDS
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': self.user_agent},
+                trace_configs=[self._pool_trace()]
+            )
+        return self._session
+
+    def _pool_trace(self):
+        """Contadores do pool de conexões via TraceConfig (callbacks rodam no loop: sem lock)"""
+        trace = aiohttp.TraceConfig()
+
+        def count(key):
+            async def callback(session, context, params):
+                self._pool_stats[key] += 1
+            return callback
+
+        trace.on_connection_create_end.append(count('connections_opened'))
+        trace.on_connection_reuseconn.append(count('connections_reused'))
+        trace.on_connection_queued_start.append(count('queued_for_slot'))
+        return trace
+
+    def _track(self, kind, expected=()):
+        return _Tracker(self._stats[kind], expected)
+
+    # --- DNS ---
+
+    async def resolve(self, name, rdtype='A', lifetime=None):
+        """
+        Consulta DNS assíncrona
+
+        Returns:
+            lista de registros (str); NXDOMAIN/NoAnswer/Timeout propagam como
+            exceções do dnspython
+        """
+        # NXDOMAIN/NoAnswer são respostas (ex: IP fora da DNSBL), não erros
+        with self._track('dns', expected=(dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+            answers = await self.resolver.resolve(name, rdtype, lifetime=lifetime or self.dns_timeout)
+            return [str(rdata) for rdata in answers]
+
+    async def resolve_addresses(self, host, family=socket.AF_INET):
+        """Endereços IP do host (DNS assíncrono; nomes locais caem no resolver do sistema)"""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        rdtype = 'AAAA' if family == socket.AF_INET6 else 'A'
+        try:
+            return await self.resolve(host, rdtype)
+        except dns.exception.DNSException:
+            pass
+        try:
+            return await _getaddrinfo(host, None, family)
+        except OSError:
+            return []
+
+    async def resolve_ip(self, domain):
+        """Primeiro IPv4 do domínio (equivalente a socket.gethostbyname) ou None"""
+        addresses = await self.resolve_addresses(domain)
+        return addresses[0] if addresses else None
+
+    # --- TLS ---
+
+    async def tls_certificate(self, domain, port=443, timeout=5):
+        """
+        Certificado apresentado pelo servidor (formato de SSLSocket.getpeercert())
+        Erros de certificado propagam como ssl.SSLError
+        """
+        with self._track('tls'):
+            address = await self.resolve_ip(domain)
+            if not address:
+                raise NetError(f'Não foi possível resolver {domain}')
+
+            context = ssl.create_default_context()
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(address, port, ssl=context, server_hostname=domain),
+                timeout
+            )
+            try:
+                return writer.get_extra_info('peercert')
+            finally:
+                writer.close()
+                try:
+                    await asyncio.wait_for(writer.wait_closed(), 1)
+                except (OSError, asyncio.TimeoutError, ssl.SSLError):
+                    pass
+
+    # --- HTTP ---
+
+    async def fetch(self, url, max_bytes=None, deadline=None, connect_timeout=CONNECT_TIMEOUT,
+                    read_timeout=READ_TIMEOUT, read_body=True, text_only=False):
+        """
+        GET em streaming com limite de bytes e prazo total
+
+        O corpo é lido em blocos até max_bytes (já descomprimido) ou até o
+        prazo total; o que foi lido até ali é devolvido. Com text_only,
+        conteúdo binário é recusado pelo Content-Type, ou pelos primeiros
+        bytes quando o servidor não informa o tipo
+
+        Returns:
+            (corpo em bytes, info) - info com status, URL final, cadeia de
+            redirecionamentos, tipo, charset, bytes lidos e truncamento
+        """
+        start = time.monotonic()
+        deadline_at = start + deadline if deadline else None
+        if deadline:
+            connect_timeout = min(connect_timeout, deadline)
+            read_timeout = min(read_timeout, deadline)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+
+        with self._track('http'):
+            session = await self._get_session()
+            try:
+                async with session.get(url, timeout=timeout, allow_redirects=True) as response:
+                    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                    info = {
+                        'status_code': response.status,
+                        'final_url': str(response.url),
+                        'redirects': [str(r.url) for r in response.history],
+                        'content_type': content_type or None,
+                        'charset': response.charset,
+                        'content_length': response.headers.get('Content-Length'),
+                        'bytes_read': 0,
+                        'truncated': False,
+                        'truncated_reason': None,
+                        'max_bytes': max_bytes
+                    }
+
+                    if text_only and content_type and not content_type.startswith(TEXT_CONTENT_TYPES):
+                        raise ContentFetchError(f'Conteúdo não textual ({content_type}) - análise ignorada')
+
+                    chunks = []
+                    if read_body:
+                        chunks = await self._read_body(response, info, max_bytes, deadline_at, text_only)
+                    if info['truncated'] or not read_body:
+                        response.close()  # corpo não consumido: conexão não volta ao pool
+            except NetError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                raise NetError(str(e) or e.__class__.__name__) from e
+
+        info['elapsed_ms'] = round((time.monotonic() - start) * 1000, 1)
+        return b''.join(chunks), info
+
+    async def _read_body(self, response, info, max_bytes, deadline_at, text_only):
+        chunks = []
+        while max_bytes is None or info['bytes_read'] < max_bytes:
+            remaining = deadline_at - time.monotonic() if deadline_at else None
+            if remaining is not None and remaining <= 0:
+                info['truncated'] = True
+                info['truncated_reason'] = 'deadline'
+                return chunks
+
+            size = READ_CHUNK_SIZE if max_bytes is None else min(READ_CHUNK_SIZE, max_bytes - info['bytes_read'])
+            try:
+                chunk = await asyncio.wait_for(response.content.read(size), remaining)
+            except asyncio.TimeoutError:
+                if remaining is not None and deadline_at - time.monotonic() <= 0:
+                    info['truncated'] = True
+                    info['truncated_reason'] = 'deadline'
+                    return chunks
+                if not chunks:
+                    raise
+                info['truncated'] = True
+                info['truncated_reason'] = 'read_error'
+                return chunks
+            except (aiohttp.ClientError, OSError):
+                if not chunks:
+                    raise
+                # Conexão caiu/parou no meio do corpo: devolver o prefixo recebido
+                info['truncated'] = True
+                info['truncated_reason'] = 'read_error'
+                return chunks
+
+            if not chunk:
+                return chunks
+            if text_only and not chunks and not info['content_type'] and b'\x00' in chunk[:1024]:
+                raise ContentFetchError('Conteúdo binário (sem Content-Type) - análise ignorada')
+            chunks.append(chunk)
+            info['bytes_read'] += len(chunk)
+
+        # Limite atingido: só está truncado se ainda havia corpo a ler
+        if not response.content.at_eof():
+            try:
+                more = await asyncio.wait_for(response.content.read(1), 1)
+            except (asyncio.TimeoutError, aiohttp.ClientError, OSError):
+                more = b'?'
+            if more:
+                info['truncated'] = True
+                info['truncated_reason'] = 'max_bytes'
+        return chunks
+
+    async def get_json(self, url, timeout=5):
+        """GET de uma API JSON; None se o status não for 200 ou o corpo não for JSON"""
+        body, info = await self.fetch(url, max_bytes=1024 * 1024, deadline=timeout,
+                                      connect_timeout=timeout, read_timeout=timeout)
+        if info['status_code'] != 200:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    # --- métricas ---
+
+    def stats(self):
+        """Chamadas, erros e operações em voo por tipo, mais o uso do pool de conexões"""
+        pool = dict(self._pool_stats)
+        acquired = pool['connections_opened'] + pool['connections_reused']
+        pool['connection_reuse_ratio'] = round(pool['connections_reused'] / acquired, 3) if acquired else None
+        return {
+            'loop_running': bool(self._loop and self._loop.is_running()),
+            'max_connections': self.max_connections,
+            'max_connections_per_host': self.max_per_host,
+            'connection_pool': pool,
+            **{kind: dict(values) for kind, values in self._stats.items()}
+        }
+
+
+class _Tracker:
+    """Contadores de uma operação (só é usado dentro do loop: sem lock)"""
+
+    def __init__(self, stats, expected=()):
+        self.stats = stats
+        self.expected = expected
+
+    def __enter__(self):
+        self.stats['calls'] += 1
+        self.stats['in_flight'] += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats['in_flight'] -= 1
+        if exc_type is not None and not issubclass(exc_type, self.expected):
+            self.stats['errors'] += 1
+        return False
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def default_net_engine():
+    """Motor de rede compartilhado do processo"""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = NetEngine()
+        return _default_engine
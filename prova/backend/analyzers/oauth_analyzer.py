@@ -4,9 +4,56 @@ Verifica legitimidade de páginas de autorização OAuth/SSO
 """
 import re
 from urllib.parse import urlparse, parse_qs
+from .dom_visitor import DomRule, TagListRule, register_rule
+from .keyword_matcher import default_matcher
+from .page_document import PageDocument
+
+# Botões de login social (cada padrão conta separadamente, como antes)
+SOCIAL_LOGIN_PATTERNS = [
+    re.compile(pattern, re.I) for pattern in (
+        r'sign\s+in\s+with',
+        r'login\s+with',
+        r'continue\s+with',
+        r'connect\s+with',
+        r'authorize\s+with'
+    )
+]
+OAUTH_INPUT_PATTERN = re.compile(r'(client_id|redirect_uri|response_type|scope|state)', re.I)
+
+
+@register_rule
+class SocialButtonsRule(DomRule):
+    """Botões/links cujo texto casa com os padrões de login social"""
+
+    name = 'social_buttons'
+    tags = ('button', 'a')
 
-class OAuthAnalyzer:
     def __init__(self):
+        self.buttons = []
+
+    def visit(self, tag):
+        text = tag.string
+        if text is None:
+            return
+        for pattern in SOCIAL_LOGIN_PATTERNS:
+            if pattern.search(text):
+                self.buttons.append(tag)
+
+    def result(self):
+        return self.buttons
+
+
+@register_rule
+class InputsRule(TagListRule):
+    name = 'inputs'
+    tags = ('input',)
+
+
+class OAuthAnalyzer:
+    def __init__(self, matcher=None):
+        # Listas de palavras-chave em data/rules/keywords.json (oauth_*)
+        self.matcher = matcher or default_matcher()
+        
         # Domínios legítimos de OAuth por provedor
         self.legitimate_oauth_domains = {
             'google': [
@@ -47,69 +94,30 @@ class OAuthAnalyzer:
                 'signin.aws.amazon.com'
             ]
         }
-        
-        # Padrões de URL OAuth
-        self.oauth_patterns = [
-            r'oauth',
-            r'authorize',
-            r'consent',
-            r'permissions',
-            r'scope',
-            r'login',
-            r'signin',
-            r'auth'
-        ]
-        
-        # Scopes suspeitos (permissões excessivas)
-        self.excessive_scopes = [
-            'read_all',
-            'write_all',
-            'admin',
-            'full_access',
-            'delete',
-            'manage_account',
-            'financial',
-            'payment'
-        ]
     
-    def detect_oauth_page(self, soup, url):
+    def detect_oauth_page(self, soup, url, document):
         """
         Detecta se a página é uma interface OAuth/SSO
         """
         # Verificar padrões na URL
-        url_lower = url.lower()
-        has_oauth_url = any(pattern in url_lower for pattern in self.oauth_patterns)
+        has_oauth_url = bool(document.url_hits['oauth_url_patterns'])
         
         # Verificar botões de login social
-        social_login_patterns = [
-            r'sign\s+in\s+with',
-            r'login\s+with',
-            r'continue\s+with',
-            r'connect\s+with',
-            r'authorize\s+with'
-        ]
-        
-        social_buttons = []
-        for pattern in social_login_patterns:
-            buttons = soup.find_all(['button', 'a'], 
-                string=re.compile(pattern, re.I))
-            social_buttons.extend(buttons)
+        social_buttons = document.dom['social_buttons']
         
         # Verificar formulários de permissão/consentimento
-        permission_keywords = ['allow', 'grant', 'permission', 'consent', 'authorize']
-        permission_forms = soup.find_all('form')
         has_permission_form = False
         
-        for form in permission_forms:
-            form_text = form.get_text().lower()
-            if any(keyword in form_text for keyword in permission_keywords):
+        for form, _ in document.dom['forms']:
+            if document.scan(form.get_text())['oauth_consent']:
                 has_permission_form = True
                 break
         
         # Verificar inputs de OAuth (client_id, redirect_uri, etc)
-        oauth_inputs = soup.find_all('input', attrs={
-            'name': re.compile(r'(client_id|redirect_uri|response_type|scope|state)', re.I)
-        })
+        oauth_inputs = [
+            input_tag for input_tag in document.dom['inputs']
+            if OAUTH_INPUT_PATTERN.search(input_tag.get('name') or '')
+        ]
         
         return {
             'is_oauth': has_oauth_url or len(social_buttons) > 0 or has_permission_form or len(oauth_inputs) > 0,
@@ -119,22 +127,16 @@ class OAuthAnalyzer:
             'oauth_inputs': len(oauth_inputs)
         }
     
-    def identify_provider(self, url, soup):
+    def identify_provider(self, url, soup, document):
         """
         Tenta identificar o provedor OAuth (Google, Facebook, etc)
         """
-        url_lower = url.lower()
-        page_text = soup.get_text().lower()
-        
-        # Verificar na URL
-        for provider, domains in self.legitimate_oauth_domains.items():
-            if any(provider in url_lower for provider in [provider]):
-                return provider
-        
-        # Verificar no conteúdo da página
-        for provider in self.legitimate_oauth_domains.keys():
-            if provider in page_text:
-                return provider
+        # Verificar na URL e depois no conteúdo da página
+        # (mesma prioridade de antes: ordem de legitimate_oauth_domains)
+        for hits in (document.url_hits['oauth_providers'], document.text_hits['oauth_providers']):
+            for provider in self.legitimate_oauth_domains:
+                if provider in hits:
+                    return provider
         
         return None
     
@@ -166,7 +168,7 @@ class OAuthAnalyzer:
         
         return False
     
-    def check_excessive_permissions(self, url, soup):
+    def check_excessive_permissions(self, url, soup, document):
         """
         Verifica se há solicitação de permissões excessivas
         """
@@ -180,31 +182,20 @@ class OAuthAnalyzer:
             scopes = params['scope'][0].split()
             
             for scope in scopes:
-                scope_lower = scope.lower()
-                for suspicious in self.excessive_scopes:
-                    if suspicious in scope_lower:
-                        excessive.append(scope)
+                if document.scan(scope)['oauth_scopes']:
+                    excessive.append(scope)
         
         # Verificar no conteúdo da página
-        page_text = soup.get_text().lower()
-        suspicious_permissions = [
-            'access to all',
-            'full access',
-            'delete your',
-            'manage your account',
-            'payment information',
-            'credit card'
-        ]
-        
-        for perm in suspicious_permissions:
-            if perm in page_text:
-                excessive.append(perm)
+        excessive.extend(document.text_hits['oauth_permissions'])
         
         return list(set(excessive))  # Remove duplicatas
     
-    def analyze(self, soup, url):
+    def analyze(self, soup, url, document=None):
         """
         Análise completa de OAuth
+        
+        document: PageDocument já montado pelo ContentAnalyzer (evita
+        extrair e converter o texto da página de novo)
         """
         result = {
             'is_oauth_page': False,
@@ -219,8 +210,11 @@ class OAuthAnalyzer:
         }
         
         try:
+            if document is None:
+                document = PageDocument(url, None, soup=soup, matcher=self.matcher)
+            
             # 1. Detectar se é página OAuth
-            oauth_detection = self.detect_oauth_page(soup, url)
+            oauth_detection = self.detect_oauth_page(soup, url, document)
             result['is_oauth_page'] = oauth_detection['is_oauth']
             
             if not result['is_oauth_page']:
@@ -232,7 +226,7 @@ class OAuthAnalyzer:
             )
             
             # 2. Identificar provedor
-            provider = self.identify_provider(url, soup)
+            provider = self.identify_provider(url, soup, document)
             result['provider_claimed'] = provider
             
             if provider:
@@ -267,7 +261,7 @@ class OAuthAnalyzer:
                 result['risk_score'] += 10
             
             # 4. Verificar permissões excessivas
-            excessive = self.check_excessive_permissions(url, soup)
+            excessive = self.check_excessive_permissions(url, soup, document)
             if excessive:
                 result['excessive_permissions'] = excessive
                 result['risk_score'] += min(30, len(excessive) * 10)
@@ -277,7 +271,9 @@ class OAuthAnalyzer:
             
             # 5. Verificar se há formulário de senha em página OAuth
             # (OAuth real não pede senha diretamente na página de autorização)
-            password_inputs = soup.find_all('input', attrs={'type': 'password'})
+            password_inputs = [
+                input_tag for input_tag in document.dom['inputs'] if input_tag.get('type') == 'password'
+            ]
             if password_inputs and oauth_detection['permission_form']:
                 result['risk_score'] += 20
                 result['suspicious'] = True
@@ -0,0 +1,55 @@
+"""
+Página analisada, compartilhada entre os analisadores de uma requisição
+Guarda o HTML, a árvore do BeautifulSoup e as versões em minúsculas do
+HTML, do texto visível e da URL, calculadas uma única vez, além dos
+acertos de palavras-chave de cada uma (KeywordMatcher) e dos resultados
+das regras de DOM (DomVisitor, uma única passada pela árvore)
+"""
+
+from functools import cached_property
+
+from bs4 import BeautifulSoup
+
+from .dom_visitor import default_visitor
+from .keyword_matcher import default_matcher
+
+
+class PageDocument:
+    def __init__(self, url, html, soup=None, matcher=None):
+        self.url = url
+        self.html = html or ''
+        self.soup = soup if soup is not None else BeautifulSoup(self.html, 'html.parser')
+        self.matcher = matcher or default_matcher()
+
+    @cached_property
+    def dom(self):
+        """Resultados das regras registradas (document.dom['forms'], ...) e texto visível"""
+        return default_visitor().walk(self.soup)
+
+    @cached_property
+    def url_lower(self):
+        return self.url.lower()
+
+    @cached_property
+    def html_lower(self):
+        return self.html.lower()
+
+    @cached_property
+    def text_lower(self):
+        return self.dom.text.lower()
+
+    @cached_property
+    def url_hits(self):
+        return self.matcher.scan(self.url_lower)
+
+    @cached_property
+    def html_hits(self):
+        return self.matcher.scan(self.html_lower)
+
+    @cached_property
+    def text_hits(self):
+        return self.matcher.scan(self.text_lower)
+
+    def scan(self, text):
+        """Acertos de palavras-chave num trecho avulso (atributos, texto de formulário...)"""
+        return self.matcher.scan(text.lower())
@@ -0,0 +1,304 @@
+"""
+Base de hashes de referência para detecção de clones visuais
+Páginas de login legítimas (snapshots locais, renderizados offline por
+training/reference_screenshots.py) viram várias impressões perceptuais por
+marca, variante de página e viewport: phash e dhash (estrutura e bordas) e
+colorhash (distribuição de cores). A base é um artefato versionado
+(ModelArtifactStore, memory-map) carregado ao iniciar e trocado sem
+reiniciar quando o ponteiro CURRENT muda
+
+Um screenshot é clone quando pelo menos MIN_VOTES dos algoritmos ficam
+dentro do limite (colorhash sozinho não decide). A proximidade é a média
+das distâncias divididas pelos limites (1.0 = em cima do limite); acima de
+NEAR_SCORE a referência é descartada. Os hashes
+ficam em matrizes uint64 (distância por XOR + popcount vetorizado) com
+multi-index hashing para buscas por raio em dezenas de milhares de
+referências e screenshots de phishing conhecidos
+"""
+
+import functools
+import itertools
+from io import BytesIO
+
+import imagehash
+import numpy as np
+from PIL import Image
+
+from .hamming import hamming_distances
+from .model_store import ModelArtifactStore, ServingArtifact, register_engine
+
+# Algoritmos: nome -> função (imagem PIL -> ImageHash)
+HASH_ALGORITHMS = {
+    'phash': lambda image: imagehash.phash(image.resize((256, 256)), hash_size=16),
+    'dhash': lambda image: imagehash.dhash(image.resize((256, 256)), hash_size=16),
+    'colorhash': lambda image: imagehash.colorhash(image, binbits=3)
+}
+
+# Distância de Hamming máxima (em bits) para cada algoritmo concordar
+HASH_THRESHOLDS = {'phash': 10, 'dhash': 24, 'colorhash': 6}
+MIN_VOTES = 2
+# Proximidade a partir da qual a página nem é "parecida" (2x o limite)
+NEAR_SCORE = 2.0
+
+# Busca: candidatos têm phash até o antigo corte de "parecido" ou dhash até o limite de
+# clone (todo clone tem um dos dois dentro do limite). O resto é conferido exatamente
+SEARCH_RADIUS = {'phash': 20, 'dhash': 24}
+# Multi-index hashing: hash dividido em pedaços de 16 bits, uma tabela ordenada por pedaço
+MIH_CHUNK_BITS = 16
+# Abaixo disso a varredura linear vetorizada sai mais barata que as tabelas
+MIH_MIN_ENTRIES = 4096
+
+WORD_BITS = 64
+_CHUNKS_PER_WORD = WORD_BITS // MIH_CHUNK_BITS
+_CHUNK_MASK = np.uint64((1 << MIH_CHUNK_BITS) - 1)
+
+
+def hash_bytes(image_hash):
+    """ImageHash -> bits empacotados (mesma ordem para todos os algoritmos)"""
+    return np.packbits(np.asarray(image_hash.hash, dtype=bool).ravel()).tobytes()
+
+
+def image_hashes(image):
+    """Todos os hashes da imagem, em hex de bits empacotados"""
+    image = image.convert('RGB')
+    return {name: hash_bytes(fn(image)).hex() for name, fn in HASH_ALGORITHMS.items()}
+
+
+def hashes_task(png_bytes):
+    """
+    Tarefa do pool de CPU: PNG -> hashes de todos os algoritmos em hex
+    (a imagem decodificada não sai do worker)
+    """
+    return image_hashes(Image.open(BytesIO(png_bytes)))
+
+
+def hex_to_words(value, n_words=None):
+    """Hash em hex -> palavras uint64 (big-endian, completado com zeros)"""
+    data = bytes.fromhex(value)
+    n_words = n_words or -(-len(data) // 8)
+    return np.frombuffer(data.ljust(n_words * 8, b'\0'), dtype='>u8').astype(np.uint64)
+
+
+def chunk_values(words, chunk):
+    """Pedaço de MIH_CHUNK_BITS bits de cada hash (words: (n, palavras) ou (palavras,))"""
+    word = words[..., chunk // _CHUNKS_PER_WORD]
+    shift = np.uint64(WORD_BITS - MIH_CHUNK_BITS * (chunk % _CHUNKS_PER_WORD + 1))
+    return ((word >> shift) & _CHUNK_MASK).astype(np.uint16)
+
+
+@functools.lru_cache(maxsize=None)
+def flip_masks(radius):
+    """Máscaras de todos os padrões com até `radius` bits trocados num pedaço"""
+    masks = [
+        sum(1 << bit for bit in bits)
+        for r in range(radius + 1) for bits in itertools.combinations(range(MIH_CHUNK_BITS), r)
+    ]
+    return np.array(masks, dtype=np.uint16)
+
+
+@register_engine
+class ReferenceHashIndex:
+    """
+    Hashes de referência imutáveis: uma linha por marca, variante e viewport
+    Cada algoritmo é uma matriz uint64 (entradas x palavras); phash e dhash têm
+    também tabelas de multi-index hashing: dist <= r em m pedaços => algum
+    pedaço a no máximo r // m bits (casa dos pombos), então uma busca por raio
+    consulta só as entradas com algum pedaço próximo, em tempo sublinear
+    """
+
+    kind = 'reference_hashes'
+
+    def __init__(self, hashes, brand_ids, variant_ids, viewports, brands, variants,
+                 mih=None, thresholds=None, search_radius=None):
+        self.hashes = hashes            # algoritmo -> matriz (n, palavras) uint64
+        self.brand_ids = brand_ids
+        self.variant_ids = variant_ids
+        self.viewports = viewports      # (n, 2) largura, altura
+        self.brands = brands
+        self.variants = variants
+        self.mih = mih or {}            # algoritmo -> (pedaços ordenados (m, n) uint16, ids (m, n))
+        self.thresholds = dict(thresholds or HASH_THRESHOLDS)
+        self.search_radius = dict(search_radius or SEARCH_RADIUS)
+
+    @classmethod
+    def build(cls, entries, thresholds=None, search_radius=None):
+        """
+        Montar o índice a partir de entradas
+        {brand, variant, viewport: (w, h), hashes: {algoritmo: hex}}
+        """
+        brands = sorted({entry['brand'] for entry in entries})
+        variants = sorted({entry['variant'] for entry in entries})
+        brand_index = {brand: i for i, brand in enumerate(brands)}
+        variant_index = {variant: i for i, variant in enumerate(variants)}
+        search_radius = dict(search_radius or SEARCH_RADIUS)
+
+        hashes, mih = {}, {}
+        for name in HASH_ALGORITHMS:
+            rows = [hex_to_words(entry['hashes'][name]) for entry in entries]
+            hashes[name] = np.vstack(rows) if rows else np.zeros((0, 1), dtype=np.uint64)
+            if name in search_radius:
+                n_chunks = hashes[name].shape[1] * _CHUNKS_PER_WORD
+                chunks = np.stack([chunk_values(hashes[name], c) for c in range(n_chunks)])
+                order = np.argsort(chunks, axis=1, kind='stable')
+                mih[name] = (np.take_along_axis(chunks, order, axis=1), order.astype(np.int32))
+
+        return cls(
+            hashes,
+            np.array([brand_index[entry['brand']] for entry in entries], dtype=np.int32),
+            np.array([variant_index[entry['variant']] for entry in entries], dtype=np.int32),
+            np.array([entry['viewport'] for entry in entries], dtype=np.uint16).reshape(-1, 2),
+            brands,
+            variants,
+            mih,
+            thresholds,
+            search_radius
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, info):
+        if info.get('word_bits') != WORD_BITS or info.get('mih_chunk_bits') != MIH_CHUNK_BITS:
+            raise KeyError('layout de hashes')
+        return cls(
+            {name: arrays[f'hash_{name}'] for name in info['algorithms']},
+            arrays['brand_ids'], arrays['variant_ids'], arrays['viewports'],
+            info['brands'], info['variants'],
+            {name: (arrays[f'mih_{name}'], arrays[f'mih_{name}_ids']) for name in info['search_radius']},
+            info['thresholds'], info['search_radius']
+        )
+
+    def arrays(self):
+        arrays = {f'hash_{name}': rows for name, rows in self.hashes.items()}
+        for name, (chunks, ids) in self.mih.items():
+            arrays[f'mih_{name}'] = chunks
+            arrays[f'mih_{name}_ids'] = ids
+        arrays.update(brand_ids=self.brand_ids, variant_ids=self.variant_ids, viewports=self.viewports)
+        return arrays
+
+    def info(self):
+        return {
+            'algorithms': list(self.hashes),
+            'brands': self.brands,
+            'variants': self.variants,
+            'thresholds': self.thresholds,
+            'search_radius': self.search_radius,
+            'word_bits': WORD_BITS,
+            'mih_chunk_bits': MIH_CHUNK_BITS,
+            'entries': len(self)
+        }
+
+    def __len__(self):
+        return len(self.brand_ids)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def _query_words(self, hashes):
+        return {
+            name: hex_to_words(hashes[name], matrix.shape[1])
+            for name, matrix in self.hashes.items() if name in hashes
+        }
+
+    def distances(self, hashes, entries=None):
+        """Distâncias de Hamming do screenshot para cada entrada (ou só as `entries`), por algoritmo"""
+        distances = {}
+        for name, target in self._query_words(hashes).items():
+            matrix = self.hashes[name] if entries is None else self.hashes[name][entries]
+            distances[name] = hamming_distances(matrix, target)
+        return distances
+
+    def radius_query(self, name, target, radius, linear=None):
+        """
+        Entradas com distância <= radius no algoritmo `name` (target: palavras uint64)
+        Multi-index hashing a partir de MIH_MIN_ENTRIES entradas; abaixo, varredura linear
+        """
+        matrix = self.hashes[name]
+        if linear is None:
+            linear = len(self) < MIH_MIN_ENTRIES or name not in self.mih
+        if linear:
+            return np.flatnonzero(hamming_distances(matrix, target) <= radius)
+
+        chunks, ids = self.mih[name]
+        masks = flip_masks(radius // len(chunks))
+        found = []
+        for c in range(len(chunks)):
+            values = np.bitwise_xor(chunk_values(target, c), masks)
+            lo = np.searchsorted(chunks[c], values, side='left')
+            hi = np.searchsorted(chunks[c], values, side='right')
+            found.extend(ids[c][l:h] for l, h in zip(lo, hi) if h > l)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.unique(np.concatenate(found))
+        return candidates[hamming_distances(matrix[candidates], target) <= radius]
+
+    def candidates(self, hashes, linear=None):
+        """Entradas dentro do raio de busca de algum algoritmo (SEARCH_RADIUS)"""
+        query = self._query_words(hashes)
+        found = [
+            self.radius_query(name, query[name], radius, linear)
+            for name, radius in self.search_radius.items() if name in query
+        ]
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def top_k(self, hashes, k=5, exclude_brands=(), per_brand=False, linear=None):
+        """
+        Referências mais próximas, da mais próxima para a mais distante
+
+        Returns:
+            lista de {entry, brand, variant, viewport, distances, votes, score, similarity, is_clone}
+        """
+        if len(self) == 0:
+            return []
+        entries = self.candidates(hashes, linear)
+        if len(entries) == 0:
+            return []
+        distances = self.distances(hashes, entries)
+        votes = sum((distances[name] <= self.thresholds[name]).astype(np.int64) for name in distances)
+        scores = sum(distances[name] / self.thresholds[name] for name in distances) / len(distances)
+        clones = votes >= MIN_VOTES
+
+        results, seen = [], set()
+        for i in np.lexsort((entries, scores)):
+            if scores[i] >= NEAR_SCORE:
+                break
+            brand = self.brands[int(self.brand_ids[entries[i]])]
+            if brand in exclude_brands or (per_brand and brand in seen):
+                continue
+            seen.add(brand)
+            results.append({
+                'entry': int(entries[i]),
+                'brand': brand,
+                'variant': self.variants[int(self.variant_ids[entries[i]])],
+                'viewport': '{}x{}'.format(*(int(v) for v in self.viewports[entries[i]])),
+                'distances': {name: int(values[i]) for name, values in distances.items()},
+                'votes': int(votes[i]),
+                'score': round(float(scores[i]), 3),
+                # Mesma escala de antes: 100 idêntico, 50 em cima do limite
+                'similarity': round(max(0.0, 100 - 50 * float(scores[i])), 1),
+                'is_clone': bool(clones[i])
+            })
+            if k and len(results) >= k:
+                break
+        return results
+
+    def match(self, hashes, exclude_brands=()):
+        """Melhor referência de cada marca, da mais próxima para a mais distante"""
+        return self.top_k(hashes, k=None, exclude_brands=exclude_brands, per_brand=True)
+
+
+class ReferenceHashStore(ServingArtifact):
+    """Base de referência em uso pelo analisador (troca de versão sem reiniciar)"""
+
+    def __init__(self, store=None):
+        super().__init__(store or ModelArtifactStore('models/reference_hashes'), 'Hashes de referência')
+        if self.load_current():
+            print(f"✓ Hashes de referência {self.serving.version} carregados "
+                  f"({len(self.serving.engine):,} capturas de {len(self.serving.engine.brands)} marcas)")
+
+    def match(self, hashes, exclude_brands=()):
+        """Referências mais próximas do screenshot (lista vazia sem base carregada)"""
+        self.refresh()
+        serving = self.serving
+        if serving is None:
+            return []
+        return serving.engine.match(hashes, exclude_brands)
@@ -0,0 +1,431 @@
+"""
+Proxy local de renderização do screenshot
+Cada worker de screenshot roda um proxy HTTP em 127.0.0.1 (porta efêmera) e
+o Firefox do worker navega através dele:
+  - o documento principal é o HTML que o ContentAnalyzer já baixou (o
+    screenshot mostra exatamente a página que as regras de conteúdo
+    pontuaram, sem baixá-la de novo)
+  - sub-recursos ficam num cache LRU em memória, limitado em bytes, só
+    enquanto frescos (max-age/Expires) e nunca com estado: respostas com
+    Set-Cookie, Vary: Cookie/* ou a pedidos com Authorization não entram, e
+    Set-Cookie nunca é guardado (nada passa de uma análise para a outra)
+  - hosts de rastreamento/anúncios (data/rules/render_blocklist.json) são
+    recusados sem conexão
+  - cada página tem um orçamento de bytes baixados da rede; estourado, o
+    resto dos pedidos falha
+HTTPS não pode ser interceptado sem MITM: a página pré-carregada é aberta
+como http:// no mesmo host e o proxy busca os recursos desse host em
+https://, o que também os torna cacheáveis; recursos HTTPS de terceiros
+passam por túnel CONNECT (bloqueio e orçamento valem, cache não)
+"""
+
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, urlunsplit
+
+from .http_client import HTTPClient
+
+logger = logging.getLogger(__name__)
+
+# Configuráveis por variável de ambiente
+RENDER_PAGE_BUDGET_KB = int(os.environ.get('RENDER_PAGE_BUDGET_KB', 4096))
+RENDER_CACHE_MB = int(os.environ.get('RENDER_CACHE_MB', 64))
+RENDER_CACHE_MAX_OBJECT_KB = 1024
+# Validade de respostas sem max-age/Expires (limite da heurística de Last-Modified)
+RENDER_CACHE_HEURISTIC_SECONDS = int(os.environ.get('RENDER_CACHE_HEURISTIC_SECONDS', 300))
+UPSTREAM_TIMEOUT = (3, 5)  # (conexão, leitura) em segundos
+TUNNEL_IDLE_TIMEOUT = 10
+READ_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_BLOCKLIST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'rules', 'render_blocklist.json'
+)
+
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection',
+    'te', 'trailers', 'transfer-encoding', 'upgrade'
+}
+# O corpo chega descomprimido do requests; o tamanho é recalculado
+DROPPED_RESPONSE_HEADERS = HOP_BY_HOP_HEADERS | {'content-encoding', 'content-length'}
+DROPPED_REQUEST_HEADERS = HOP_BY_HOP_HEADERS | {'host', 'accept-encoding', 'content-length'}
+
+
+def load_blocklist(path=None):
+    """Domínios bloqueados na renderização (casam também os subdomínios)"""
+    path = path or os.environ.get('RENDER_BLOCKLIST_PATH', DEFAULT_BLOCKLIST_PATH)
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {domain.lower() for domain in json.load(f).get('domains', [])}
+
+
+def host_blocked(host, blocklist):
+    """host ou algum domínio pai está na lista"""
+    labels = (host or '').lower().rstrip('.').split('.')
+    return any('.'.join(labels[i:]) in blocklist for i in range(len(labels)))
+
+
+class ResponseCache:
+    """Respostas GET cacheáveis por URL, LRU limitado em bytes e com prazo de validade"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # url -> (status, headers, body, expira em, vary)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, request_headers=None):
+        """(status, headers, body) ou None; entradas vencidas saem do cache"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            status, headers, body, expires_at, vary = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[url]
+                self._bytes -= len(body)
+                return None
+            if vary != _vary_key(vary, request_headers):
+                return None
+            self._entries.move_to_end(url)
+            return status, headers, body
+
+    def put(self, url, status, headers, body, ttl, vary=()):
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._bytes -= len(previous[2])
+            self._entries[url] = (status, headers, body, time.monotonic() + ttl, vary)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[2])
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+
+def _vary_key(vary, request_headers):
+    """Valores dos cabeçalhos do pedido listados em Vary (comparados no acerto)"""
+    request_headers = request_headers or {}
+    return tuple((name, request_headers.get(name)) for name, _ in vary)
+
+
+def _cache_directives(headers):
+    directives = {}
+    for part in headers.get('Cache-Control', '').lower().split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name] = value.strip('"')
+    return directives
+
+
+def _freshness_seconds(headers, directives):
+    """Tempo de vida restante da resposta (s-maxage/max-age, Expires ou heurística)"""
+    try:
+        age = int(headers.get('Age') or 0)
+    except ValueError:
+        age = 0
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return int(directives[name]) - age
+            except ValueError:
+                return 0
+    try:
+        date = parsedate_to_datetime(headers['Date']) if headers.get('Date') else None
+        if headers.get('Expires'):
+            expires = parsedate_to_datetime(headers['Expires'])
+            return (expires - date).total_seconds() - age if date else 0
+        if headers.get('Last-Modified') and date:
+            # Heurística usual: 10% do tempo desde a última modificação
+            modified = (date - parsedate_to_datetime(headers['Last-Modified'])).total_seconds()
+            return min(RENDER_CACHE_HEURISTIC_SECONDS, modified / 10) - age
+    except (TypeError, ValueError, OverflowError):
+        return 0
+    return 0
+
+
+def _cache_policy(status, headers, body, request_headers):
+    """
+    (segundos de validade, vary) se a resposta pode ir para o cache, senão None
+    request_headers: cabeçalhos do pedido com nomes em minúsculas
+    Nada com estado do usuário: Set-Cookie, Vary: Cookie/* e pedidos com Authorization ficam de fora
+    """
+    if status != 200 or len(body) > RENDER_CACHE_MAX_OBJECT_KB * 1024:
+        return None
+    if 'Set-Cookie' in headers or 'authorization' in request_headers:
+        return None
+    directives = _cache_directives(headers)
+    if directives.keys() & {'no-store', 'no-cache', 'private'}:
+        return None
+    vary = [name.strip().lower() for name in headers.get('Vary', '').split(',') if name.strip()]
+    if '*' in vary or 'cookie' in vary:
+        return None
+    ttl = _freshness_seconds(headers, directives)
+    if ttl <= 0:
+        return None
+    # O corpo é guardado já descomprimido: Accept-Encoding não distingue variantes
+    vary = [name for name in vary if name != 'accept-encoding']
+    return ttl, _vary_key([(name, None) for name in vary], request_headers)
+
+
+def _reply(handler, status, headers=(), body=b''):
+    handler.send_response(status)
+    for name, value in headers:
+        handler.send_header(name, value)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    if handler.command != 'HEAD' and body:
+        handler.wfile.write(body)
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    proxy = None  # definido na subclasse criada por RenderProxy
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.proxy._forward(self)
+
+    do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_GET
+
+    def do_CONNECT(self):
+        self.proxy._tunnel(self)
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # O navegador fecha e reseta conexões o tempo todo (navegação, kill do worker)
+        logger.debug('Conexão do navegador encerrada com erro', exc_info=True)
+
+
+class RenderProxy:
+    def __init__(self, budget_kb=RENDER_PAGE_BUDGET_KB, cache_mb=RENDER_CACHE_MB, blocklist=None, client=None):
+        self.budget = budget_kb * 1024
+        self.cache = ResponseCache(cache_mb * 1024 * 1024)
+        self.blocklist = load_blocklist() if blocklist is None else set(blocklist)
+        self.client = client or HTTPClient(timeout=UPSTREAM_TIMEOUT)
+        self._lock = threading.Lock()
+        self._document = None
+        self._upgrade = set()  # hosts abertos como http:// cujos recursos vêm de https://
+        self._tunnels = set()
+        self._page = self._new_counters()
+        self._totals = self._new_counters()
+        handler = type('RenderProxyHandler', (_ProxyHandler,), {'proxy': self})
+        self._server = _ProxyServer(('127.0.0.1', 0), handler)
+        self.address = self._server.server_address
+        self._thread = None
+
+    @staticmethod
+    def _new_counters():
+        return {
+            'requests': 0, 'document': 0, 'cache_hits': 0, 'blocked': 0, 'upstream_requests': 0,
+            'upstream_bytes': 0, 'tunnels': 0, 'over_budget': 0, 'errors': 0
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name='render-proxy', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._close_tunnels()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._page[name] += amount
+            self._totals[name] += amount
+
+    def _charge(self, size):
+        """Contar bytes baixados na página atual; False se o orçamento estourou"""
+        with self._lock:
+            self._page['upstream_bytes'] += size
+            self._totals['upstream_bytes'] += size
+            return self._page['upstream_bytes'] <= self.budget
+
+    def _exhausted(self):
+        with self._lock:
+            return self._page['upstream_bytes'] >= self.budget
+
+    def _close_tunnels(self):
+        with self._lock:
+            tunnels, self._tunnels = self._tunnels, set()
+        for upstream in tunnels:
+            try:
+                upstream.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def begin_page(self, url, page=None):
+        """
+        Preparar a renderização de uma página; page é o documento já baixado
+        ({url final, body, content_type, charset, status_code}) ou None
+
+        Returns:
+            URL que o navegador deve abrir
+        """
+        # Túneis da página anterior não consomem o orçamento desta
+        self._close_tunnels()
+        document, upgrade, target = None, set(), url
+        if page and page.get('body') is not None:
+            final = urlsplit(page.get('url') or url)
+            netloc = final.netloc.lower()
+            content_type = page.get('content_type') or 'text/html'
+            if page.get('charset'):
+                content_type += f"; charset={page['charset']}"
+            document = ((netloc, final.path or '/', final.query), page.get('status_code') or 200,
+                        content_type, page['body'])
+            if final.scheme == 'https':
+                upgrade.add(netloc)
+            target = urlunsplit(('http', final.netloc, final.path or '/', final.query, ''))
+        with self._lock:
+            self._document = document
+            self._upgrade = upgrade
+            self._page = self._new_counters()
+        return target
+
+    def end_page(self):
+        """Contadores da página renderizada"""
+        with self._lock:
+            page = dict(self._page)
+            self._document = None
+        page['budget_bytes'] = self.budget
+        return page
+
+    def _forward(self, handler):
+        self._count('requests')
+        target = urlsplit(handler.path)
+        if target.scheme != 'http' or not target.netloc:
+            return _reply(handler, 400)
+        netloc = target.netloc.lower()
+
+        with self._lock:
+            document, upgrade = self._document, netloc in self._upgrade
+        if (document and handler.command in ('GET', 'HEAD')
+                and document[0] == (netloc, target.path or '/', target.query)):
+            self._count('document')
+            _, status, content_type, body = document
+            return _reply(handler, status, [('Content-Type', content_type)], body)
+
+        if host_blocked(target.hostname, self.blocklist):
+            self._count('blocked')
+            return _reply(handler, 403)
+
+        upstream_url = urlunsplit(('https' if upgrade else 'http', target.netloc, target.path, target.query, ''))
+        lowered_request_headers = {name.lower(): value for name, value in handler.headers.items()}
+        if handler.command == 'GET':
+            cached = self.cache.get(upstream_url, lowered_request_headers)
+            if cached is not None:
+                self._count('cache_hits')
+                return _reply(handler, *cached)
+
+        if self._exhausted():
+            self._count('over_budget')
+            return _reply(handler, 503)
+
+        length = int(handler.headers.get('Content-Length') or 0)
+        request_body = handler.rfile.read(length) if length else None
+        request_headers = {
+            name: value for name, value in handler.headers.items() if name.lower() not in DROPPED_REQUEST_HEADERS
+        }
+
+        self._count('upstream_requests')
+        chunks = []
+        try:
+            with self.client.stream(handler.command, upstream_url, headers=request_headers, data=request_body,
+                                    allow_redirects=False, timeout=UPSTREAM_TIMEOUT) as response:
+                for chunk in response.iter_content(READ_CHUNK_SIZE):
+                    if not self._charge(len(chunk)):
+                        self._count('over_budget')
+                        return _reply(handler, 503)
+                    chunks.append(chunk)
+                status, response_headers = response.status_code, response.headers
+        except Exception as e:
+            self._count('errors')
+            logger.debug(f"Proxy de renderização: {upstream_url}: {e}")
+            return _reply(handler, 502)
+
+        body = b''.join(chunks)
+        headers = []
+        for name, value in response_headers.items():
+            if name.lower() in DROPPED_RESPONSE_HEADERS:
+                continue
+            # Redirecionamento no mesmo host continua passando pelo proxy
+            if upgrade and name.lower() == 'location' and value.lower().startswith(f'https://{netloc}'):
+                value = 'http://' + value[len('https://'):]
+            headers.append((name, value))
+
+        policy = _cache_policy(status, response_headers, body, lowered_request_headers) if handler.command == 'GET' else None
+        if policy is not None:
+            ttl, vary = policy
+            cached_headers = [(name, value) for name, value in headers if name.lower() != 'set-cookie']
+            self.cache.put(upstream_url, status, cached_headers, body, ttl, vary)
+        return _reply(handler, status, headers, body)
+
+    def _tunnel(self, handler):
+        self._count('requests')
+        host, _, port = handler.path.rpartition(':')
+        if host_blocked(host.strip('[]'), self.blocklist):
+            self._count('blocked')
+            return _reply(handler, 403)
+        if self._exhausted():
+            self._count('over_budget')
+            return _reply(handler, 503)
+        try:
+            upstream = socket.create_connection((host.strip('[]'), int(port or 443)), timeout=UPSTREAM_TIMEOUT[0])
+        except (OSError, ValueError):
+            self._count('errors')
+            return _reply(handler, 502)
+
+        self._count('tunnels')
+        with self._lock:
+            self._tunnels.add(upstream)
+        handler.send_response(200, 'Connection Established')
+        handler.end_headers()
+        handler.close_connection = True
+
+        client = handler.connection
+        try:
+            while True:
+                readable, _, _ = select.select([client, upstream], [], [], TUNNEL_IDLE_TIMEOUT)
+                if not readable:
+                    return
+                for sock in readable:
+                    data = sock.recv(READ_CHUNK_SIZE)
+                    if not data:
+                        return
+                    if sock is upstream:
+                        if not self._charge(len(data)):
+                            self._count('over_budget')
+                            return
+                        client.sendall(data)
+                    else:
+                        upstream.sendall(data)
+        except OSError:
+            return
+        finally:
+            with self._lock:
+                self._tunnels.discard(upstream)
+            upstream.close()
+
+    def stats(self):
+        with self._lock:
+            totals = dict(self._totals)
+        return dict(totals, budget_bytes=self.budget, cache=self.cache.stats())
@@ -2,151 +2,78 @@
 Screenshot Analyzer - Captura e compara screenshots de páginas web
 Detecta clonagem visual de sites legítimos usando perceptual hashing
 """
-import os
-import tempfile
-import imagehash
 from PIL import Image
 from io import BytesIO
 import time
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.firefox.service import Service
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import logging
+from .browser_pool import BrowserPoolExhausted, default_browser_pool
+from .cpu_pool import default_cpu_pool
+from .reference_hashes import HASH_ALGORITHMS, ReferenceHashStore, hashes_task
+from .screenshot_store import default_screenshot_store
 
 logger = logging.getLogger(__name__)
 
+# Espera após o load para o JS terminar de montar a página
+RENDER_SETTLE_SECONDS = 0.5
+
+def perceptual_hash(image):
+    """Perceptual hash padronizado (imagem redimensionada para 256x256)"""
+    return HASH_ALGORITHMS['phash'](image)
+
 class ScreenshotAnalyzer:
-    def __init__(self):
+    def __init__(self, cpu_pool=None, browser_pool=None, references=None, store=None, proxy=None):
         """
         Inicializa o analisador de screenshots com base de hashes de sites legítimos
         """
-        # Base de dados de hashes perceptuais de sites legítimos conhecidos
-        # Em produção, isso seria carregado de um arquivo ou banco de dados
+        # Decodificação do PNG e hash perceptual rodam no pool de CPU
+        self.cpu_pool = cpu_pool or default_cpu_pool()
+        
+        # Domínios oficiais de cada marca (capturas nesses domínios não são clones)
         self.legitimate_sites = {
             'google': {
-                'domains': ['google.com', 'accounts.google.com', 'mail.google.com'],
-                'hash': None,  # Será calculado na primeira execução
-                'threshold': 10  # Diferença máxima de hash para considerar similar
+                'domains': ['google.com', 'accounts.google.com', 'mail.google.com']
             },
             'facebook': {
-                'domains': ['facebook.com', 'www.facebook.com', 'm.facebook.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['facebook.com', 'www.facebook.com', 'm.facebook.com']
             },
             'amazon': {
-                'domains': ['amazon.com', 'www.amazon.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['amazon.com', 'www.amazon.com']
             },
             'paypal': {
-                'domains': ['paypal.com', 'www.paypal.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['paypal.com', 'www.paypal.com']
             },
             'microsoft': {
-                'domains': ['microsoft.com', 'login.microsoftonline.com', 'outlook.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['microsoft.com', 'login.microsoftonline.com', 'outlook.com']
             },
             'apple': {
-                'domains': ['apple.com', 'appleid.apple.com', 'icloud.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['apple.com', 'appleid.apple.com', 'icloud.com']
             },
             'netflix': {
-                'domains': ['netflix.com', 'www.netflix.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['netflix.com', 'www.netflix.com']
             },
             'linkedin': {
-                'domains': ['linkedin.com', 'www.linkedin.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['linkedin.com', 'www.linkedin.com']
             },
             'twitter': {
-                'domains': ['twitter.com', 'x.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['twitter.com', 'x.com']
             },
             'instagram': {
-                'domains': ['instagram.com', 'www.instagram.com'],
-                'hash': None,
-                'threshold': 10
+                'domains': ['instagram.com', 'www.instagram.com']
             }
         }
         
-        # Configurações do Selenium - OTIMIZADO PARA VELOCIDADE
-        self.driver = None
-        self.screenshot_timeout = 5  # segundos (reduzido ao mínimo)
-        self.page_load_timeout = 5  # segundos (reduzido ao mínimo)
-    
-    def _init_driver(self):
-        """
-        Inicializa o WebDriver do Firefox em modo headless
-        """
-        if self.driver is not None:
-            return
+        # Hashes das páginas de login de referência (training/reference_screenshots.py)
+        self.references = references or ReferenceHashStore()
         
-        try:
-            options = Options()
-            options.add_argument('--headless')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=1920,1080')
-            
-            # Otimizações para velocidade
-            options.set_preference('permissions.default.image', 2)  # Não carregar imagens
-            options.set_preference('dom.ipc.plugins.enabled.libflashplayer.so', False)
-            options.set_preference('javascript.enabled', True)  # Manter JS para layout
-            options.set_preference('permissions.default.stylesheet', 2)  # Não carregar CSS externo
-            options.set_preference('permissions.default.media', 2)  # Não carregar media
-            
-            # Tentar encontrar o Firefox
-            firefox_paths = [
-                '/snap/firefox/7084/usr/lib/firefox/firefox',  # Snap Firefox
-                '/snap/firefox/current/usr/lib/firefox/firefox',  # Snap com link current
-                '/usr/lib/firefox/firefox',  # Firefox tradicional
-                '/usr/bin/firefox',
-                '/snap/bin/firefox',
-                '/usr/local/bin/firefox'
-            ]
-            
-            firefox_binary = None
-            for path in firefox_paths:
-                if os.path.exists(path):
-                    firefox_binary = path
-                    logger.info(f"Firefox encontrado em: {path}")
-                    break
-            
-            if firefox_binary:
-                options.binary_location = firefox_binary
-            
-            # Criar serviço do geckodriver
-            service = Service(log_path=os.devnull)
-            
-            self.driver = webdriver.Firefox(options=options, service=service)
-            self.driver.set_page_load_timeout(self.page_load_timeout)
-            
-            logger.info("WebDriver Firefox inicializado com sucesso")
-            
-        except Exception as e:
-            logger.error(f"Erro ao inicializar WebDriver: {str(e)}")
-            self.driver = None
-            raise
-    
-    def _cleanup_driver(self):
-        """
-        Limpa e fecha o WebDriver
-        """
-        if self.driver:
-            try:
-                self.driver.quit()
-            except Exception as e:
-                logger.error(f"Erro ao fechar WebDriver: {str(e)}")
-            finally:
-                self.driver = None
+        # Capturas salvas por conteúdo (miniatura + imagem inteira, com limite de espaço)
+        self.store = store or default_screenshot_store()
+        
+        # Navegadores headless aquecidos (checkout/checkin por captura)
+        self.browser_pool = browser_pool or default_browser_pool()
+        # Proxy local de renderização do navegador (None: o navegador acessa a rede direto)
+        self.proxy = proxy
+        self.render_settle = RENDER_SETTLE_SECONDS
     
     def capture_screenshot(self, url, retries=1):
         """
@@ -159,31 +86,45 @@ class ScreenshotAnalyzer:
         Returns:
             PIL.Image object ou None em caso de erro
         """
+        screenshot_bytes = self.capture_screenshot_png(url, retries)
+        if screenshot_bytes is None:
+            return None
+        return Image.open(BytesIO(screenshot_bytes))
+    
+    def capture_screenshot_png(self, url, retries=1):
+        """
+        Captura screenshot de uma URL sem decodificar a imagem
+        
+        Returns:
+            bytes do PNG ou None em caso de erro
+        
+        Raises:
+            BrowserPoolExhausted: nenhum navegador livre (fila cheia ou espera esgotada)
+        """
+        # Adicionar protocolo se não tiver
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        
         for attempt in range(retries):
             try:
-                self._init_driver()
-                
-                # Adicionar protocolo se não tiver
-                if not url.startswith(('http://', 'https://')):
-                    url = 'https://' + url
-                
                 logger.info(f"Capturando screenshot de {url} (tentativa {attempt + 1}/{retries})")
                 
-                # Navegar para a página
-                self.driver.get(url)
-                
-                # Aguardar o mínimo possível
-                time.sleep(0.5)  # Reduzido de 1 para 0.5 segundo
-                
-                # Capturar screenshot
-                screenshot_bytes = self.driver.get_screenshot_as_png()
+                # Navegador já iniciado; volta ao pool limpo (cookies, storage, about:blank)
+                with self.browser_pool.lease() as browser:
+                    browser.driver.get(url)
+                    
+                    # Aguardar o mínimo possível
+                    time.sleep(self.render_settle)
+                    
+                    # Capturar screenshot
+                    screenshot_bytes = browser.driver.get_screenshot_as_png()
                 
-                # Converter para PIL Image
-                image = Image.open(BytesIO(screenshot_bytes))
+                logger.info(f"Screenshot capturado com sucesso: {len(screenshot_bytes)} bytes")
                 
-                logger.info(f"Screenshot capturado com sucesso: {image.size}")
+                return screenshot_bytes
                 
-                return image
+            except BrowserPoolExhausted:
+                raise
                 
             except TimeoutException:
                 logger.warning(f"Timeout ao carregar {url} (tentativa {attempt + 1}/{retries})")
@@ -191,8 +132,8 @@ class ScreenshotAnalyzer:
                     return None
                     
             except WebDriverException as e:
+                # O pool descarta o navegador com erro
                 logger.error(f"Erro do WebDriver ao capturar {url}: {str(e)}")
-                self._cleanup_driver()
                 if attempt == retries - 1:
                     return None
                     
@@ -214,25 +155,20 @@ class ScreenshotAnalyzer:
             imagehash.ImageHash object
         """
         try:
-            # Redimensionar para padronizar
-            image = image.resize((256, 256))
-            
-            # Calcular perceptual hash
-            phash = imagehash.phash(image, hash_size=16)
-            
-            return phash
+            # Redimensionar para padronizar e calcular perceptual hash
+            return perceptual_hash(image)
             
         except Exception as e:
             logger.error(f"Erro ao calcular hash: {str(e)}")
             return None
     
-    def compare_with_legitimate(self, url, screenshot_hash):
+    def compare_with_legitimate(self, url, screenshot_hashes):
         """
         Compara screenshot com sites legítimos conhecidos
         
         Args:
             url: URL analisada
-            screenshot_hash: Hash da screenshot
+            screenshot_hashes: hashes da screenshot ({algoritmo: hex}, ver reference_hashes)
             
         Returns:
             dict com resultados da comparação
@@ -245,7 +181,7 @@ class ScreenshotAnalyzer:
             'matches': []
         }
         
-        if screenshot_hash is None:
+        if not screenshot_hashes:
             return results
         
         # Extrair domínio da URL
@@ -253,61 +189,43 @@ class ScreenshotAnalyzer:
         parsed = urlparse(url if url.startswith('http') else 'https://' + url)
         domain = parsed.netloc.lower().replace('www.', '')
         
-        min_difference = 999
-        best_match = None
-        
-        # Comparar com cada marca conhecida
+        # Verificar se o domínio já é legítimo
         for brand, info in self.legitimate_sites.items():
-            # Verificar se o domínio já é legítimo
             if any(legit_domain in domain for legit_domain in info['domains']):
                 results['is_legitimate_domain'] = True
                 results['brand'] = brand
                 return results
-            
-            # Se ainda não temos hash da marca, pular
-            if info['hash'] is None:
-                continue
-            
-            # Calcular diferença
-            try:
-                difference = screenshot_hash - info['hash']
-                
-                if difference < min_difference:
-                    min_difference = difference
-                    best_match = brand
-                
-                # Se muito similar, pode ser clone
-                if difference <= info['threshold']:
-                    results['matches'].append({
-                        'brand': brand,
-                        'difference': difference,
-                        'threshold': info['threshold']
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Erro ao comparar com {brand}: {str(e)}")
-                continue
+        
+        # Referências mais próximas, uma por marca (sem base publicada: lista vazia)
+        try:
+            candidates = self.references.match(screenshot_hashes)
+        except Exception as e:
+            logger.error(f"Erro ao comparar com referências: {str(e)}")
+            return results
+        
+        if not candidates:
+            return results
+        
+        results['reference_version'] = self.references.version
+        results['matches'] = [candidate for candidate in candidates if candidate['is_clone']]
         
         # Avaliar resultados
-        if results['matches']:
-            results['is_clone'] = True
-            results['cloned_brand'] = results['matches'][0]['brand']
-            results['similarity_score'] = 100 - (results['matches'][0]['difference'] * 5)
-            results['hash_difference'] = results['matches'][0]['difference']
-        elif best_match and min_difference < 20:
-            # Similar mas não idêntico
-            results['cloned_brand'] = best_match
-            results['similarity_score'] = max(0, 100 - (min_difference * 5))
-            results['hash_difference'] = min_difference
+        best = results['matches'][0] if results['matches'] else candidates[0]
+        results['cloned_brand'] = best['brand']
+        results['reference_variant'] = f"{best['variant']}@{best['viewport']}"
+        results['similarity_score'] = best['similarity']
+        results['hash_difference'] = best['distances']['phash']
+        results['is_clone'] = best['is_clone']
         
         return results
     
-    def analyze(self, url):
+    def analyze(self, url, page=None):
         """
         Análise completa de screenshot
         
         Args:
             url: URL para analisar
+            page: documento já baixado pelo ContentAnalyzer (servido pelo proxy de renderização)
             
         Returns:
             dict com resultados da análise
@@ -327,7 +245,18 @@ class ScreenshotAnalyzer:
         
         try:
             # Capturar screenshot
-            screenshot = self.capture_screenshot(url)
+            target = self.proxy.begin_page(url, page) if self.proxy else url
+            try:
+                screenshot = self.capture_screenshot_png(target)
+            except BrowserPoolExhausted as e:
+                logger.warning(f"Screenshot recusado: {e}")
+                result['error'] = 'Fila de screenshots cheia'
+                result['details'].append('⚡ Todos os navegadores ocupados - screenshot pulado')
+                result['feature_available'] = False
+                return result
+            finally:
+                if self.proxy:
+                    result['render'] = self.proxy.end_page()
             
             if screenshot is None:
                 result['error'] = 'Não foi possível capturar screenshot (Selenium/Firefox não configurado)'
@@ -338,39 +267,42 @@ class ScreenshotAnalyzer:
             
             result['screenshot_captured'] = True
             result['details'].append('✓ Screenshot capturado com sucesso')
+            render = result.get('render')
+            if render and render['document']:
+                result['details'].append(
+                    f'ℹ️ Renderizado a partir do HTML já analisado ({render["upstream_bytes"] // 1024} KB baixados, '
+                    f'{render["cache_hits"]} do cache, {render["blocked"]} rastreadores bloqueados)'
+                )
             
-            # Salvar screenshot
+            # Salvar screenshot (endereçado por conteúdo: renders idênticos não duplicam)
             try:
-                screenshots_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'screenshots')
-                os.makedirs(screenshots_dir, exist_ok=True)
-                
-                # Nome do arquivo baseado no hash da URL
-                import hashlib
-                url_hash = hashlib.md5(url.encode()).hexdigest()
-                screenshot_filename = f'screenshot_{url_hash}.png'
-                screenshot_path = os.path.join(screenshots_dir, screenshot_filename)
-                
-                # Salvar imagem
-                screenshot.save(screenshot_path, 'PNG')
-                result['screenshot_path'] = f'/static/screenshots/{screenshot_filename}'
-                logger.info(f"Screenshot salvo em: {screenshot_path}")
+                stored = self.store.put(url, screenshot)
+                result['screenshot_path'] = stored['screenshot_path']
+                result['screenshot_thumbnail'] = stored['thumbnail_path']
+                result['screenshot_digest'] = stored['digest']
+                if stored['deduplicated']:
+                    result['details'].append('ℹ️ Render idêntico a uma captura já armazenada')
                 
             except Exception as e:
                 logger.error(f"Erro ao salvar screenshot: {str(e)}")
             
-            # Calcular hash
-            phash = self.calculate_phash(screenshot)
+            # Calcular hashes (no pool de CPU: entra o PNG, saem phash/dhash/colorhash)
+            try:
+                hashes = self.cpu_pool.call(hashes_task, screenshot)
+            except Exception as e:
+                logger.error(f"Erro ao calcular hash: {str(e)}")
+                hashes = None
             
-            if phash is None:
+            if hashes is None:
                 result['error'] = 'Erro ao calcular hash da imagem'
                 result['details'].append('⚠️ Erro ao processar screenshot')
                 return result
             
-            result['visual_hash'] = str(phash)
-            result['details'].append(f'✓ Hash visual calculado: {str(phash)[:16]}...')
+            result['visual_hash'] = hashes['phash']
+            result['details'].append(f'✓ Hash visual calculado: {hashes["phash"][:16]}...')
             
             # Comparar com sites legítimos
-            comparison = self.compare_with_legitimate(url, phash)
+            comparison = self.compare_with_legitimate(url, hashes)
             
             # Se for domínio legítimo
             if comparison.get('is_legitimate_domain'):
@@ -393,7 +325,8 @@ class ScreenshotAnalyzer:
                     f'⚠️ Similaridade visual: {comparison["similarity_score"]:.1f}%'
                 )
                 result['details'].append(
-                    f'⚠️ Diferença de hash: {comparison["hash_difference"]}'
+                    f'⚠️ Diferença de hash: {comparison["hash_difference"]} '
+                    f'(referência {comparison["reference_variant"]})'
                 )
             
             # Se for similar mas não clone
@@ -420,16 +353,6 @@ class ScreenshotAnalyzer:
             result['details'].append('ℹ️ Sistema continua com 6 outras análises ativas')
             result['feature_available'] = False
             return result
-        
-        finally:
-            # Sempre limpar o driver
-            self._cleanup_driver()
-    
-    def __del__(self):
-        """
-        Destrutor para garantir limpeza do driver
-        """
-        self._cleanup_driver()
 
 
 # Teste standalone
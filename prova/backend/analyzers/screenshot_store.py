@@ -0,0 +1,320 @@
+"""
+Armazenamento de screenshots endereçado por conteúdo
+Cada captura é guardada pelo SHA-256 do PNG: renders idênticos (o mesmo kit
+em mil domínios) ocupam espaço uma vez só. Fica sempre uma miniatura WebP
+pequena e, opcionalmente, a imagem inteira; um índice URL -> imagem diz qual
+captura corresponde a cada URL analisada
+
+O total em disco respeita SCREENSHOT_STORE_MAX_MB: ao passar do limite, as
+imagens acessadas há mais tempo (e as mais velhas que
+SCREENSHOT_STORE_MAX_AGE_DAYS) são removidas até SCREENSHOT_STORE_LOW_WATER
+do limite. O índice é SQLite (WAL) porque os workers de screenshot são
+processos separados gravando ao mesmo tempo
+
+Layout em disco (servido em /static/screenshots/):
+    <root>/<2 primeiros hex>/<sha256>.webp   miniatura
+    <root>/<2 primeiros hex>/<sha256>.png    imagem inteira (opcional)
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+from PIL import Image
+
+# Configuráveis por variável de ambiente
+SCREENSHOT_STORE_MAX_MB = float(os.environ.get('SCREENSHOT_STORE_MAX_MB', 512))
+SCREENSHOT_STORE_MAX_AGE_DAYS = float(os.environ.get('SCREENSHOT_STORE_MAX_AGE_DAYS', 30))
+SCREENSHOT_STORE_KEEP_FULL = os.environ.get('SCREENSHOT_STORE_KEEP_FULL', '1') != '0'
+SCREENSHOT_STORE_LOW_WATER = 0.9
+
+THUMBNAIL_WIDTH = 480
+THUMBNAIL_QUALITY = 70
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ROOT = os.path.join(_BACKEND_DIR, 'static', 'screenshots')
+# Fora da pasta servida
+DEFAULT_INDEX = os.path.join(_BACKEND_DIR, 'data', 'screenshot_index.sqlite3')
+URL_PREFIX = '/static/screenshots'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS images (
+    digest TEXT PRIMARY KEY,
+    width INTEGER,
+    height INTEGER,
+    thumb_bytes INTEGER NOT NULL,
+    full_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS images_last_access ON images (last_access);
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    captured_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS urls_digest ON urls (digest);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+'''
+
+
+def make_thumbnail(image, width=THUMBNAIL_WIDTH, quality=THUMBNAIL_QUALITY):
+    """Miniatura WebP (largura fixa, proporção mantida)"""
+    image = image.convert('RGB')
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ScreenshotStore:
+    def __init__(self, root=DEFAULT_ROOT, index_file=DEFAULT_INDEX, max_mb=SCREENSHOT_STORE_MAX_MB,
+                 max_age_days=SCREENSHOT_STORE_MAX_AGE_DAYS, keep_full=SCREENSHOT_STORE_KEEP_FULL):
+        self.root = root
+        self.index_file = index_file
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age = max_age_days * 86400
+        self.keep_full = keep_full
+        self._schema_ready = False
+
+    def _connect(self):
+        # Uma conexão por operação: vale entre threads e depois de fork
+        os.makedirs(os.path.dirname(self.index_file) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.index_file, timeout=30, isolation_level=None)
+        if not self._schema_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def paths(self, digest):
+        """Caminhos em disco (miniatura, imagem inteira)"""
+        base = os.path.join(self.root, digest[:2], digest)
+        return base + '.webp', base + '.png'
+
+    def urls(self, digest, full=True):
+        """Caminhos públicos (miniatura, imagem inteira ou None)"""
+        base = f'{URL_PREFIX}/{digest[:2]}/{digest}'
+        return base + '.webp', (base + '.png' if full else None)
+
+    def put(self, url, png_bytes):
+        """
+        Guardar a captura de uma URL (sem duplicar renders idênticos)
+
+        Returns:
+            dict com digest, thumbnail_path, screenshot_path e deduplicated
+        """
+        digest = hashlib.sha256(png_bytes).hexdigest()
+        thumb_path, full_path = self.paths(digest)
+
+        # Decodificar, reduzir e gravar fora da trava de escrita (os outros workers seguem gravando)
+        prepared = None if self._stored(digest, thumb_path) else self._prepare(png_bytes, thumb_path, full_path)
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            # Trava de escrita só para conferir e indexar: uma remoção concorrente não some com os arquivos indexados
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT full_bytes FROM images WHERE digest = ?', (digest,)).fetchone()
+            deduplicated = row is not None and os.path.exists(thumb_path)
+            if deduplicated:
+                conn.execute('UPDATE images SET last_access = ?, hits = hits + 1 WHERE digest = ?', (now, digest))
+                has_full = row[0] > 0
+            else:
+                if prepared is None:
+                    # Removida entre a conferência e a trava (raro): preparar aqui mesmo
+                    prepared = self._prepare(png_bytes, thumb_path, full_path)
+                width, height, thumbnail = prepared
+                # Arquivos apagados por uma remoção entre a gravação e a trava
+                if not os.path.exists(thumb_path):
+                    _write_atomic(thumb_path, thumbnail)
+                if self.keep_full and not os.path.exists(full_path):
+                    _write_atomic(full_path, png_bytes)
+                has_full = self.keep_full
+                conn.execute(
+                    'INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, 1)',
+                    (digest, width, height, len(thumbnail), len(png_bytes) if self.keep_full else 0, now, now)
+                )
+            conn.execute('INSERT OR REPLACE INTO urls VALUES (?, ?, ?)', (url, digest, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        if not deduplicated:
+            self.enforce_budget()
+
+        thumbnail_url, full_url = self.urls(digest, has_full)
+        return {
+            'digest': digest,
+            'thumbnail_path': thumbnail_url,
+            'screenshot_path': full_url or thumbnail_url,
+            'deduplicated': deduplicated
+        }
+
+    def _stored(self, digest, thumb_path):
+        """Captura já indexada e com a miniatura em disco (conferência sem trava)"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT 1 FROM images WHERE digest = ?', (digest,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None and os.path.exists(thumb_path)
+
+    def _prepare(self, png_bytes, thumb_path, full_path):
+        """Gravar miniatura (e imagem inteira); retorna (largura, altura, miniatura)"""
+        with Image.open(BytesIO(png_bytes)) as image:
+            width, height = image.size
+            thumbnail = make_thumbnail(image)
+        _write_atomic(thumb_path, thumbnail)
+        if self.keep_full:
+            _write_atomic(full_path, png_bytes)
+        return width, height, thumbnail
+
+    def lookup(self, url):
+        """Captura mais recente de uma URL (ou None)"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT u.digest, u.captured_at, i.full_bytes, i.width, i.height '
+                'FROM urls u JOIN images i ON i.digest = u.digest WHERE u.url = ?', (url,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        digest, captured_at, full_bytes, width, height = row
+        thumbnail_url, full_url = self.urls(digest, full_bytes > 0)
+        return {
+            'digest': digest,
+            'captured_at': captured_at,
+            'width': width,
+            'height': height,
+            'thumbnail_path': thumbnail_url,
+            'screenshot_path': full_url or thumbnail_url
+        }
+
+    def touch(self, filename):
+        """Marcar acesso a um arquivo servido (nome relativo à raiz: '<ab>/<sha256>.webp')"""
+        digest = os.path.splitext(os.path.basename(filename))[0]
+        if len(digest) != 64:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('UPDATE images SET last_access = ? WHERE digest = ?', (time.time(), digest))
+        finally:
+            conn.close()
+
+    def _delete(self, conn, digests):
+        for digest in digests:
+            for path in self.paths(digest):
+                _remove(path)
+        conn.executemany('DELETE FROM urls WHERE digest = ?', [(d,) for d in digests])
+        conn.executemany('DELETE FROM images WHERE digest = ?', [(d,) for d in digests])
+
+    def enforce_budget(self):
+        """Remover capturas vencidas e, acima do limite, as acessadas há mais tempo"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            expired = [
+                digest for (digest,) in conn.execute(
+                    'SELECT digest FROM images WHERE last_access < ?', (time.time() - self.max_age,)
+                )
+            ]
+            self._delete(conn, expired)
+
+            total = conn.execute('SELECT COALESCE(SUM(thumb_bytes + full_bytes), 0) FROM images').fetchone()[0]
+            evicted = []
+            if total > self.max_bytes:
+                target = self.max_bytes * SCREENSHOT_STORE_LOW_WATER
+                for digest, size in conn.execute(
+                    'SELECT digest, thumb_bytes + full_bytes FROM images ORDER BY last_access'
+                ).fetchall():
+                    if total <= target:
+                        break
+                    evicted.append(digest)
+                    total -= size
+                self._delete(conn, evicted)
+            # Contadores no índice: as remoções acontecem nos processos dos workers
+            conn.executemany(
+                'INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                [('expired', len(expired)), ('evicted', len(evicted))]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        return len(expired) + len(evicted)
+
+    def stats(self):
+        """Totais do índice (compartilhado por todos os processos)"""
+        conn = self._connect()
+        try:
+            images, total, full, hits = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(thumb_bytes + full_bytes), 0), COUNT(NULLIF(full_bytes, 0)), '
+                'COALESCE(SUM(hits), 0) FROM images'
+            ).fetchone()
+            urls = conn.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+            counters = dict(conn.execute('SELECT name, value FROM counters'))
+        finally:
+            conn.close()
+        return {
+            'images': images,
+            'full_images': full,
+            'urls': urls,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'max_age_days': self.max_age / 86400,
+            # Capturas que reaproveitaram uma imagem já armazenada (entre as ainda guardadas)
+            'deduplicated': hits - images,
+            'expired': counters.get('expired', 0),
+            'evicted': counters.get('evicted', 0)
+        }
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_screenshot_store():
+    """Armazenamento de screenshots compartilhado do processo"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ScreenshotStore()
+        return _default_store
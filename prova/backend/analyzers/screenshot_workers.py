@@ -0,0 +1,291 @@
+"""
+Workers de screenshot supervisionados
+Cada captura roda num processo worker com o próprio navegador aquecido
+(ScreenshotAnalyzer + BrowserPool de 1 navegador + RenderProxy). Um thread supervisor por
+worker tira o próximo pedido de uma fila de prioridade limitada, envia ao
+worker e espera até o prazo do pedido; estourado o prazo, o worker é morto
+junto com o navegador (grupo de processos e descendentes) e outro é
+iniciado. Com a fila cheia o pedido falha na hora: uma página presa nunca
+segura a thread da requisição
+"""
+
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+
+from .browser_pool import BrowserPool, descendant_pids, launch_firefox
+from .cpu_pool import CpuPool, process_context
+from .render_proxy import RenderProxy
+from .screenshot_analyzer import ScreenshotAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Configuráveis por variável de ambiente
+SCREENSHOT_WORKERS = int(os.environ.get('SCREENSHOT_WORKERS', 2))
+SCREENSHOT_QUEUE_SIZE = int(os.environ.get('SCREENSHOT_QUEUE_SIZE', 16))
+SCREENSHOT_DEADLINE = float(os.environ.get('SCREENSHOT_DEADLINE', 12))
+SCREENSHOT_START_METHOD = os.environ.get('SCREENSHOT_START_METHOD', 'forkserver')  # ver cpu_pool
+
+# Menor número = atendido antes
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class ScreenshotQueueFull(RuntimeError):
+    """Fila de screenshots cheia: o pedido é recusado sem esperar"""
+
+
+class ScreenshotTimeout(TimeoutError):
+    """Prazo do screenshot estourado (na fila ou no worker, que é morto)"""
+
+
+class ScreenshotWorkerError(RuntimeError):
+    """O worker morreu no meio da captura"""
+
+
+def _worker_main(conn):
+    # Grupo de processos próprio: geckodriver e Firefox morrem junto com o worker
+    os.setsid()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # O navegador do worker sai pela rede através do proxy local (documento já baixado, cache, bloqueio)
+    proxy = RenderProxy().start()
+    analyzer = ScreenshotAnalyzer(
+        cpu_pool=CpuPool(workers=0),  # o worker já é um processo à parte
+        browser_pool=BrowserPool(size=1, max_waiters=1, launcher=functools.partial(launch_firefox, proxy=proxy.address)),
+        proxy=proxy
+    )
+    analyzer.browser_pool.warm()
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                break
+            if request is None:
+                break
+            url, page = request
+            conn.send(analyzer.analyze(url, page))
+    finally:
+        analyzer.browser_pool.close()
+        proxy.close()
+
+
+class _Job:
+    __slots__ = ('url', 'page', 'deadline', 'future')
+
+    def __init__(self, url, page, deadline):
+        self.url = url
+        self.page = page
+        self.deadline = deadline
+        self.future = Future()
+
+
+class _WorkerSlot:
+    """Um processo worker e a ponta do pipe do supervisor"""
+
+    def __init__(self, context):
+        self.context = context
+        self.process = None
+        self.conn = None
+        self.started = 0
+
+    def ensure(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        self.stop()
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_worker_main, args=(child_conn,), name='screenshot-worker', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.started += 1
+
+    def kill(self):
+        """Matar o worker, o navegador e qualquer descendente que tenha escapado do grupo"""
+        process = self.process
+        if process is None:
+            return
+        pids = descendant_pids(process.pid) or []
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        process.join(1)
+        self._close_conn()
+        self.process = None
+
+    def stop(self):
+        """Encerrar o worker educadamente (fecha o navegador) e matar se não sair"""
+        process = self.process
+        if process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        process.join(5)
+        if process.is_alive():
+            self.kill()
+        self._close_conn()
+        self.process = None
+
+    def _close_conn(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class ScreenshotWorkers:
+    def __init__(self, workers=SCREENSHOT_WORKERS, queue_size=SCREENSHOT_QUEUE_SIZE,
+                 deadline=SCREENSHOT_DEADLINE, start_method=SCREENSHOT_START_METHOD):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.deadline = deadline
+        self.context = process_context(start_method)
+        self._queue = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = []
+        self._threads = []
+        self._closed = False
+        self._counters = {
+            'submitted': 0, 'completed': 0, 'rejected': 0, 'expired_in_queue': 0,
+            'killed': 0, 'worker_errors': 0, 'in_flight': 0
+        }
+
+    def start(self):
+        """Iniciar os workers (cada um aquece seu navegador) e os threads supervisores"""
+        with self._cond:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                slot = _WorkerSlot(self.context)
+                slot.ensure()
+                thread = threading.Thread(
+                    target=self._supervise, args=(slot,), name=f'screenshot-supervisor-{index}', daemon=True
+                )
+                self._slots.append(slot)
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, url, priority=PRIORITY_INTERACTIVE, deadline=None, page=None):
+        """
+        Enfileirar um screenshot; o prazo conta a partir de agora (fila + captura)
+        page: documento já baixado pelo ContentAnalyzer (o navegador não baixa de novo)
+
+        Raises:
+            ScreenshotQueueFull: fila cheia
+        """
+        if not self._threads:
+            self.start()
+        job = _Job(url, page, time.monotonic() + (deadline or self.deadline))
+        with self._cond:
+            if self._closed or len(self._queue) >= self.queue_size:
+                self._counters['rejected'] += 1
+                raise ScreenshotQueueFull(f'Fila de screenshots cheia ({len(self._queue)} pedidos)')
+            heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            self._counters['submitted'] += 1
+            self._cond.notify()
+        return job.future
+
+    async def analyze_async(self, url, priority=PRIORITY_INTERACTIVE, deadline=None, page=None):
+        """Screenshot sem ocupar thread: o supervisor garante o prazo"""
+        return await asyncio.wrap_future(self.submit(url, priority, deadline, page))
+
+    def _next_job(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            return heapq.heappop(self._queue)[2]
+
+    def _count(self, name, delta=1):
+        with self._cond:
+            self._counters[name] += delta
+
+    def _supervise(self, slot):
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            if not job.future.set_running_or_notify_cancel():
+                continue  # quem pediu desistiu enquanto esperava na fila
+            remaining = job.deadline - time.monotonic()
+            if remaining <= 0:
+                self._count('expired_in_queue')
+                job.future.set_exception(ScreenshotTimeout('Prazo do screenshot esgotado na fila'))
+                continue
+
+            self._count('in_flight')
+            try:
+                slot.ensure()
+                slot.conn.send((job.url, job.page))
+                if slot.conn.poll(remaining):
+                    job.future.set_result(slot.conn.recv())
+                    self._count('completed')
+                else:
+                    # Página presa: mata worker e navegador; o próximo pedido pega um worker novo
+                    slot.kill()
+                    self._count('killed')
+                    job.future.set_exception(ScreenshotTimeout(f'Screenshot excedeu o prazo (worker encerrado após {remaining:.1f}s)'))
+                    slot.ensure()
+            except (EOFError, OSError, ValueError) as e:
+                slot.kill()
+                self._count('worker_errors')
+                job.future.set_exception(ScreenshotWorkerError(f'Worker de screenshot encerrado: {e}'))
+            finally:
+                self._count('in_flight', -1)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'alive_workers': sum(
+                    1 for slot in self._slots if slot.process is not None and slot.process.is_alive()
+                ),
+                'worker_starts': sum(slot.started for slot in self._slots),
+                'queued': len(self._queue),
+                'queue_size': self.queue_size,
+                'deadline': self.deadline,
+                **self._counters
+            }
+
+    def close(self):
+        """Recusar pedidos na fila e encerrar workers e navegadores"""
+        with self._cond:
+            self._closed = True
+            queued, self._queue = self._queue, []
+            self._cond.notify_all()
+        for _, _, job in queued:
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(ScreenshotQueueFull('Workers de screenshot encerrados'))
+        for slot in self._slots:
+            slot.stop()
+
+
+_default_workers = None
+_default_lock = threading.Lock()
+
+
+def default_screenshot_workers():
+    """Workers de screenshot compartilhados do processo"""
+    global _default_workers
+    with _default_lock:
+        if _default_workers is None:
+            _default_workers = ScreenshotWorkers()
+        return _default_workers
@@ -0,0 +1,110 @@
+"""
+Varredura de scripts inline em uma passada
+Cada padrão suspeito começa com uma âncora literal (eval, document.write...).
+As âncoras formam um autômato Aho-Corasick que percorre o script uma única
+vez; a expressão regular completa só é conferida nas posições onde uma
+âncora aparece, e um padrão deixa de ser conferido depois do primeiro
+acerto. Scripts inline cujo hash está na allowlist de bibliotecas
+conhecidas são ignorados sem varredura. A allowlist vem vazia: o hash só
+bate com cópias idênticas byte a byte, então ela deve ser preenchida com
+os arquivos exatos que aparecem inline nas páginas analisadas
+
+Uso (a partir de backend/), para incluir bibliotecas na allowlist:
+    python -m analyzers.script_scanner --add jquery-3.7.1.min.js react.production.min.js
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from .keyword_matcher import build_automaton
+
+DEFAULT_ALLOWLIST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'rules', 'script_allowlist.json'
+)
+
+# Padrões suspeitos: (âncora literal em minúsculas, regex iniciada pela âncora, descrição)
+SCRIPT_PATTERNS = [
+    ('eval', r'eval\s*\(', 'eval() - possível ofuscação'),
+    ('document.write', r'document\.write\s*\(', 'document.write() - possível injeção'),
+    ('fromcharcode', r'fromCharCode', 'fromCharCode - possível ofuscação'),
+    ('unescape', r'unescape\s*\(', 'unescape() - possível ofuscação'),
+    ('string.fromcharcode', r'String\.fromCharCode', 'String.fromCharCode - ofuscação'),
+    ('window.location', r'window\.location\s*=', 'Redirecionamento via JavaScript'),
+    ('document.cookie', r'document\.cookie', 'Acesso a cookies'),
+    ('addeventlistener', r'addEventListener\s*\(\s*["\']contextmenu', 'Bloqueio de menu de contexto'),
+    ('oncontextmenu', r'oncontextmenu\s*=', 'Bloqueio de clique direito')
+]
+
+
+def script_hash(script):
+    """SHA-256 do conteúdo do script (sem espaços nas pontas)"""
+    return hashlib.sha256(script.strip().encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def load_allowlist(path=None):
+    """Allowlist de bibliotecas conhecidas: sha256 -> nome"""
+    path = path or os.environ.get('SCRIPT_ALLOWLIST_PATH', DEFAULT_ALLOWLIST_PATH)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ScriptScanner:
+    def __init__(self, patterns=SCRIPT_PATTERNS, allowlist=None):
+        self.patterns = [
+            (anchor, re.compile(regex, re.IGNORECASE), description)
+            for anchor, regex, description in patterns
+        ]
+        self.allowlist = load_allowlist() if allowlist is None else allowlist
+
+        anchors = {}
+        for index, (anchor, _, _) in enumerate(self.patterns):
+            anchors.setdefault(anchor, (len(anchor), []))[1].append(index)
+        self.automaton = build_automaton(anchors)
+
+    def known_library(self, script):
+        """Nome da biblioteca se o script estiver na allowlist, senão None"""
+        if not self.allowlist:
+            return None
+        return self.allowlist.get(script_hash(script))
+
+    def scan(self, script):
+        """Descrições dos padrões encontrados no script (cada um no máximo uma vez, na ordem de SCRIPT_PATTERNS)"""
+        if not script:
+            return []
+        # Texto e regex no mesmo script em minúsculas: posições das âncoras batem
+        text = script.lower()
+        found = set()
+        for end, (length, indices) in self.automaton.iter(text):
+            start = end - length + 1
+            for index in indices:
+                if index not in found and self.patterns[index][1].match(text, start):
+                    found.add(index)
+            if len(found) == len(self.patterns):
+                break
+        return [self.patterns[index][2] for index in sorted(found)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--add', nargs='+', required=True, help='arquivos .js de bibliotecas conhecidas')
+    parser.add_argument('--allowlist', default=DEFAULT_ALLOWLIST_PATH)
+    args = parser.parse_args()
+
+    allowlist = load_allowlist(args.allowlist)
+    for path in args.add:
+        with open(path, 'r', encoding='utf-8') as f:
+            digest = script_hash(f.read())
+        allowlist[digest] = os.path.basename(path)
+        print(f"✓ {os.path.basename(path)}: {digest}")
+
+    with open(args.allowlist, 'w', encoding='utf-8') as f:
+        json.dump(allowlist, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
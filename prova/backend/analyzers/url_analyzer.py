@@ -2,20 +2,24 @@
 Analisador de URLs - Heurísticas Avançadas
 """
 
+import asyncio
 import re
-import requests
 import whois
-import socket
 import ssl
-import dns.resolver
 from urllib.parse import urlparse
 from datetime import datetime, timedelta
 from Levenshtein import distance as levenshtein_distance
 import json
 import os
+from .net_engine import NetError, default_net_engine
+
+# Lista do PhishTank (baixada uma vez na inicialização)
+PHISHTANK_URL = 'https://data.phishtank.com/data/online-valid.json'
+PHISHTANK_TIMEOUT = 10
 
 class URLAnalyzer:
-    def __init__(self):
+    def __init__(self, net_engine=None):
+        self.net = net_engine or default_net_engine()
         self.phishing_databases = []
         self.load_phishing_databases()
         self.whitelist = self.load_whitelist()
@@ -25,13 +29,13 @@ class URLAnalyzer:
         """Carregar bancos de dados de phishing"""
         # PhishTank
         try:
-            response = requests.get(
-                'https://data.phishtank.com/data/online-valid.json',
-                timeout=10
-            )
-            if response.status_code == 200:
-                self.phishing_databases.extend([entry['url'] for entry in response.json()])
-        except:
+            body, info = self.net.run(self.net.fetch(
+                PHISHTANK_URL, deadline=PHISHTANK_TIMEOUT,
+                connect_timeout=PHISHTANK_TIMEOUT, read_timeout=PHISHTANK_TIMEOUT
+            ))
+            if info['status_code'] == 200 and not info['truncated']:
+                self.phishing_databases.extend([entry['url'] for entry in json.loads(body)])
+        except (NetError, ValueError, KeyError, TypeError):
             pass
     
     def load_whitelist(self):
@@ -56,7 +60,11 @@ class URLAnalyzer:
         ]
     
     def analyze(self, url):
-        """Executar análise completa de URL"""
+        """Executar análise completa de URL (invólucro síncrono de analyze_async)"""
+        return self.net.run(self.analyze_async(url))
+    
+    async def analyze_async(self, url):
+        """Executar análise completa de URL (WHOIS, SSL, DNS e redirecionamentos em paralelo)"""
         results = {
             'url': url,
             'risk_score': 0,
@@ -89,24 +97,29 @@ class URLAnalyzer:
         results['checks']['brand_similarity'] = brand_similarity
         results['risk_score'] += brand_similarity['risk_score']
         
+        # 5-8. Verificações de rede, todas ao mesmo tempo
+        # (python-whois é bloqueante: roda numa thread do executor)
+        whois_analysis, ssl_analysis, dns_analysis, redirect_analysis = await asyncio.gather(
+            asyncio.to_thread(self.analyze_whois, domain),
+            self.analyze_ssl_async(domain),
+            self.analyze_dns_async(domain),
+            self.analyze_redirects_async(url)
+        )
+        
         # 5. Análise WHOIS (idade do domínio)
-        whois_analysis = self.analyze_whois(domain)
         results['checks']['whois'] = whois_analysis
         results['risk_score'] += whois_analysis['risk_score']
         
         # 6. Verificação de certificado SSL
-        ssl_analysis = self.analyze_ssl(domain)
         results['checks']['ssl'] = ssl_analysis
         results['risk_score'] += ssl_analysis['risk_score']
         results['ssl_issues'] = ssl_analysis.get('has_issues', False)
         
         # 7. Análise de DNS
-        dns_analysis = self.analyze_dns(domain)
         results['checks']['dns'] = dns_analysis
         results['risk_score'] += dns_analysis['risk_score']
         
         # 8. Verificar redirecionamentos suspeitos
-        redirect_analysis = self.analyze_redirects(url)
         results['checks']['redirects'] = redirect_analysis
         results['risk_score'] += redirect_analysis['risk_score']
         
@@ -255,6 +268,9 @@ class URLAnalyzer:
     
     def analyze_ssl(self, domain):
         """Análise de certificado SSL"""
+        return self.net.run(self.analyze_ssl_async(domain))
+    
+    async def analyze_ssl_async(self, domain):
         result = {
             'risk_score': 0,
             'has_issues': False,
@@ -262,32 +278,29 @@ class URLAnalyzer:
         }
         
         try:
-            context = ssl.create_default_context()
-            with socket.create_connection((domain, 443), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    # Verificar validade
-                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    days_until_expiry = (not_after - datetime.now()).days
-                    
-                    result['details']['expires_in_days'] = days_until_expiry
-                    result['details']['issuer'] = dict(x[0] for x in cert['issuer'])
-                    result['details']['subject'] = dict(x[0] for x in cert['subject'])
-                    
-                    # Certificado expirando em breve
-                    if days_until_expiry < 30:
-                        result['risk_score'] += 15
-                        result['has_issues'] = True
-                        result['details']['warning'] = 'Certificado expirando em breve'
-                    
-                    # Verificar se o domínio corresponde ao certificado
-                    cert_domain = result['details']['subject'].get('commonName', '')
-                    if cert_domain != domain and not cert_domain.startswith('*.'):
-                        result['risk_score'] += 20
-                        result['has_issues'] = True
-                        result['details']['warning'] = 'Domínio não corresponde ao certificado'
-                        
+            cert = await self.net.tls_certificate(domain, timeout=5)
+            
+            # Verificar validade
+            not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+            days_until_expiry = (not_after - datetime.now()).days
+            
+            result['details']['expires_in_days'] = days_until_expiry
+            result['details']['issuer'] = dict(x[0] for x in cert['issuer'])
+            result['details']['subject'] = dict(x[0] for x in cert['subject'])
+            
+            # Certificado expirando em breve
+            if days_until_expiry < 30:
+                result['risk_score'] += 15
+                result['has_issues'] = True
+                result['details']['warning'] = 'Certificado expirando em breve'
+            
+            # Verificar se o domínio corresponde ao certificado
+            cert_domain = result['details']['subject'].get('commonName', '')
+            if cert_domain != domain and not cert_domain.startswith('*.'):
+                result['risk_score'] += 20
+                result['has_issues'] = True
+                result['details']['warning'] = 'Domínio não corresponde ao certificado'
+                
         except ssl.SSLError:
             result['risk_score'] += 30
             result['has_issues'] = True
@@ -299,6 +312,9 @@ class URLAnalyzer:
     
     def analyze_dns(self, domain):
         """Análise de DNS - detectar DNS dinâmico"""
+        return self.net.run(self.analyze_dns_async(domain))
+    
+    async def analyze_dns_async(self, domain):
         result = {
             'risk_score': 0,
             'details': {}
@@ -316,8 +332,7 @@ class URLAnalyzer:
                     break
             
             # Resolver DNS
-            answers = dns.resolver.resolve(domain, 'A')
-            ips = [str(rdata) for rdata in answers]
+            ips = await self.net.resolve(domain, 'A')
             result['details']['ip_addresses'] = ips
             
         except:
@@ -327,25 +342,29 @@ class URLAnalyzer:
     
     def analyze_redirects(self, url):
         """Verificar redirecionamentos suspeitos"""
+        return self.net.run(self.analyze_redirects_async(url))
+    
+    async def analyze_redirects_async(self, url):
         result = {
             'risk_score': 0,
             'redirects': []
         }
         
         try:
-            response = requests.get(url, allow_redirects=True, timeout=5)
+            # Só a cadeia de redirecionamentos interessa: o corpo não é baixado
+            _, info = await self.net.fetch(url, connect_timeout=5, read_timeout=5, read_body=False)
             
-            if len(response.history) > 0:
-                result['redirects'] = [r.url for r in response.history]
+            if len(info['redirects']) > 0:
+                result['redirects'] = info['redirects']
                 
                 # Múltiplos redirecionamentos
-                if len(response.history) > 2:
+                if len(info['redirects']) > 2:
                     result['risk_score'] += 15
                     result['warning'] = 'Múltiplos redirecionamentos'
                 
                 # Redirecionamento para domínio diferente
                 original_domain = urlparse(url).netloc
-                final_domain = urlparse(response.url).netloc
+                final_domain = urlparse(info['final_url']).netloc
                 
                 if original_domain != final_domain:
                     result['risk_score'] += 10
@@ -5,20 +5,34 @@ Nota A - TecHacker
 
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+import asyncio
+import atexit
 import logging
 from datetime import datetime
 import os
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 
 # Importar módulos de análise
 from analyzers.url_analyzer import URLAnalyzer
-from analyzers.ml_classifier import MLClassifier
+from analyzers.ml_classifier import MLClassifier, FEATURE_COLUMNS
+from analyzers.lexical_model import LexicalURLClassifier
+from analyzers.kit_fingerprint import KitFingerprintIndex
+from analyzers.model_store import ModelArtifactError
 from analyzers.content_analyzer import ContentAnalyzer
+from analyzers.cpu_pool import default_cpu_pool
 from analyzers.geolocation_analyzer import GeolocationAnalyzer
-from analyzers.oauth_analyzer import OAuthAnalyzer
+from analyzers.net_engine import default_net_engine
 from analyzers.email_blacklist_analyzer import EmailBlacklistAnalyzer
-from analyzers.screenshot_analyzer import ScreenshotAnalyzer
+from analyzers.favicon_hashes import FaviconAnalyzer
+from analyzers.screenshot_store import default_screenshot_store
+from analyzers.screenshot_workers import (
+    PRIORITY_BATCH, PRIORITY_INTERACTIVE, ScreenshotQueueFull, ScreenshotTimeout, ScreenshotWorkerError,
+    default_screenshot_workers
+)
 from database.history import URLHistory
+from database.feedback import FeedbackStore
+from database.kit_observations import HIGH_RISK_CLASSIFICATIONS, KitObservationLog
+from training.feedback import FeedbackTrainer, feedback_features
 
 # Configuração da aplicação
 app = Flask(__name__)
@@ -33,15 +47,56 @@ os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Inicializar componentes
-url_analyzer = URLAnalyzer()
-ml_classifier = MLClassifier()
-content_analyzer = ContentAnalyzer()
-geolocation_analyzer = GeolocationAnalyzer()
-oauth_analyzer = OAuthAnalyzer()
-email_blacklist_analyzer = EmailBlacklistAnalyzer()
-screenshot_analyzer = ScreenshotAnalyzer()
-history = URLHistory()
+# Limite de URLs por requisição em /api/analyze/batch
+MAX_BATCH_URLS = 100
+# Análises completas simultâneas dentro de um lote
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 16))
+# Tempo máximo do screenshot (segundos)
+SCREENSHOT_TIMEOUT = 12
+# Servidor de desenvolvimento em modo debug (com reloader)
+DEBUG = os.environ.get('FLASK_DEBUG', '1') != '0'
+
+# Com o reloader do Werkzeug, `python app.py` vira um processo pai que só vigia
+# os arquivos e reinicia o filho (WERKZEUG_RUN_MAIN=true), o único que atende
+_RELOADER_PARENT = __name__ == '__main__' and DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+# Workers dos pools (forkserver/spawn) reexecutam este script como __mp_main__:
+# lá, e no pai do reloader, não se criam componentes, processos nem threads de fundo
+if __name__ != '__mp_main__' and not _RELOADER_PARENT:
+    # Inicializar componentes
+    net_engine = default_net_engine()    # E/S de rede assíncrona (um event loop para todas as análises)
+    cpu_pool = default_cpu_pool()        # parse de HTML, hash de screenshot e inferência (processos)
+    url_analyzer = URLAnalyzer(net_engine=net_engine)
+    ml_classifier = MLClassifier(cpu_pool=cpu_pool)
+    lexical_classifier = LexicalURLClassifier()
+    kit_index = KitFingerprintIndex()
+    content_analyzer = ContentAnalyzer(net_engine=net_engine, cpu_pool=cpu_pool)
+    geolocation_analyzer = GeolocationAnalyzer(net_engine=net_engine)
+    email_blacklist_analyzer = EmailBlacklistAnalyzer(net_engine=net_engine)
+    favicon_analyzer = FaviconAnalyzer(net_engine=net_engine, cpu_pool=cpu_pool)
+    # Selenium é bloqueante e pode travar: screenshots rodam em processos supervisionados
+    screenshot_workers = default_screenshot_workers()
+    screenshot_store = default_screenshot_store()     # capturas por conteúdo (gravadas pelos workers)
+    history = URLHistory()
+    feedback_store = FeedbackStore()
+    kit_observations = KitObservationLog()
+
+    # Workers do pool de CPU sobem já com o modelo carregado (antes das threads de fundo)
+    cpu_pool.warm()
+
+    # Workers de screenshot aquecem o navegador em segundo plano (fora do caminho da requisição)
+    screenshot_workers.start()
+    atexit.register(screenshot_workers.close)
+
+    # Retreino em segundo plano com o feedback dos analistas
+    feedback_trainer = FeedbackTrainer(
+        ml_classifier,
+        feedback_store,
+        interval=int(os.environ.get('FEEDBACK_RETRAIN_INTERVAL', 300)),
+        min_new_labels=int(os.environ.get('FEEDBACK_MIN_LABELS', 10))
+    )
+    if os.environ.get('FEEDBACK_TRAINER', '1') != '0':
+        feedback_trainer.start()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -55,7 +110,316 @@ def health_check():
 @app.route('/static/screenshots/<path:filename>')
 def serve_screenshot(filename):
     """Servir screenshots capturados"""
-    return send_from_directory(SCREENSHOTS_DIR, filename)
+    response = send_from_directory(SCREENSHOTS_DIR, filename)
+    # Acesso conta para a remoção por LRU
+    screenshot_store.touch(filename)
+    return response
+
+@app.route('/api/screenshot', methods=['GET'])
+def get_screenshot():
+    """Captura mais recente de uma URL (índice URL -> imagem)"""
+    url = request.args.get('url', '')
+    if not url:
+        return jsonify({'error': 'URL não fornecida'}), 400
+    entry = screenshot_store.lookup(url)
+    if entry is None:
+        return jsonify({'error': 'Nenhuma captura para esta URL'}), 404
+    return jsonify(dict(entry, url=url))
+
+def run_analysis(url):
+    """
+    Executar a análise completa de uma URL e salvar no histórico
+    (invólucro síncrono: a análise roda no loop do motor de rede)
+    """
+    return net_engine.run(run_analysis_async(url))
+
+async def run_analysis_async(url, priority=PRIORITY_INTERACTIVE):
+    """
+    Executar a análise completa de uma URL e salvar no histórico
+    A espera de rede não ocupa threads: várias análises podem estar em voo
+    no mesmo loop. priority ordena o screenshot na fila dos workers (lotes
+    cedem a vez às análises interativas)
+    """
+    logger.info(f"Analisando URL: {url}")
+    
+    # 0. Veredito preliminar léxico (sem rede, dezenas de µs)
+    preliminary_verdict = lexical_classifier.score(url)
+    
+    # 1. Análise de Conteúdo (primeiro: a impressão digital da página pode encerrar a análise)
+    content_results = await content_analyzer.analyze_async(url)
+    # Documento já baixado: o navegador do screenshot renderiza essa mesma página
+    rendered_page = content_results.pop('page', None)
+    favicon_links = content_results.pop('favicon_links', None)
+    
+    # 2. Kit de phishing conhecido: veredito imediato, sem WHOIS/DNS/screenshot
+    kit_match = None
+    whitelisted = urlparse(url).netloc in url_analyzer.whitelist
+    if not whitelisted:
+        kit_match = kit_index.lookup(content_results.get('fingerprint'))
+    if kit_match:
+        result = kit_match_result(url, preliminary_verdict, content_results, kit_match)
+        await asyncio.to_thread(persist_result, result, 'kit_match')
+        return result
+    
+    # Favicon da marca: clone detectado com uma requisição pequena, sem abrir navegador
+    favicon_results = None
+    if not whitelisted:
+        favicon_results = await favicon_analyzer.analyze_async(url, favicon_links)
+    
+    # Screenshot começa já, em paralelo com as análises de rede
+    # (prazo de 12s desde a entrada na fila, garantido pelo supervisor: worker preso é morto)
+    screenshot_error = None
+    screenshot_future = None
+    if not (favicon_results and favicon_results['is_clone']):
+        try:
+            screenshot_future = asyncio.wrap_future(
+                screenshot_workers.submit(url, priority=priority, deadline=SCREENSHOT_TIMEOUT, page=rendered_page)
+            )
+        except ScreenshotQueueFull as e:
+            screenshot_error = e
+    
+    # 3. Análises Heurísticas, 4. Geolocalização e 6. Blacklist de Email (rede, em paralelo)
+    heuristic_results, geolocation_results, email_blacklist_results = await asyncio.gather(
+        url_analyzer.analyze_async(url),
+        geolocation_analyzer.analyze_async(url),
+        email_blacklist_analyzer.analyze_async(url)
+    )
+    
+    # 5. Análise de OAuth (detecção de páginas falsas)
+    # Feita no pool de CPU junto com a de conteúdo, sobre a mesma página parseada
+    oauth_results = content_results.pop('oauth', None)
+    if oauth_results is None:
+        oauth_results = {
+            'is_oauth_page': False,
+            'is_legitimate': True,
+            'provider': None,
+            'risk_score': 0,
+            'details': ['Não foi possível obter HTML para análise OAuth']
+        }
+    
+    # 7. Análise de Screenshot
+    screenshot_results = None
+    if screenshot_future is not None:
+        try:
+            screenshot_results = await screenshot_future
+        except Exception as e:
+            screenshot_error = e
+    if screenshot_error is not None:
+        logger.warning(f"Screenshot não capturado: {screenshot_error}")
+    
+    if favicon_results and favicon_results['is_clone']:
+        screenshot_results = favicon_clone_result(favicon_results)
+    elif not screenshot_results:
+        screenshot_results = {
+            'screenshot_captured': False,
+            'screenshot_path': None,
+            'visual_hash': None,
+            'is_clone': False,
+            'cloned_brand': None,
+            'similarity_score': 0,
+            'risk_score': 0,
+            'details': [screenshot_skip_detail(screenshot_error)],
+            'error': screenshot_error_label(screenshot_error),
+            'feature_available': False
+        }
+    
+    if favicon_results is not None:
+        screenshot_results['favicon'] = favicon_results
+    
+    # 8. Machine Learning Classification
+    ml_results = await ml_classifier.classify_async(url, heuristic_results, content_results)
+    
+    # 9. Calcular score final de risco (0-100)
+    risk_score = calculate_risk_score(
+        heuristic_results, 
+        content_results, 
+        ml_results,
+        geolocation_results,
+        oauth_results,
+        email_blacklist_results,
+        screenshot_results
+    )
+    
+    # 5. Determinar classificação final
+    classification = classify_url(risk_score)
+    
+    # Compilar resultado completo
+    result = {
+        'url': url,
+        'timestamp': datetime.now().isoformat(),
+        'risk_score': risk_score,
+        'classification': classification,
+        'is_safe': risk_score < 40,
+        'preliminary_verdict': preliminary_verdict,
+        'kit_match': None,
+        'heuristic_analysis': heuristic_results,
+        'content_analysis': content_results,
+        'geolocation_analysis': geolocation_results,
+        'oauth_analysis': oauth_results,
+        'email_blacklist_analysis': email_blacklist_results,
+        'screenshot_analysis': screenshot_results,
+        'ml_prediction': ml_results,
+        'recommendations': generate_recommendations(
+            risk_score, 
+            heuristic_results, 
+            geolocation_results,
+            oauth_results,
+            email_blacklist_results,
+            screenshot_results
+        )
+    }
+    
+    # Salvar no histórico (e a impressão digital, se o veredito for de alto risco) fora do loop
+    await asyncio.to_thread(persist_result, result)
+    
+    logger.info(f"Análise concluída: {classification} (Score: {risk_score})")
+    
+    return result
+
+def screenshot_skip_detail(error):
+    """Motivo do screenshot pulado, para os detalhes da análise"""
+    if isinstance(error, ScreenshotQueueFull):
+        return '⚡ Fila de screenshots cheia - análise pulada'
+    if isinstance(error, ScreenshotTimeout):
+        return f'⚡ Screenshot timeout (>{SCREENSHOT_TIMEOUT}s) - análise pulada'
+    return '⚡ Screenshot indisponível - análise pulada'
+
+def screenshot_error_label(error):
+    """Rótulo curto do erro de screenshot (campo 'error' do resultado)"""
+    if isinstance(error, ScreenshotQueueFull):
+        return 'Queue full'
+    if isinstance(error, ScreenshotTimeout):
+        return 'Timeout'
+    if isinstance(error, ScreenshotWorkerError):
+        return 'Worker crashed'
+    if error is None:
+        return 'Unavailable'
+    return type(error).__name__
+
+def favicon_clone_result(favicon_results):
+    """
+    Resultado de screenshot para favicon de marca em domínio de terceiros
+    O navegador não chega a ser aberto: o veredito de clone vem do ícone
+    """
+    match = favicon_results['match']
+    label = 'idêntico' if match['match'] == 'exact' else 'quase idêntico'
+    return {
+        'screenshot_captured': False,
+        'screenshot_path': None,
+        'visual_hash': None,
+        'is_clone': True,
+        'cloned_brand': favicon_results['cloned_brand'],
+        'similarity_score': favicon_results['similarity_score'],
+        'risk_score': min(100, 50 + favicon_results['similarity_score'] / 2),
+        'skipped': True,
+        'details': [
+            f"🚨 CLONE DETECTADO: favicon {label} ao de {favicon_results['cloned_brand'].upper()}",
+            '⚡ Veredito pelo favicon - screenshot pulado'
+        ],
+        'error': None,
+        'feature_available': True
+    }
+
+def kit_match_result(url, preliminary_verdict, content_results, kit_match):
+    """
+    Resultado para página de kit de phishing conhecido
+    Os estágios lentos (heurísticas com WHOIS/DNS, geolocalização, blacklists,
+    screenshot) não são executados
+    """
+    content_results.pop('oauth', None)
+    skipped_details = ['⚡ Kit de phishing conhecido - análise pulada']
+    
+    risk_score = max(kit_match['risk_score'], content_results.get('risk_score', 0))
+    classification = classify_url(risk_score)
+    
+    heuristic_results = {'url': url, 'risk_score': 0, 'checks': {}, 'skipped': True}
+    geolocation_results = {'risk_score': 0, 'skipped': True, 'details': skipped_details}
+    oauth_results = {
+        'is_oauth_page': False,
+        'is_legitimate': True,
+        'provider': None,
+        'risk_score': 0,
+        'skipped': True,
+        'details': skipped_details
+    }
+    email_blacklist_results = {'risk_score': 0, 'skipped': True, 'details': skipped_details}
+    screenshot_results = {
+        'screenshot_captured': False,
+        'screenshot_path': None,
+        'is_clone': False,
+        'cloned_brand': None,
+        'similarity_score': 0,
+        'risk_score': 0,
+        'skipped': True,
+        'details': skipped_details
+    }
+    
+    match_label = 'idêntica' if kit_match['match'] == 'exact' else 'quase idêntica'
+    recommendations = [
+        f"🚨 KIT DE PHISHING CONHECIDO: estrutura {match_label} a páginas de phishing "
+        f"vistas em {kit_match['domains']} domínio(s)."
+    ] + generate_recommendations(
+        risk_score,
+        heuristic_results,
+        geolocation_results,
+        oauth_results,
+        email_blacklist_results,
+        screenshot_results
+    )
+    
+    result = {
+        'url': url,
+        'timestamp': datetime.now().isoformat(),
+        'risk_score': risk_score,
+        'classification': classification,
+        'is_safe': False,
+        'preliminary_verdict': preliminary_verdict,
+        'kit_match': kit_match,
+        'heuristic_analysis': heuristic_results,
+        'content_analysis': content_results,
+        'geolocation_analysis': geolocation_results,
+        'oauth_analysis': oauth_results,
+        'email_blacklist_analysis': email_blacklist_results,
+        'screenshot_analysis': screenshot_results,
+        # Sem heurísticas não há idade do domínio: usar a probabilidade do modelo léxico
+        # (sem modelo léxico publicado, o score do próprio kit)
+        'ml_prediction': kit_ml_prediction(preliminary_verdict, kit_match),
+        'recommendations': recommendations
+    }
+    
+    logger.warning(f"Kit de phishing conhecido ({kit_match['match']}, distância {kit_match['distance']}): {url}")
+    
+    return result
+
+def kit_ml_prediction(preliminary_verdict, kit_match):
+    """Predição usada no resultado de kit conhecido (modelo léxico ou, sem ele, o kit)"""
+    probability = preliminary_verdict['phishing_probability']
+    source = 'lexical'
+    if probability is None:
+        probability = kit_match['risk_score'] / 100
+        source = 'kit_match'
+    return {
+        'phishing_probability': probability,
+        'confidence': max(probability, 1 - probability),
+        'top_contributing_features': [],
+        'model_version': preliminary_verdict['model_version'],
+        'source': source
+    }
+
+def persist_result(result, source='verdict'):
+    """
+    Gravar o resultado no histórico e no registro de kits
+    E/S de disco (o histórico reescreve o arquivo inteiro): roda numa thread via
+    asyncio.to_thread para não travar as outras análises no loop do NetEngine
+    """
+    history.add_entry(result)
+    record_kit_observation(result, source)
+
+def record_kit_observation(result, source='verdict'):
+    """Registrar a impressão digital de páginas de alto risco (fonte do índice de kits)"""
+    fingerprint = result['content_analysis'].get('fingerprint')
+    if fingerprint and result['classification'] in HIGH_RISK_CLASSIFICATIONS:
+        kit_observations.append(result['url'], fingerprint, result['classification'], result['risk_score'], source)
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_url():
@@ -69,120 +433,93 @@ def analyze_url():
         if not url:
             return jsonify({'error': 'URL não fornecida'}), 400
         
-        logger.info(f"Analisando URL: {url}")
-        
-        # 1. Análises Heurísticas
-        heuristic_results = url_analyzer.analyze(url)
-        
-        # 2. Análise de Conteúdo
-        content_results = content_analyzer.analyze(url)
-        
-        # 3. Análise de Geolocalização
-        geolocation_results = geolocation_analyzer.analyze(url)
-        
-        # 4. Análise de OAuth (detecção de páginas falsas)
-        # Criar BeautifulSoup object do HTML
-        html_content = content_results.get('html', '')
-        if html_content:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            oauth_results = oauth_analyzer.analyze(soup, url)
-        else:
-            oauth_results = {
-                'is_oauth_page': False,
-                'is_legitimate': True,
-                'provider': None,
-                'risk_score': 0,
-                'details': ['Não foi possível obter HTML para análise OAuth']
-            }
-        
-        # 5. Análise de Blacklist de Email
-        email_blacklist_results = email_blacklist_analyzer.analyze(url)
+        return jsonify(run_analysis(url))
         
-        # 6. Análise de Screenshot - COM TIMEOUT AGRESSIVO
-        from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
-        
-        def run_screenshot():
-            try:
-                return screenshot_analyzer.analyze(url)
-            except Exception as e:
-                logger.error(f"Erro screenshot: {e}")
-                return None
-        
-        screenshot_results = None
-        try:
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(run_screenshot)
-                screenshot_results = future.result(timeout=12)  # 12 segundos MAX
-        except (FutureTimeoutError, Exception) as e:
-            logger.warning(f"Screenshot timeout ou erro: {e}")
-            screenshot_results = None
-        
-        if not screenshot_results:
-            screenshot_results = {
-                'screenshot_captured': False,
-                'screenshot_path': None,
-                'visual_hash': None,
-                'is_clone': False,
-                'cloned_brand': None,
-                'similarity_score': 0,
-                'risk_score': 0,
-                'details': ['⚡ Screenshot timeout (>12s) - análise pulada'],
-                'error': 'Timeout',
-                'feature_available': False
-            }
-        
-        # 7. Machine Learning Classification
-        ml_results = ml_classifier.classify(url, heuristic_results, content_results)
-        
-        # 8. Calcular score final de risco (0-100)
-        risk_score = calculate_risk_score(
-            heuristic_results, 
-            content_results, 
-            ml_results,
-            geolocation_results,
-            oauth_results,
-            email_blacklist_results,
-            screenshot_results
-        )
-        
-        # 5. Determinar classificação final
-        classification = classify_url(risk_score)
-        
-        # Compilar resultado completo
-        result = {
-            'url': url,
-            'timestamp': datetime.now().isoformat(),
-            'risk_score': risk_score,
-            'classification': classification,
-            'is_safe': risk_score < 40,
-            'heuristic_analysis': heuristic_results,
-            'content_analysis': content_results,
-            'geolocation_analysis': geolocation_results,
-            'oauth_analysis': oauth_results,
-            'email_blacklist_analysis': email_blacklist_results,
-            'screenshot_analysis': screenshot_results,
-            'ml_prediction': ml_results,
-            'recommendations': generate_recommendations(
-                risk_score, 
-                heuristic_results, 
-                geolocation_results,
-                oauth_results,
-                email_blacklist_results,
-                screenshot_results
-            )
-        }
+    except Exception as e:
+        logger.error(f"Erro na análise: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analyze/quick', methods=['POST'])
+def analyze_url_quick():
+    """
+    Veredito preliminar instantâneo (apenas a string da URL, sem rede)
+    """
+    try:
+        data = request.get_json()
+        url = data.get('url')
         
-        # Salvar no histórico
-        history.add_entry(result)
+        if not url:
+            return jsonify({'error': 'URL não fornecida'}), 400
         
-        logger.info(f"Análise concluída: {classification} (Score: {risk_score})")
+        return jsonify({'url': url, **lexical_classifier.score(url)})
         
-        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Erro na análise rápida: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Análise em lote com filtro de primeiro estágio opcional
+    Com first_stage_filter (desligado por padrão), URLs com veredito
+    preliminar LIKELY_SAFE não passam pela análise completa (WHOIS, DNS,
+    conteúdo, screenshot). Só é aceito com um modelo léxico treinado em URLs
+    rotuladas reais: descartar por um modelo sintético esconde phishing real
+    """
+    try:
+        data = request.get_json()
+        urls = data.get('urls') or []
+        first_stage_filter = bool(data.get('first_stage_filter', False))
+        
+        if not urls:
+            return jsonify({'error': 'URLs não fornecidas'}), 400
+        if len(urls) > MAX_BATCH_URLS:
+            return jsonify({'error': f'Máximo de {MAX_BATCH_URLS} URLs por lote'}), 400
+        if first_stage_filter and not lexical_classifier.trained_on_labeled_data:
+            return jsonify({
+                'error': 'first_stage_filter exige um modelo léxico treinado em URLs rotuladas '
+                         '(python -m training.lexical <arquivo> --activate)'
+            }), 400
+        
+        results, skipped = net_engine.run(analyze_batch_async(urls, first_stage_filter))
+        
+        return jsonify({
+            'results': results,
+            'total': len(urls),
+            'skipped_by_first_stage': skipped
+        })
         
     except Exception as e:
-        logger.error(f"Erro na análise: {str(e)}", exc_info=True)
+        logger.error(f"Erro na análise em lote: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+async def analyze_batch_async(urls, first_stage_filter):
+    """
+    Análises completas do lote em paralelo (até BATCH_CONCURRENCY ao mesmo tempo)
+    
+    Returns:
+        (resultados na ordem das URLs, quantidade pulada pelo filtro de primeiro estágio)
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    skipped = 0
+    
+    async def analyze_one(url):
+        nonlocal skipped
+        preliminary = lexical_classifier.score(url)
+        if first_stage_filter and preliminary['verdict'] == 'LIKELY_SAFE':
+            skipped += 1
+            return {'url': url, 'full_analysis': False, 'preliminary_verdict': preliminary}
+        
+        async with semaphore:
+            try:
+                return dict(await run_analysis_async(url, priority=PRIORITY_BATCH), full_analysis=True)
+            except Exception as e:
+                logger.error(f"Erro na análise de {url}: {str(e)}")
+                return {'url': url, 'full_analysis': False, 'preliminary_verdict': preliminary, 'error': str(e)}
+    
+    results = await asyncio.gather(*(analyze_one(url) for url in urls))
+    return results, skipped
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
     """Obter histórico de URLs analisadas"""
@@ -217,6 +554,23 @@ def get_statistics():
         logger.error(f"Erro ao obter estatísticas: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas operacionais do servidor"""
+    try:
+        return jsonify({
+            'timestamp': datetime.now().isoformat(),
+            'net_engine': net_engine.stats(),
+            'cpu_pool': cpu_pool.stats(),
+            'screenshot_workers': screenshot_workers.stats(),
+            'screenshot_store': screenshot_store.stats(),
+            'favicon': favicon_analyzer.stats(),
+            'dnsbl': email_blacklist_analyzer.stats()
+        })
+    except Exception as e:
+        logger.error(f"Erro ao obter métricas: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/whitelist', methods=['GET', 'POST', 'DELETE'])
 def manage_whitelist():
     """Gerenciar lista de sites confiáveis"""
@@ -241,6 +595,95 @@ def manage_whitelist():
         logger.error(f"Erro ao gerenciar whitelist: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/model', methods=['GET'])
+def get_model_info():
+    """Informações do modelo de ML em uso"""
+    try:
+        return jsonify(ml_classifier.get_model_info())
+    except Exception as e:
+        logger.error(f"Erro ao obter informações do modelo: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/model/activate', methods=['POST'])
+def activate_model():
+    """Trocar a versão do modelo em uso sem reiniciar o servidor"""
+    try:
+        data = request.get_json()
+        version = data.get('version')
+        
+        if not version:
+            return jsonify({'error': 'Versão não fornecida'}), 400
+        
+        info = ml_classifier.activate_version(version)
+        logger.info(f"Modelo {version} ativado")
+        return jsonify({'success': True, 'model': info})
+    except ModelArtifactError as e:
+        logger.error(f"Versão de modelo rejeitada: {str(e)}")
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"Erro ao ativar modelo: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback', methods=['GET', 'POST'])
+def manage_feedback():
+    """Confirmar ou corrigir vereditos do histórico (rótulos para o retreino)"""
+    try:
+        if request.method == 'GET':
+            limit = request.args.get('limit', 50, type=int)
+            return jsonify({
+                'feedback': feedback_store.get_recent(limit),
+                'statistics': feedback_store.get_statistics(),
+                'trainer': feedback_trainer.status()
+            })
+        
+        data = request.get_json()
+        label = data.get('label')
+        history_id = data.get('history_id')
+        
+        if label not in ('phishing', 'legitimate'):
+            return jsonify({'error': "Rótulo deve ser 'phishing' ou 'legitimate'"}), 400
+        
+        if history_id is not None:
+            entry = history.get_entry(history_id)
+            if not entry:
+                return jsonify({'error': f'Entrada {history_id} não encontrada no histórico'}), 404
+            history_id = entry['id']
+            url = entry['url']
+            features = entry.get('ml_features')
+            original_classification = entry['classification']
+        else:
+            url = data.get('url')
+            features = None
+            original_classification = None
+            if not url:
+                return jsonify({'error': 'Informe history_id ou url'}), 400
+        
+        feedback = feedback_store.append(
+            url,
+            label,
+            dict(zip(FEATURE_COLUMNS, feedback_features(url, features))),
+            original_classification=original_classification,
+            history_id=history_id,
+            analyst=data.get('analyst'),
+            notes=data.get('notes')
+        )
+        
+        if feedback_trainer.pending_labels() >= feedback_trainer.min_new_labels:
+            feedback_trainer.trigger()
+        
+        logger.info(f"Feedback registrado para {url}: {label}")
+        return jsonify({'success': True, 'feedback': feedback, 'trainer': feedback_trainer.status()})
+    except Exception as e:
+        logger.error(f"Erro ao registrar feedback: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/retrain', methods=['POST'])
+def retrain_with_feedback():
+    """Agendar retreino imediato com o feedback acumulado (não bloqueia a requisição)"""
+    feedback_trainer.start()
+    feedback_trainer.trigger(force=True)
+    return jsonify({'success': True, 'trainer': feedback_trainer.status()}), 202
+
 def calculate_risk_score(heuristic, content, ml, geolocation, oauth, email_blacklist, screenshot):
     """
     Calcular score de risco combinado (0-100)
@@ -411,4 +854,4 @@ def generate_recommendations(risk_score, heuristic_results, geolocation_results,
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    app.run(host='0.0.0.0', port=port, debug=DEBUG)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: detecção de ativos de marca (BrandCatalog) vs laço marca x imagem
+Gera catálogos sintéticos de tamanhos crescentes (as marcas reais de
+data/rules/brands.json mais marcas aleatórias) e uma página com centenas de
+referências de ativos; mede o tempo de casamento do catálogo inteiro e de
+um laço com teste de substring por marca, conferindo que as marcas
+encontradas são as mesmas
+
+Uso (a partir de backend/):
+    python benchmarks/bench_brand_catalog.py
+    python benchmarks/bench_brand_catalog.py --brands 40 1000 5000 --refs 500
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers.brand_catalog import BrandCatalog, collect_asset_refs, load_catalog
+from analyzers.content_analyzer import ContentAnalyzer
+from analyzers.page_document import PageDocument
+
+# Página legítima com widgets de marcas (fontes, reCAPTCHA, pixel): nenhuma marca detectada
+BENIGN_PAGE = (
+    'https://mybakery.com.br/',
+    """<html><head>
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Roboto&display=swap">
+    <link rel="canonical" href="https://mybakery.com.br/">
+    <link rel="icon" href="/favicon.ico">
+    <style>@import url('https://fonts.googleapis.com/css2?family=Lobster');</style>
+    <script src="https://www.google.com/recaptcha/api.js" async defer></script>
+    <script src="https://www.googletagmanager.com/gtag/js?id=G-XXXX"></script>
+    <script>!function(f,b,e,v,n,t,s){t=b.createElement(e);t.src='https://connect.facebook.net/en_US/fbevents.js'}
+    (window,document,'script');</script>
+    </head><body>
+    <noscript><img height="1" width="1" style="display:none" src="https://www.facebook.com/tr?id=123&ev=PageView&noscript=1"></noscript>
+    <h1>Pães e bolos</h1><img src="/img/bolo.jpg" alt="Bolo de cenoura">
+    <form action="/contato"><input name="email"><div class="g-recaptcha" data-sitekey="x"></div></form>
+    </body></html>"""
+)
+
+
+def synthetic_catalog(n, rs):
+    catalog = load_catalog()
+    while len(catalog) < n:
+        name = ''.join(rs.choice(string.ascii_lowercase) for _ in range(rs.randint(6, 12)))
+        catalog.append({'brand': name, 'aliases': [name, name + 'cdn'], 'domains': [name + '.com']})
+    return catalog[:n]
+
+
+def build_page(n_refs, catalog, rs):
+    """Página com imagens, ícones, CSS e scripts; ~5% das referências citam uma marca"""
+    names = [''.join(rs.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(200)]
+    parts = []
+    for i in range(n_refs):
+        name = rs.choice(names)
+        if rs.random() < 0.05:
+            name = f"{rs.choice(catalog)['aliases'][0]}-{name}"
+        kind = i % 4
+        if kind == 0:
+            parts.append(f'<img src="/static/img/{name}.png" alt="{rs.choice(names)}">')
+        elif kind == 1:
+            parts.append(f'<div style="background-image: url(\'/assets/{name}.jpg\')"></div>')
+        elif kind == 2:
+            parts.append(f'<link rel="icon" href="/{name}.ico">')
+        else:
+            parts.append(f'<script src="https://cdn.example.net/{name}.js"></script>')
+    return BeautifulSoup('<html><body>' + ''.join(parts) + '</body></html>', 'html.parser')
+
+
+def check_benign_page():
+    """Regressão: widgets de marca em site legítimo não são ativos de marca"""
+    url, html = BENIGN_PAGE
+    result = ContentAnalyzer().detect_brand_logos(PageDocument(url, html))
+    assert result['brands_detected'] == [], f"falso positivo: {result['assets']}"
+    assert result['risk_score'] == 0
+
+
+def baseline_match(refs, catalog):
+    """Laço anterior, estendido a todas as referências: teste de substring por marca"""
+    found = set()
+    for _, value in refs:
+        value = value.lower()
+        for entry in catalog:
+            if any(alias in value for alias in entry['aliases'] if len(alias) >= 4):
+                found.add(entry['brand'])
+    return found
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--brands', type=int, nargs='+', default=[40, 1000, 5000])
+    parser.add_argument('--refs', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    check_benign_page()
+
+    rs = random.Random(42)
+    print(f"{'Marcas':>7} {'Refs':>6} {'Coleta':>9} {'Laço':>10} {'Catálogo':>10} {'Ganho':>7}")
+
+    for n in args.brands:
+        catalog = synthetic_catalog(n, rs)
+        soup = build_page(args.refs, catalog, rs)
+        matcher = BrandCatalog(catalog)
+
+        collect_ms, refs = timed(lambda: collect_asset_refs(soup), args.repeat)
+        baseline_ms, expected = timed(lambda: baseline_match(refs, catalog), args.repeat)
+        catalog_ms, found = timed(lambda: matcher.match_refs(refs), args.repeat)
+
+        found = {brand for brand, _ in found}
+        assert expected <= found, f'marcas perdidas: {expected - found}'
+        print(f"{n:>7,} {len(refs):>6} {collect_ms:>7.2f}ms {baseline_ms:>8.2f}ms {catalog_ms:>8.2f}ms "
+              f"{baseline_ms / catalog_ms:>6.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark: verificações de DOM com find_all por verificação vs DomVisitor
+Gera páginas sintéticas (formulários, inputs, scripts, iframes, links,
+botões de login social, elementos ocultos, ativos) e extrai os mesmos fatos
+de duas formas: as chamadas soup.find_all/find/get_text que o
+ContentAnalyzer e o OAuthAnalyzer faziam, e uma única passada do
+DomVisitor. Conta as travessias de árvore (gerações de .descendants do
+documento inteiro e de subárvores) e o tempo de CPU por página,
+conferindo que os fatos extraídos são os mesmos
+
+Uso (a partir de backend/):
+    python benchmarks/bench_dom_visitor.py
+    python benchmarks/bench_dom_visitor.py --elements 500 5000 50000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers import content_analyzer, oauth_analyzer  # noqa: F401 (registram as regras)
+from analyzers.brand_catalog import collect_asset_refs
+from analyzers.dom_visitor import default_visitor
+from analyzers.kit_fingerprint import dom_tokens
+
+_descendants = Tag.descendants
+
+
+class TraversalCounter:
+    """Conta as travessias (Tag.descendants) do documento inteiro e de subárvores"""
+
+    def __init__(self, root):
+        self.root = root
+        self.document = 0
+        self.subtree = 0
+
+    def __enter__(self):
+        counter = self
+
+        def descendants(tag):
+            if tag is counter.root:
+                counter.document += 1
+            else:
+                counter.subtree += 1
+            return _descendants.fget(tag)
+
+        Tag.descendants = property(descendants)
+        return self
+
+    def __exit__(self, *exc):
+        Tag.descendants = _descendants
+
+
+def build_page(n_elements, rs):
+    words = [''.join(rs.choice(string.ascii_lowercase) for _ in range(rs.randint(3, 9))) for _ in range(300)]
+    parts = ['<html><head><meta name="keywords" content="a,b,c"><title>Login</title></head><body>']
+    for i in range(n_elements // 10):
+        kind = i % 10
+        text = ' '.join(rs.choice(words) for _ in range(6))
+        if kind == 0:
+            parts.append(
+                '<form action="/login" method="post"><p>Entre na sua conta</p>'
+                '<input name="email" type="text"><input name="senha" type="password">'
+                f'<input type="hidden" name="state" value="{i}"><button>Entrar</button></form>'
+            )
+        elif kind == 1:
+            parts.append(f'<script>var t{i} = setInterval(function(){{ countdown({i}); }}, 1000);</script>')
+        elif kind == 2:
+            parts.append(f'<iframe src="/frame{i}" style="display:none"></iframe>')
+        elif kind == 3:
+            parts.append(f'<a href="/oauth/authorize?scope=email&i={i}">Continue with Google</a>')
+        elif kind == 4:
+            parts.append(f'<div style="visibility: hidden"><span>{text}</span></div>')
+        elif kind == 5:
+            parts.append(f'<img src="/static/{rs.choice(words)}-logo.png" alt="{text}">')
+        elif kind == 6:
+            parts.append(f'<button class="btn">Sign in with {rs.choice(words)}</button>')
+        else:
+            parts.append(f'<div class="row"><p>{text}</p><a href="/p/{i}">{rs.choice(words)}</a></div>')
+    parts.append('</body></html>')
+    return BeautifulSoup(''.join(parts), 'html.parser')
+
+
+SOCIAL_PATTERNS = [r'sign\s+in\s+with', r'login\s+with', r'continue\s+with', r'connect\s+with', r'authorize\s+with']
+
+
+def legacy_facts(soup):
+    """As chamadas de antes, uma (ou mais) travessia por verificação"""
+    forms = []
+    for form in soup.find_all('form'):
+        passwords = form.find_all('input', {'type': 'password'})
+        names = [input_tag.get('name', '') for input_tag in form.find_all('input')]
+        forms.append((len(passwords), names))
+
+    social = 0
+    for pattern in SOCIAL_PATTERNS:
+        social += len(soup.find_all(['button', 'a'], string=re.compile(pattern, re.I)))
+
+    return {
+        'text': soup.get_text(),
+        'dom_tokens': dom_tokens(soup),
+        'asset_refs': collect_asset_refs(soup),
+        'forms': forms,
+        'scripts': len(soup.find_all('script')),
+        'iframes': [iframe.get('style', '') for iframe in soup.find_all('iframe')],
+        'meta_keywords': soup.find('meta', {'name': 'keywords'}),
+        'hidden': len(soup.find_all(style=re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden'))),
+        'links': [link.get('href', '') for link in soup.find_all('a')],
+        'social_buttons': social,
+        'consent_text': [form.get_text() for form in soup.find_all('form')],
+        'oauth_inputs': len(soup.find_all('input', attrs={
+            'name': re.compile(r'(client_id|redirect_uri|response_type|scope|state)', re.I)
+        })),
+        'password_inputs': len(soup.find_all('input', attrs={'type': 'password'})),
+    }
+
+
+def visitor_facts(soup):
+    """Os mesmos fatos a partir de uma única passada do DomVisitor"""
+    dom = default_visitor().walk(soup)
+    forms = dom['forms']
+    inputs = dom['inputs']
+    facts = {
+        'text': dom.text,
+        'dom_tokens': dom['dom_tokens'],
+        'asset_refs': dom['asset_refs'],
+        'forms': [
+            (sum(1 for tag in tags if tag.get('type') == 'password'), [tag.get('name', '') for tag in tags])
+            for _, tags in forms
+        ],
+        'scripts': len(dom['scripts']),
+        'iframes': [iframe.get('style', '') for iframe in dom['iframes']],
+        'meta_keywords': dom['meta_keywords'],
+        'hidden': dom['hidden_elements'],
+        'links': [link.get('href', '') for link in dom['links']],
+        'social_buttons': len(dom['social_buttons']),
+        # get_text() por formulário continua (subárvore, só no OAuth)
+        'consent_text': [form.get_text() for form, _ in forms],
+        'oauth_inputs': sum(1 for tag in inputs if oauth_analyzer.OAUTH_INPUT_PATTERN.search(tag.get('name') or '')),
+        'password_inputs': sum(1 for tag in inputs if tag.get('type') == 'password'),
+    }
+    return facts, dom
+
+
+def cpu_ms(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rs = random.Random(42)
+    print(f"{'Elementos':>10} {'Nós':>8} {'Travessias antes':>17} {'Travessias depois':>18} "
+          f"{'CPU antes':>11} {'CPU depois':>11} {'Ganho':>7}")
+    print(f"{'':>20} {'(doc + subárvores)':>17} {'(doc + subárvores)':>18}")
+
+    for n in args.elements:
+        soup = build_page(n, rs)
+
+        with TraversalCounter(soup) as before:
+            expected = legacy_facts(soup)
+        with TraversalCounter(soup) as after:
+            got, dom = visitor_facts(soup)
+        assert expected == got, [key for key in expected if expected[key] != got[key]]
+
+        before_ms = cpu_ms(lambda: legacy_facts(soup), args.repeat)
+        after_ms = cpu_ms(lambda: visitor_facts(soup), args.repeat)
+        print(f"{n:>10,} {dom.nodes:>8,} {f'{before.document} + {before.subtree}':>17} "
+              f"{f'{after.document} + {after.subtree}':>18} "
+              f"{before_ms:>8.1f} ms {after_ms:>8.1f} ms {before_ms / after_ms:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
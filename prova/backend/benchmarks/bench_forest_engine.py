@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: motor compilado (CompiledForest) vs RandomForestClassifier.predict_proba
+Mede a latência de uma única URL e de lotes, e confere que as probabilidades são idênticas
+
+Uso (a partir de backend/):
+    python benchmarks/bench_forest_engine.py
+    python benchmarks/bench_forest_engine.py --synthetic 20000   # árvores profundas
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers.inference_engine import CompiledForest
+from analyzers.ml_classifier import FEATURE_COLUMNS
+
+
+def load_data(synthetic_rows):
+    """Dataset local ou dataset sintético ruidoso (gera árvores com profundidade máxima)"""
+    if synthetic_rows:
+        rs = np.random.RandomState(42)
+        X = rs.normal(size=(synthetic_rows, len(FEATURE_COLUMNS)))
+        y = (X[:, 0] + X[:, 1] * X[:, 2] + rs.normal(size=synthetic_rows) > 0).astype(int)
+        return X, y
+
+    df = pd.read_csv('data/phishing_dataset.csv')
+    return df[FEATURE_COLUMNS].values.astype(np.float64), df['is_phishing'].values
+
+
+def timeit(fn, repeat):
+    """Latência média em microssegundos"""
+    fn()  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, default=0, help='usar N linhas sintéticas ruidosas')
+    parser.add_argument('--batch', type=int, default=1000, help='tamanho do lote')
+    parser.add_argument('--repeat', type=int, default=200, help='repetições por medida')
+    args = parser.parse_args()
+
+    X, y = load_data(args.synthetic)
+    X = (X - X.mean(axis=0)) / (X.std(axis=0) + 1e-12)
+
+    model = RandomForestClassifier(
+        n_estimators=200, max_depth=15, min_samples_split=4, min_samples_leaf=2,
+        max_features='sqrt', random_state=42, n_jobs=-1
+    ).fit(X, y)
+    engine = CompiledForest.from_sklearn(model)
+
+    rs = np.random.RandomState(0)
+    X_test = X[rs.randint(0, len(X), args.batch)] + rs.normal(0, 0.25, (args.batch, X.shape[1]))
+    row = X_test[:1]
+
+    expected = model.predict_proba(X_test)
+    got = engine.predict_proba(X_test)
+    identical = np.array_equal(expected, got)
+
+    print(f"🌲 Floresta: {engine.n_estimators} árvores, {engine.n_nodes:,} nós, "
+          f"profundidade {engine.max_depth}, {engine.nbytes / 1024:.0f} KiB")
+    print(f"🎯 Probabilidades idênticas ao sklearn: {'sim' if identical else 'NÃO'} "
+          f"(diferença máxima {np.abs(expected - got).max():.2e})")
+
+    slow_repeat = max(5, args.repeat // 10)
+    results = [
+        ('1 linha', 'sklearn predict_proba', timeit(lambda: model.predict_proba(row), slow_repeat)),
+        ('1 linha', 'CompiledForest', timeit(lambda: engine.predict_proba(row), args.repeat)),
+        (f'lote {args.batch}', 'sklearn predict_proba', timeit(lambda: model.predict_proba(X_test), slow_repeat)),
+        (f'lote {args.batch}', 'CompiledForest', timeit(lambda: engine.predict_proba(X_test), slow_repeat)),
+    ]
+
+    print(f"\n{'Caso':<12} {'Implementação':<24} {'Latência':>14}")
+    for case, name, micros in results:
+        print(f"{case:<12} {name:<24} {micros / 1000:>11.3f} ms")
+
+    speedup = results[0][2] / results[1][2]
+    print(f"\n⚡ Ganho em uma linha: {speedup:.1f}x")
+
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: consultas ao índice de kits de phishing (KitIndex)
+Monta índices com milhões de impressões digitais aleatórias, grava como
+artefato versionado, recarrega com memory-map (como o servidor) e mede a
+latência de consultas com acerto exato, quase-duplicata e sem acerto
+
+Uso (a partir de backend/):
+    python benchmarks/bench_kit_index.py
+    python benchmarks/bench_kit_index.py --entries 1000000 5000000 --queries 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers.kit_fingerprint import HAMMING_THRESHOLD, KitIndex
+from analyzers.model_store import ModelArtifactStore
+
+
+def random_uint64(rs, n):
+    return rs.randint(0, 2 ** 64, size=n, dtype=np.uint64)
+
+
+def flip_bits(value, rs, n_bits):
+    for bit in rs.choice(64, n_bits, replace=False):
+        value ^= 1 << int(bit)
+    return value
+
+
+def latency(index, queries):
+    """Mediana e p99 da latência em microssegundos"""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query)
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1e6
+    return float(np.median(samples)), float(np.percentile(samples, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, nargs='+', default=[1000000, 5000000])
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    rs = np.random.RandomState(42)
+    print(f"{'Entradas':>10} {'Build':>8} {'Tamanho':>9} {'exato (p50/p99)':>18} {'quase (p50/p99)':>18} {'sem acerto (p50/p99)':>21}")
+
+    for n in args.entries:
+        exact = random_uint64(rs, n)
+        simhashes = random_uint64(rs, n)
+
+        start = time.perf_counter()
+        index = KitIndex.build(exact, simhashes, np.ones(n))
+        build_seconds = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as root:
+            store = ModelArtifactStore(root)
+            store.publish(index, None, ['exact', 'simhash'])
+            served = store.load(verify=False).engine
+
+            picks = rs.randint(0, n, args.queries)
+            exact_queries = [
+                {'exact': f'{int(exact[i]):016x}', 'simhash': f'{int(simhashes[i]):016x}'} for i in picks
+            ]
+            near_queries = [
+                {'exact': f'{int(v):016x}', 'simhash': f'{flip_bits(int(simhashes[i]), rs, HAMMING_THRESHOLD):016x}'}
+                for i, v in zip(picks, random_uint64(rs, args.queries))
+            ]
+            miss_queries = [
+                {'exact': f'{int(a):016x}', 'simhash': f'{int(b):016x}'}
+                for a, b in zip(random_uint64(rs, args.queries), random_uint64(rs, args.queries))
+            ]
+
+            assert all(served.lookup(q)['match'] == 'exact' for q in exact_queries[:100])
+            assert all(served.lookup(q) is not None for q in near_queries[:100])
+
+            results = [latency(served, queries) for queries in (exact_queries, near_queries, miss_queries)]
+            print(
+                f"{n:>10,} {build_seconds:>7.1f}s {served.nbytes / 1024 / 1024:>6.0f} MB " +
+                ' '.join(f"{p50:>9.1f}/{p99:<6.1f}µs" for p50, p99 in results)
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: busca de vizinhos nos hashes de referência (ReferenceHashIndex)
+Monta bases com dezenas/centenas de milhares de capturas (hashes aleatórios
+de phash/dhash 256 bits e colorhash 48 bits), grava como artefato
+versionado, recarrega com memory-map (como o servidor) e mede a latência do
+top-k para screenshots quase idênticos a uma referência e sem acerto:
+  - laço Python sobre objetos ImageHash (o compare_with_legitimate de antes)
+  - varredura linear vetorizada (XOR + popcount na matriz uint64)
+  - multi-index hashing (busca por raio sublinear)
+conferindo que a varredura linear e o multi-index devolvem o mesmo top-k
+
+Uso (a partir de backend/):
+    python benchmarks/bench_reference_hashes.py
+    python benchmarks/bench_reference_hashes.py --entries 10000 100000 500000 --queries 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import imagehash
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers.model_store import ModelArtifactStore
+from analyzers.reference_hashes import HASH_ALGORITHMS, ReferenceHashIndex
+
+HASH_BITS = {'phash': 256, 'dhash': 256, 'colorhash': 48}
+# Bits trocados nas consultas "quase idênticas" (dentro dos limites de clone)
+NOISE_BITS = {'phash': 6, 'dhash': 12, 'colorhash': 2}
+
+
+def random_entries(rs, n):
+    bits = {name: rs.randint(0, 2, size=(n, HASH_BITS[name]), dtype=np.uint8) for name in HASH_ALGORITHMS}
+    packed = {name: np.packbits(values, axis=1) for name, values in bits.items()}
+    entries = [
+        {
+            'brand': f'brand{i % 500}',
+            'variant': f'v{i % 3}',
+            'viewport': (1920, 1080),
+            'hashes': {name: packed[name][i].tobytes().hex() for name in HASH_ALGORITHMS}
+        }
+        for i in range(n)
+    ]
+    return entries, bits
+
+
+def noisy_query(bits, i, rs):
+    query = {}
+    for name, values in bits.items():
+        row = values[i].copy()
+        row[rs.choice(len(row), NOISE_BITS[name], replace=False)] ^= 1
+        query[name] = np.packbits(row).tobytes().hex()
+    return query
+
+
+def random_query(rs):
+    return {
+        name: np.packbits(rs.randint(0, 2, HASH_BITS[name], dtype=np.uint8)).tobytes().hex()
+        for name in HASH_ALGORITHMS
+    }
+
+
+def legacy_best(references, query):
+    """compare_with_legitimate de antes: screenshot_hash - info['hash'] para cada referência"""
+    target = imagehash.hex_to_hash(query['phash'])
+    best, best_difference = None, 999
+    for i, reference in enumerate(references):
+        difference = target - reference
+        if difference < best_difference:
+            best, best_difference = i, difference
+    return best
+
+
+def latency(fn, queries):
+    """Mediana e p99 da latência em milissegundos"""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1e3
+    return float(np.median(samples)), float(np.percentile(samples, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--legacy-queries', type=int, default=3, help='consultas no laço Python (lento)')
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    rs = np.random.RandomState(42)
+    print(f"{'Entradas':>10} {'Build':>7} {'Tamanho':>8} {'Consulta':>9} {'laço ImageHash':>15} "
+          f"{'linear (p50/p99)':>19} {'multi-index (p50/p99)':>22} {'Ganho':>7}")
+
+    for n in args.entries:
+        entries, bits = random_entries(rs, n)
+
+        start = time.perf_counter()
+        index = ReferenceHashIndex.build(entries)
+        build_seconds = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as root:
+            store = ModelArtifactStore(root)
+            store.publish(index, None, list(HASH_ALGORITHMS))
+            served = store.load(verify=False).engine
+
+            picks = rs.randint(0, n, args.queries)
+            workloads = {
+                'quase': [noisy_query(bits, i, rs) for i in picks],
+                'sem acerto': [random_query(rs) for _ in range(args.queries)]
+            }
+
+            # Mesmo top-k nos dois caminhos; a referência original sempre volta em primeiro
+            for queries in workloads.values():
+                for query in queries:
+                    linear = served.top_k(query, args.k, linear=True)
+                    assert served.top_k(query, args.k, linear=False) == linear
+            assert all(
+                served.top_k(query, 1, linear=False)[0]['entry'] == int(i)
+                for query, i in zip(workloads['quase'], picks)
+            )
+
+            references = [imagehash.hex_to_hash(entry['hashes']['phash']) for entry in entries]
+            for label, queries in workloads.items():
+                legacy_ms = latency(lambda q: legacy_best(references, q), queries[:args.legacy_queries])[0]
+                linear_ms = latency(lambda q: served.top_k(q, args.k, linear=True), queries)
+                mih_ms = latency(lambda q: served.top_k(q, args.k, linear=False), queries)
+                print(
+                    f"{n:>10,} {build_seconds:>6.1f}s {served.nbytes / 1024 / 1024:>5.1f} MB {label:>9} "
+                    f"{legacy_ms:>12.1f} ms {linear_ms[0]:>8.2f}/{linear_ms[1]:<6.2f}ms "
+                    f"{mih_ms[0]:>10.3f}/{mih_ms[1]:<6.3f}ms {legacy_ms / mih_ms[0]:>6.0f}x"
+                )
+
+
+if __name__ == '__main__':
+    main()
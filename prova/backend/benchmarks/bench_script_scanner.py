@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: varredura de scripts inline (ScriptScanner) vs um re.search por padrão
+Gera páginas com megabytes de JavaScript minificado sintético e mede o tempo
+de ContentAnalyzer.analyze_scripts (com e sem allowlist), conferindo que os
+padrões encontrados são os mesmos
+
+Uso (a partir de backend/):
+    python benchmarks/bench_script_scanner.py
+    python benchmarks/bench_script_scanner.py --mb 1 4 16 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzers.content_analyzer import ContentAnalyzer
+from analyzers.page_document import PageDocument
+from analyzers.script_scanner import SCRIPT_PATTERNS, ScriptScanner, script_hash
+
+
+def minified_js(size_bytes, seed, suspicious_every=0):
+    """JavaScript minificado sintético (identificadores curtos, sem quebras de linha)"""
+    rs = random.Random(seed)
+    names = [''.join(rs.choice(string.ascii_letters) for _ in range(rs.randint(1, 3))) for _ in range(200)]
+    templates = [
+        'var {a}=function({b},{c}){{return {b}.{d}({c})}};',
+        'function {a}({b}){{if(!{b})return null;for(var {c}=0;{c}<{b}.length;{c}++){d}[{c}]={b}[{c}];}}',
+        '{a}.prototype.{b}=function(){{this.{c}=this.{d}||{{}};}};',
+        '{a}&&{a}.{b}("{c}",function({d}){{{d}.preventDefault()}});'
+    ]
+    suspicious = ['eval({a});', 'document.write({a});', 'String.fromCharCode({a});', 'document.cookie;']
+
+    parts, size, count = [], 0, 0
+    while size < size_bytes:
+        count += 1
+        template = rs.choice(suspicious) if suspicious_every and count % suspicious_every == 0 else rs.choice(templates)
+        part = template.format(a=rs.choice(names), b=rs.choice(names), c=rs.choice(names), d=rs.choice(names))
+        parts.append(part)
+        size += len(part)
+    return ''.join(parts)
+
+
+def build_page(mb, n_scripts, suspicious_every):
+    """Página com n_scripts scripts inline somando ~mb megabytes"""
+    per_script = int(mb * 1024 * 1024 / n_scripts)
+    scripts = [minified_js(per_script, seed=i, suspicious_every=suspicious_every) for i in range(n_scripts)]
+    html = '<html><body>' + ''.join(f'<script>{s}</script>' for s in scripts) + '</body></html>'
+    return BeautifulSoup(html, 'html.parser'), scripts
+
+
+def baseline_analyze_scripts(soup):
+    """Implementação anterior: um re.search por padrão em cada script"""
+    found = []
+    for script in soup.find_all('script'):
+        content = script.string or ''
+        for _, pattern, description in SCRIPT_PATTERNS:
+            if re.search(pattern, content, re.IGNORECASE):
+                found.append(description)
+    return found
+
+
+def timeit(fn, repeat):
+    fn()  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mb', type=float, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--scripts', type=int, default=8, help='scripts inline por página')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Página':<28} {'re.search x9':>13} {'ScriptScanner':>14} {'allowlist':>10} {'Speedup':>8}")
+    for mb in args.mb:
+        for label, suspicious_every in (('limpa', 0), ('com padrões', 5000)):
+            soup, scripts = build_page(mb, args.scripts, suspicious_every)
+            document = PageDocument('https://example.com/', None, soup=soup)
+
+            analyzer = ContentAnalyzer()
+            analyzer.script_scanner = ScriptScanner(allowlist={})
+            expected = sorted(baseline_analyze_scripts(soup))
+            got = sorted(analyzer.analyze_scripts(document)['suspicious_patterns'])
+            assert expected == got, (expected, got)
+
+            baseline_ms = timeit(lambda: baseline_analyze_scripts(soup), args.repeat)
+            scanner_ms = timeit(lambda: analyzer.analyze_scripts(document), args.repeat)
+
+            # Mesmos scripts como bibliotecas conhecidas: só o hash é calculado
+            allowlisted = ContentAnalyzer()
+            allowlisted.script_scanner = ScriptScanner(allowlist={script_hash(s): f'lib{i}' for i, s in enumerate(scripts)})
+            allowlist_ms = timeit(lambda: allowlisted.analyze_scripts(document), args.repeat)
+
+            print(
+                f"{f'{mb:g} MB, {label}':<28} {baseline_ms:>10.1f} ms {scanner_ms:>11.1f} ms "
+                f"{allowlist_ms:>7.1f} ms {baseline_ms / scanner_ms:>7.1f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Feedback de analistas sobre vereditos do histórico
+Armazenamento append-only em JSONL: cada confirmação/correção vira uma
+linha nova (nunca reescrita), usada como exemplo rotulado no retreino.
+Vários workers gravam no mesmo arquivo: o append e a contagem acontecem sob
+flock do próprio arquivo, e a contagem sai do arquivo (não de um contador
+do processo)
+"""
+
+import fcntl
+import json
+import os
+import threading
+from datetime import datetime
+
+LABELS = {'phishing': 1, 'legitimate': 0}
+
+
+class FeedbackStore:
+    def __init__(self, db_file='data/feedback.jsonl'):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        # Contagem incremental: linhas completas até o byte `_counted_bytes`
+        self._count = 0
+        self._counted_bytes = 0
+
+    def iter_entries(self):
+        """Percorrer os rótulos gravados (linhas corrompidas são ignoradas)"""
+        if not os.path.exists(self.db_file):
+            return
+        with open(self.db_file, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def append(self, url, label, features, original_classification=None, history_id=None, analyst=None, notes=None):
+        """
+        Registrar um rótulo de analista
+
+        Args:
+            label: 'phishing' ou 'legitimate'
+            features: dict com as features do modelo no momento da análise
+        """
+        if label not in LABELS:
+            raise ValueError(f"Rótulo inválido: {label} (use {', '.join(LABELS)})")
+
+        os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
+        with self._lock, open(self.db_file, 'a+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            entry = {
+                'id': self._count_lines(f) + 1,
+                'url': url,
+                'label': label,
+                'is_phishing': LABELS[label],
+                'features': features,
+                'original_classification': original_classification,
+                'overturned': (original_classification is not None and
+                               (original_classification in ('SAFE', 'LOW_RISK')) == (label == 'phishing')),
+                'history_id': history_id,
+                'analyst': analyst,
+                'notes': notes,
+                'timestamp': datetime.now().isoformat()
+            }
+
+            # Append + fsync: um rótulo confirmado nunca se perde num crash
+            f.write((json.dumps(entry) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+        return entry
+
+    def _count_lines(self, f):
+        """Linhas do arquivo aberto `f` (só lê o que foi acrescentado desde a última contagem)"""
+        size = os.fstat(f.fileno()).st_size
+        if size < self._counted_bytes:  # arquivo substituído/truncado: recontar
+            self._count = self._counted_bytes = 0
+        f.seek(self._counted_bytes)
+        tail = f.read(size - self._counted_bytes)
+        complete = tail.rfind(b'\n') + 1  # linha parcial fica para a próxima contagem
+        self._count += tail.count(b'\n', 0, complete)
+        self._counted_bytes += complete
+        return self._count
+
+    def count(self):
+        """Rótulos gravados no arquivo (inclusive por outros processos)"""
+        if not os.path.exists(self.db_file):
+            return 0
+        with self._lock, open(self.db_file, 'rb') as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                return self._count_lines(f)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_recent(self, limit=50):
+        entries = list(self.iter_entries())
+        return entries[::-1][:limit]
+
+    def get_statistics(self):
+        entries = list(self.iter_entries())
+        return {
+            'total_labels': len(entries),
+            'phishing_labels': sum(1 for entry in entries if entry['is_phishing']),
+            'legitimate_labels': sum(1 for entry in entries if not entry['is_phishing']),
+            'overturned_verdicts': sum(1 for entry in entries if entry.get('overturned'))
+        }
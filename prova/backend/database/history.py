@@ -1,9 +1,13 @@
 """
 Gerenciamento de Histórico de URLs Analisadas
+add_entry é chamado fora do event loop do NetEngine (asyncio.to_thread): a
+lista é trocada por uma cópia (leitores nunca veem uma lista pela metade) e
+gravações concorrentes do arquivo se juntam numa só
 """
 
 import json
 import os
+import threading
 from datetime import datetime
 import csv
 from io import StringIO
@@ -12,6 +16,9 @@ class URLHistory:
     def __init__(self, db_file='data/history.json'):
         self.db_file = db_file
         self.history = self.load_history()
+        self._lock = threading.Lock()       # troca da lista em memória
+        self._save_lock = threading.Lock()  # um salvamento por vez
+        self._dirty = False
     
     def load_history(self):
         """Carregar histórico do arquivo"""
@@ -24,29 +31,48 @@ class URLHistory:
         return []
     
     def save_history(self):
-        """Salvar histórico no arquivo"""
-        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
-        with open(self.db_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+        """Salvar histórico no arquivo (quem esperava o salvamento anterior grava as entradas de todos)"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = self.history
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            tmp_path = self.db_file + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+            os.replace(tmp_path, self.db_file)
     
     def add_entry(self, result):
         """Adicionar nova entrada ao histórico"""
-        entry = {
-            'id': len(self.history) + 1,
+        fields = {
             'url': result['url'],
             'timestamp': result['timestamp'],
             'risk_score': result['risk_score'],
             'classification': result['classification'],
-            'is_safe': result['is_safe']
+            'is_safe': result['is_safe'],
+            # Features do modelo no momento da análise (reaproveitadas no feedback)
+            'ml_features': result.get('ml_prediction', {}).get('features_used')
         }
         
-        self.history.insert(0, entry)  # Adicionar no início
-        
-        # Limitar tamanho do histórico
-        if len(self.history) > 1000:
-            self.history = self.history[:1000]
+        with self._lock:
+            # Sequencial mesmo após o corte em 1000 entradas (ids citados pelo feedback)
+            entry = dict(id=self.history[0]['id'] + 1 if self.history else 1, **fields)
+            # Adicionar no início, limitando o tamanho do histórico
+            self.history = [entry] + self.history[:999]
+            self._dirty = True
         
         self.save_history()
+        return entry
+    
+    def get_entry(self, entry_id):
+        """Obter uma entrada pelo id (aceita o id como texto, ex: vindo de JSON/query string)"""
+        try:
+            entry_id = int(entry_id)
+        except (TypeError, ValueError):
+            return None
+        return next((entry for entry in self.history if entry['id'] == entry_id), None)
     
     def get_recent(self, limit=50):
         """Obter entradas recentes"""
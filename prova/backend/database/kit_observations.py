@@ -0,0 +1,47 @@
+"""
+Observações de kits de phishing
+Registro append-only (JSONL) das impressões digitais de páginas com
+veredito de alto risco; é a fonte do índice de kits (training/kit_index.py)
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+HIGH_RISK_CLASSIFICATIONS = ('HIGH_RISK', 'CRITICAL')
+
+
+class KitObservationLog:
+    def __init__(self, db_file='data/kit_observations.jsonl'):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+
+    def append(self, url, fingerprint, classification, risk_score, source='verdict'):
+        """Registrar a impressão digital de uma página de alto risco"""
+        entry = {
+            'url': url,
+            'domain': urlparse(url).netloc.lower(),
+            'exact': fingerprint['exact'],
+            'simhash': fingerprint['simhash'],
+            'classification': classification,
+            'risk_score': risk_score,
+            'source': source,
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
+            with open(self.db_file, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def iter_entries(self):
+        if not os.path.exists(self.db_file):
+            return
+        with open(self.db_file, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
@@ -2,93 +2,69 @@
 """
 Script para baixar dataset UCI Phishing Websites
 Dataset público com 11.000+ URLs reais classificadas
+
+Uso:
+    python download_dataset.py                                # CSV com 2000 amostras
+    python download_dataset.py --rows-per-class 5000000 --columnar data/synthetic_10m
+    python download_dataset.py --rows-per-class 500000 --urls data/synthetic_urls.jsonl
 """
 
+import argparse
 import pandas as pd
-import numpy as np
 import os
+import time
+
+from training.synthetic import (
+    UCI_LIKE_PROFILE, generate_dataset, write_columnar, write_urls_jsonl
+)
 
-def download_uci_phishing_dataset():
+def download_uci_phishing_dataset(n_per_class=1000):
     """
     Cria dataset realista baseado em características conhecidas de phishing
     Simula o dataset UCI Phishing Websites com 2000 amostras balanceadas
     """
     print("🔄 Gerando dataset UCI-like Phishing...")
-    
-    np.random.seed(42)
-    n_samples = 2000
-    
-    # URLs LEGÍTIMAS - Características típicas
-    legitimate_data = []
-    legitimate_domains = [
-        'google.com', 'facebook.com', 'amazon.com', 'microsoft.com', 'apple.com',
-        'twitter.com', 'linkedin.com', 'github.com', 'stackoverflow.com', 'wikipedia.org',
-        'reddit.com', 'youtube.com', 'instagram.com', 'netflix.com', 'spotify.com',
-        'paypal.com', 'ebay.com', 'walmart.com', 'target.com', 'bestbuy.com'
-    ]
-    
-    for i in range(n_samples // 2):
-        domain = np.random.choice(legitimate_domains)
-        
-        # Adicionar variação realista
-        url_length_base = len(f"https://www.{domain}/") + np.random.randint(0, 20)
-        
-        legitimate_data.append({
-            'url_length': url_length_base,
-            'num_dots': np.random.randint(1, 3),
-            'num_hyphens': np.random.randint(0, 1),
-            'num_underscores': 0,
-            'num_special_chars': np.random.randint(3, 8),
-            'num_digits': np.random.randint(0, 4),
-            'has_ip': 0,
-            'domain_length': len(domain),
-            'num_subdomains': np.random.randint(0, 2),
-            'has_https': 1,
-            'domain_age_days': np.random.randint(365, 7300),  # 1-20 anos
-            'is_phishing': 0
-        })
-    
-    # URLs PHISHING - Características típicas
-    phishing_data = []
-    phishing_keywords = [
-        'verify', 'secure', 'account', 'update', 'confirm', 'suspend',
-        'alert', 'unusual', 'activity', 'login', 'bank', 'payment'
-    ]
-    
-    for i in range(n_samples // 2):
-        # Phishing tem URLs mais longas e complexas
-        num_keywords = np.random.randint(2, 5)
-        keywords = '-'.join(np.random.choice(phishing_keywords, num_keywords, replace=False))
-        
-        phishing_data.append({
-            'url_length': np.random.randint(60, 200),
-            'num_dots': np.random.randint(3, 8),
-            'num_hyphens': np.random.randint(3, 12),
-            'num_underscores': np.random.randint(1, 5),
-            'num_special_chars': np.random.randint(15, 40),
-            'num_digits': np.random.randint(5, 25),
-            'has_ip': np.random.choice([0, 1], p=[0.7, 0.3]),  # 30% tem IP
-            'domain_length': np.random.randint(25, 80),
-            'num_subdomains': np.random.randint(2, 6),
-            'has_https': np.random.choice([0, 1], p=[0.65, 0.35]),  # 35% tem HTTPS
-            'domain_age_days': np.random.randint(0, 60),  # Domínios muito novos
-            'is_phishing': 1
-        })
-    
-    # Combinar e embaralhar
-    all_data = legitimate_data + phishing_data
-    df = pd.DataFrame(all_data)
-    df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-    
+
+    # Colunas geradas de forma vetorizada (ver training/synthetic.py)
+    df = pd.DataFrame(generate_dataset(n_per_class, profile=UCI_LIKE_PROFILE, seed=42))
+
     # Salvar
     output_path = 'data/phishing_dataset.csv'
     os.makedirs('data', exist_ok=True)
     df.to_csv(output_path, index=False)
-    
+
     print(f"✅ Dataset salvo em: {output_path}")
     print(f"📊 Total: {len(df)} URLs ({sum(df['is_phishing'] == 0)} legítimas, {sum(df['is_phishing'] == 1)} phishing)")
-    
+
     return df
 
+def generate_benchmark_dataset(n_per_class, columnar_path=None, urls_path=None):
+    """Gerar dataset em escala de benchmark (formato colunar binário e/ou URLs cruas)"""
+    if columnar_path:
+        start = time.perf_counter()
+        columns = generate_dataset(n_per_class, profile=UCI_LIKE_PROFILE, seed=42)
+        generated = time.perf_counter() - start
+
+        manifest = write_columnar(columnar_path, columns)
+        total = time.perf_counter() - start
+        size_mb = sum(values.nbytes for values in columns.values()) / 1024 / 1024
+
+        print(f"✅ {manifest['rows']:,} linhas geradas em {generated:.2f}s, gravadas em {columnar_path} ({total:.2f}s, {size_mb:,.0f} MB)")
+
+    if urls_path:
+        start = time.perf_counter()
+        written = write_urls_jsonl(urls_path, n_per_class, seed=42)
+        elapsed = time.perf_counter() - start
+        print(f"✅ {written:,} URLs sintéticas gravadas em {urls_path} ({elapsed:.2f}s)")
+
 if __name__ == '__main__':
-    download_uci_phishing_dataset()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows-per-class', type=int, default=1000)
+    parser.add_argument('--columnar', help='diretório de saída no formato colunar binário (.npy por coluna)')
+    parser.add_argument('--urls', help='arquivo JSONL de saída com URLs sintéticas cruas')
+    args = parser.parse_args()
+
+    if args.columnar or args.urls:
+        generate_benchmark_dataset(args.rows_per_class, args.columnar, args.urls)
+    else:
+        download_uci_phishing_dataset(args.rows_per_class)
@@ -0,0 +1,3 @@
+"""
+Pipelines de treinamento offline do classificador
+"""
@@ -0,0 +1,131 @@
+"""
+Cache binário do dataset de treino
+Na primeira leitura o CSV é convertido em X.npy/y.npy num diretório
+<csv>.cache/ ao lado do arquivo; as leituras seguintes fazem memory-map
+desses arrays em vez de reprocessar o CSV. O cache é identificado pelo
+SHA-256 do CSV e é reconstruído automaticamente quando o arquivo muda
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from analyzers.ml_classifier import FEATURE_COLUMNS
+from analyzers.model_store import file_sha256
+
+CACHE_FORMAT_VERSION = 1
+LABEL_COLUMN = 'is_phishing'
+
+
+def cache_dir_for(csv_path):
+    return csv_path + '.cache'
+
+
+def read_cache_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path, write_fn):
+    """Gravar via arquivo temporário + os.replace (leitores nunca veem arquivo parcial)"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix=os.path.splitext(path)[1], dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_fn(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def cache_is_valid(csv_path, meta):
+    """
+    Verificar se o cache corresponde ao CSV atual
+    Tamanho + mtime iguais evitam recalcular o hash; senão compara o SHA-256
+    """
+    if not meta or meta.get('format_version') != CACHE_FORMAT_VERSION:
+        return False, None
+    if meta.get('columns') != FEATURE_COLUMNS:
+        return False, None
+
+    stat = os.stat(csv_path)
+    if meta.get('source_size') == stat.st_size and meta.get('source_mtime_ns') == stat.st_mtime_ns:
+        return True, meta['source_sha256']
+
+    # CSV tocado (ex: git checkout) mas talvez com o mesmo conteúdo
+    checksum = file_sha256(csv_path)
+    return checksum == meta.get('source_sha256'), checksum
+
+
+def build_cache(csv_path, cache_dir, checksum=None, chunk_size=500000):
+    """Converter o CSV em arrays .npy (leitura em blocos para limitar memória)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    checksum = checksum or file_sha256(csv_path)
+    stat = os.stat(csv_path)
+
+    X_parts, y_parts = [], []
+    for frame in pd.read_csv(csv_path, usecols=FEATURE_COLUMNS + [LABEL_COLUMN], chunksize=chunk_size):
+        X_parts.append(frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+        y_parts.append(frame[LABEL_COLUMN].to_numpy(dtype=np.int64))
+
+    X = np.concatenate(X_parts) if X_parts else np.empty((0, len(FEATURE_COLUMNS)))
+    y = np.concatenate(y_parts) if y_parts else np.empty(0, dtype=np.int64)
+
+    write_atomic(os.path.join(cache_dir, 'X.npy'), lambda f: np.save(f, X))
+    write_atomic(os.path.join(cache_dir, 'y.npy'), lambda f: np.save(f, y))
+
+    # meta.json por último: só marca o cache como válido depois dos arrays gravados
+    meta = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': os.path.basename(csv_path),
+        'source_sha256': checksum,
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'columns': FEATURE_COLUMNS,
+        'rows': int(len(y))
+    }
+    write_atomic(os.path.join(cache_dir, 'meta.json'), lambda f: f.write(json.dumps(meta, indent=2).encode()))
+    return meta
+
+
+def load_training_arrays(csv_path='data/phishing_dataset.csv', mmap=True):
+    """
+    Carregar (X, y) do dataset de treino usando o cache binário
+
+    Returns:
+        X: array (n, len(FEATURE_COLUMNS)) float64, memory-mapped por padrão
+        y: array (n,) int64
+        meta: metadados do cache (inclui o checksum do CSV de origem)
+    """
+    cache_dir = cache_dir_for(csv_path)
+    meta = read_cache_meta(cache_dir)
+    valid, checksum = cache_is_valid(csv_path, meta)
+
+    if not valid:
+        print(f"🔄 Construindo cache binário de {csv_path}...")
+        meta = build_cache(csv_path, cache_dir, checksum)
+    elif meta.get('source_mtime_ns') != os.stat(csv_path).st_mtime_ns:
+        # Mesmo conteúdo, mtime diferente: atualizar para não recalcular o hash
+        stat = os.stat(csv_path)
+        meta.update(source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+        write_atomic(os.path.join(cache_dir, 'meta.json'), lambda f: f.write(json.dumps(meta, indent=2).encode()))
+
+    mode = 'r' if mmap else None
+    X = np.load(os.path.join(cache_dir, 'X.npy'), mmap_mode=mode)
+    y = np.load(os.path.join(cache_dir, 'y.npy'), mmap_mode=mode)
+
+    if len(X) != meta['rows'] or len(y) != meta['rows']:
+        # Cache inconsistente (ex: gravação interrompida de versão antiga): reconstruir
+        meta = build_cache(csv_path, cache_dir)
+        X = np.load(os.path.join(cache_dir, 'X.npy'), mmap_mode=mode)
+        y = np.load(os.path.join(cache_dir, 'y.npy'), mmap_mode=mode)
+
+    return X, y, meta
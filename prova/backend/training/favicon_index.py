@@ -0,0 +1,93 @@
+"""
+Construção da base de favicons das marcas
+Lê os ícones oficiais guardados localmente (sem acessar os sites reais) e
+publica uma nova versão de models/favicon_index com SHA-256 e phash de
+cada arquivo. Vale guardar todas as variantes que a marca serve
+(favicon.ico, PNGs de tamanhos diferentes, apple-touch-icon): kits copiam
+qualquer uma delas
+
+Layout (uma pasta por marca, nome igual ao de data/rules/brands.json):
+    data/reference_favicons/<marca>/<qualquer nome>.{ico,png,gif,jpg,webp,svg}
+SVG entra só na busca exata (sem phash). Pastas de marcas fora do catálogo
+interrompem a construção: sem os domínios oficiais, o analisador não teria
+como reconhecer o site da própria marca
+
+Uso (a partir de backend/):
+    python -m training.favicon_index
+    python -m training.favicon_index --favicons data/reference_favicons --threshold 4
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+from analyzers.brand_catalog import default_brand_catalog
+from analyzers.favicon_hashes import FAVICON_PHASH_THRESHOLD, FaviconIndex, favicon_hashes
+from analyzers.model_store import ModelArtifactStore
+
+ICON_EXTENSIONS = ('.ico', '.png', '.gif', '.jpg', '.jpeg', '.webp', '.svg')
+
+
+def discover_favicons(root):
+    """Ícones encontrados: [(marca, caminho)]"""
+    icons = []
+    for brand in sorted(os.listdir(root)):
+        brand_dir = os.path.join(root, brand)
+        if not os.path.isdir(brand_dir):
+            continue
+        for filename in sorted(os.listdir(brand_dir)):
+            if filename.lower().endswith(ICON_EXTENSIONS):
+                icons.append((brand, os.path.join(brand_dir, filename)))
+    return icons
+
+
+def build_favicon_index(favicon_root='data/reference_favicons', threshold=FAVICON_PHASH_THRESHOLD,
+                        store=None, activate=True, brand_catalog=None):
+    """Calcular os hashes dos ícones das marcas e publicar uma nova versão da base"""
+    start = time.perf_counter()
+    icons = discover_favicons(favicon_root)
+    catalog = brand_catalog or default_brand_catalog()
+    unknown = sorted({brand for brand, _ in icons if brand not in catalog.entries})
+    if unknown:
+        raise ValueError(f"Marcas sem entrada em data/rules/brands.json: {', '.join(unknown)}")
+
+    entries = []
+    for brand, path in icons:
+        with open(path, 'rb') as f:
+            entries.append(dict(favicon_hashes(f.read()), brand=brand, file=os.path.relpath(path, favicon_root)))
+
+    index = FaviconIndex.build(entries, phash_threshold=threshold)
+
+    store = store or ModelArtifactStore('models/favicon_index')
+    metadata = {
+        'favicon_root': favicon_root,
+        'brands': len(index.brands),
+        'icons': len(index),
+        'exact_keys': len(index.digests),
+        'without_phash': sum(1 for entry in entries if not entry['phash']),
+        'ambiguous_phash': int(len(index) - index.phash_valid.sum()) - sum(1 for entry in entries if not entry['phash']),
+        'files': [entry['file'] for entry in entries],
+        'built_at': datetime.now().isoformat(),
+        'build_seconds': round(time.perf_counter() - start, 3)
+    }
+    version = store.publish(index, None, ['sha256', 'phash'], metadata=metadata, activate=activate)
+    return version, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--favicons', default='data/reference_favicons')
+    parser.add_argument('--threshold', type=int, default=FAVICON_PHASH_THRESHOLD,
+                        help='distância máxima do phash (64 bits) para correspondência')
+    parser.add_argument('--no-activate', action='store_true', help='publicar sem colocar em uso')
+    args = parser.parse_args()
+
+    version, metadata = build_favicon_index(args.favicons, args.threshold, activate=not args.no_activate)
+    print(f"🔖 Favicons de referência {version}: {metadata['icons']:,} ícones de {metadata['brands']} marcas "
+          f"({metadata['without_phash']} sem phash, {metadata['ambiguous_phash']} phash ambíguos) "
+          f"em {metadata['build_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Retreino em segundo plano a partir do feedback de analistas
+Uma thread daemon acorda a cada `interval` segundos (ou quando acionada pela
+API) e, se houver rótulos novos suficientes, treina um novo Random Forest com
+o dataset base + exemplos rotulados (com peso maior). O candidato só é
+publicado e colocado em uso se não piorar a validação em relação ao modelo
+atual; a troca é atômica (MLClassifier.activate_version) e as requisições
+em andamento continuam usando o modelo antigo
+
+Com vários workers, só um processo treina: o que conseguir o flock de
+<state_file>.lock. Os demais repassam os pedidos de retreino por
+<state_file>.request e leem o estado do treinador em <state_file>
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from analyzers.inference_engine import CompiledForest
+from analyzers.ml_classifier import (
+    DEFAULT_DOMAIN_AGE_DAYS, FEATURE_COLUMNS, FOREST_PARAMS, extract_url_features
+)
+from analyzers.model_store import ServingModel
+
+TRAINER_STATE_FILE = 'data/feedback_trainer.json'
+REQUEST_POLL_SECONDS = 5  # de quanto em quanto tempo o treinador procura pedidos de outros workers
+
+
+def feedback_features(url, features=None):
+    """Vetor de features (ordem de FEATURE_COLUMNS) de um exemplo rotulado"""
+    values = dict(extract_url_features(url), domain_age_days=DEFAULT_DOMAIN_AGE_DAYS)
+    values.update({k: v for k, v in (features or {}).items() if v is not None})
+    return [float(values[name]) for name in FEATURE_COLUMNS]
+
+
+def load_feedback_arrays(feedback_store):
+    """
+    (X, y) do feedback acumulado
+    Vários rótulos para a mesma URL: vale o mais recente
+    """
+    latest = {}
+    for entry in feedback_store.iter_entries():
+        latest[entry['url']] = entry
+
+    X = [feedback_features(entry['url'], entry.get('features')) for entry in latest.values()]
+    y = [int(entry['is_phishing']) for entry in latest.values()]
+    return np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS)), np.asarray(y, dtype=np.int64)
+
+
+def accuracy(serving, X, y):
+    if len(y) == 0:
+        return None
+    return float(((serving.predict_proba(X)[:, 1] >= 0.5).astype(int) == y).mean())
+
+
+class FeedbackTrainer:
+    """Treinador em segundo plano que incorpora o feedback ao MLClassifier"""
+
+    def __init__(self, classifier, feedback_store, interval=300, min_new_labels=10,
+                 feedback_weight=5.0, validation_fraction=0.2, max_accuracy_drop=0.01, seed=42,
+                 state_file=TRAINER_STATE_FILE):
+        self.classifier = classifier
+        self.feedback_store = feedback_store
+        self.interval = interval
+        self.min_new_labels = min_new_labels
+        self.feedback_weight = feedback_weight
+        self.validation_fraction = validation_fraction
+        self.max_accuracy_drop = max_accuracy_drop
+        self.seed = seed
+        self.state_file = state_file
+
+        # Rótulos já incorporados (os existentes na partida contam como pendentes)
+        self.trained_label_count = 0
+        self.last_run = None
+        self._train_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._force = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._leader_fd = None
+
+    # --- um treinador por máquina ---
+
+    def _acquire_leadership(self):
+        """Tentar o flock exclusivo (mantido enquanto o processo treinar)"""
+        if self._leader_fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        fd = os.open(self.state_file + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._leader_fd = fd
+        return True
+
+    def _release_leadership(self):
+        if self._leader_fd is not None:
+            os.close(self._leader_fd)  # fechar o descritor solta o flock
+            self._leader_fd = None
+
+    @property
+    def is_leader(self):
+        return self._leader_fd is not None
+
+    def _write_json(self, path, data):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, training=False):
+        self._write_json(self.state_file, {
+            'pid': os.getpid(),
+            'training': training,
+            'trained_label_count': self.trained_label_count,
+            'last_run': self.last_run
+        })
+
+    def _shared_state(self):
+        """Estado do treinador: o próprio (líder) ou o publicado pelo líder"""
+        if self.is_leader:
+            return {'training': self._train_lock.locked(),
+                    'trained_label_count': self.trained_label_count, 'last_run': self.last_run}
+        state = self._read_json(self.state_file) or {}
+        return {'training': bool(state.get('training')),
+                'trained_label_count': state.get('trained_label_count', 0), 'last_run': state.get('last_run')}
+
+    def _take_request(self):
+        """Consumir um pedido de retreino de outro worker (None se não houver; senão o force pedido)"""
+        request = self._read_json(self.state_file + '.request')
+        if request is None:
+            return None
+        try:
+            os.remove(self.state_file + '.request')
+        except OSError:
+            pass
+        return bool(request.get('force'))
+
+    # --- ciclo de vida ---
+
+    def start(self):
+        """Iniciar a thread de retreino se este processo for o treinador (True se for)"""
+        if self._thread and self._thread.is_alive():
+            return True
+        if not self._acquire_leadership():
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='feedback-trainer', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def trigger(self, force=False):
+        """Acordar o treinador antes do próximo ciclo (force: retreinar mesmo com poucos rótulos)"""
+        if self.is_leader:
+            self._force = self._force or force
+            self._wakeup.set()
+            return
+        pending = self._read_json(self.state_file + '.request') or {}
+        self._write_json(self.state_file + '.request', {'force': bool(pending.get('force')) or force})
+
+    def _loop(self):
+        try:
+            next_run = time.monotonic() + self.interval
+            while not self._stop.is_set():
+                self._wakeup.wait(min(REQUEST_POLL_SECONDS, max(0.0, next_run - time.monotonic())))
+                if self._stop.is_set():
+                    break
+                requested = self._take_request()
+                if not self._wakeup.is_set() and requested is None and time.monotonic() < next_run:
+                    continue
+                self._wakeup.clear()
+                next_run = time.monotonic() + self.interval
+                force, self._force = self._force or bool(requested), False
+                try:
+                    self.run_once(force)
+                except Exception as e:
+                    self.last_run = {'status': 'error', 'error': str(e), 'finished_at': datetime.now().isoformat()}
+                    self._save_state()
+                    print(f"⚠️ Erro no retreino com feedback: {e}")
+        finally:
+            self._release_leadership()
+
+    def pending_labels(self):
+        return self.feedback_store.count() - self._shared_state()['trained_label_count']
+
+    def status(self):
+        state = self._shared_state()
+        return {
+            'running': self.is_leader and bool(self._thread and self._thread.is_alive()),
+            'leader': self.is_leader,
+            'training': state['training'],
+            'interval_seconds': self.interval,
+            'min_new_labels': self.min_new_labels,
+            'pending_labels': self.feedback_store.count() - state['trained_label_count'],
+            'last_run': state['last_run']
+        }
+
+    def run_once(self, force=False):
+        """
+        Executar um ciclo de retreino (no máximo um por vez)
+
+        Returns:
+            relatório do ciclo, ou None se não havia o que fazer
+        """
+        if not self._train_lock.acquire(blocking=False):
+            return None
+        try:
+            label_count = self.feedback_store.count()
+            if label_count == 0 or (not force and label_count - self.trained_label_count < self.min_new_labels):
+                return None
+
+            if self.is_leader:
+                self._save_state(training=True)
+            report = self._retrain()
+            self.trained_label_count = label_count
+            self.last_run = report
+            return report
+        finally:
+            self._train_lock.release()
+            if self.is_leader:
+                self._save_state()
+
+    def _retrain(self):
+        start = time.perf_counter()
+        X_fb, y_fb = load_feedback_arrays(self.feedback_store)
+        X_base, y_base, dataset_checksum = self.classifier.download_uci_dataset()
+        X_base, y_base = np.asarray(X_base, dtype=np.float64), np.asarray(y_base)
+
+        # Validação: parte do dataset base + parte do feedback, nunca vistas no treino
+        Xb_train, Xb_val, yb_train, yb_val = train_test_split(
+            X_base, y_base, test_size=self.validation_fraction, random_state=self.seed, stratify=y_base
+        )
+        rs = np.random.RandomState(self.seed)
+        fb_val_mask = rs.rand(len(y_fb)) < self.validation_fraction if len(y_fb) >= 10 else np.zeros(len(y_fb), bool)
+
+        X_train = np.vstack([Xb_train, X_fb[~fb_val_mask]])
+        y_train = np.concatenate([yb_train, y_fb[~fb_val_mask]])
+        weights = np.concatenate([np.ones(len(yb_train)), np.full(int((~fb_val_mask).sum()), self.feedback_weight)])
+
+        scaler = StandardScaler().fit(X_train)
+        # n_jobs=1: o retreino não disputa todos os núcleos com as requisições
+        model = RandomForestClassifier(**dict(FOREST_PARAMS, n_jobs=1))
+        model.fit(scaler.transform(X_train), y_train, sample_weight=weights)
+
+        engine = CompiledForest.from_sklearn(model)
+        candidate = ServingModel('candidate', engine, scaler.mean_, scaler.scale_, {})
+        current = self.classifier.serving
+
+        validation = {
+            'base_accuracy': accuracy(candidate, Xb_val, yb_val),
+            'feedback_accuracy': accuracy(candidate, X_fb[fb_val_mask], y_fb[fb_val_mask]),
+            'current_base_accuracy': accuracy(current, Xb_val, yb_val),
+            'current_feedback_accuracy': accuracy(current, X_fb[fb_val_mask], y_fb[fb_val_mask]),
+            'base_samples': int(len(yb_val)),
+            'feedback_samples': int(fb_val_mask.sum())
+        }
+        accepted = validation['base_accuracy'] >= validation['current_base_accuracy'] - self.max_accuracy_drop
+        if validation['feedback_samples']:
+            accepted = accepted and validation['feedback_accuracy'] >= validation['current_feedback_accuracy']
+
+        report = {
+            'status': 'accepted' if accepted else 'rejected',
+            'previous_version': current.version if current else None,
+            'version': None,
+            'feedback_labels': int(len(y_fb)),
+            'validation': validation,
+            'train_seconds': round(time.perf_counter() - start, 3),
+            'finished_at': datetime.now().isoformat()
+        }
+
+        if not accepted:
+            print(f"⚠️ Modelo retreinado com feedback rejeitado na validação: {validation}")
+            return report
+
+        store = self.classifier.store
+        version = store.publish(engine, scaler, FEATURE_COLUMNS, metadata={
+            'source': 'feedback',
+            'dataset_sha256': dataset_checksum,
+            'trained_at': datetime.now().isoformat(),
+            'n_samples': int(len(y_train)),
+            'feedback_labels': int(len(y_fb)),
+            'feedback_weight': self.feedback_weight,
+            'validation': validation,
+            'parent_version': report['previous_version']
+        }, sklearn_model=model, activate=False)
+
+        # Validar o artefato gravado, ativar e trocar em memória
+        self.classifier.activate_version(version)
+        report['version'] = version
+        print(f"🔄 Modelo retreinado com {len(y_fb)} rótulos de analistas: {version}")
+        return report
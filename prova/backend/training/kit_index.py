@@ -0,0 +1,140 @@
+"""
+Construção do índice de kits de phishing conhecidos
+Agrupa as impressões digitais registradas em data/kit_observations.jsonl
+(páginas com veredito HIGH_RISK/CRITICAL). Observações gravadas pelo próprio
+atalho do índice (source == 'kit_match') ficam de fora: senão uma página
+parecida com um kit conhecido entraria como kit novo e o índice se
+realimentaria sozinho. Um grupo entra no índice quando
+o mesmo HTML apareceu em pelo menos `min_domains` domínios diferentes, ou
+quando um analista confirmou phishing numa das URLs; URLs marcadas como
+legítimas pelos analistas tiram o grupo do índice
+
+Uso (a partir de backend/):
+    python -m training.kit_index
+    python -m training.kit_index --min-domains 3 --extra feeds/kits.jsonl
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+from analyzers.kit_fingerprint import KitIndex
+from analyzers.model_store import ModelArtifactStore
+from database.feedback import FeedbackStore
+from database.kit_observations import HIGH_RISK_CLASSIFICATIONS, KitObservationLog
+
+
+def iter_extra(path):
+    """Impressões digitais externas (JSONL com exact, simhash e opcionalmente domains)"""
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('exact') and entry.get('simhash'):
+                yield entry
+
+
+def collect_kits(observations, feedback_store=None, min_domains=2, extra=None):
+    """
+    Agrupar observações por hash exato
+
+    Returns:
+        (lista de {exact, simhash, domains}, estatísticas)
+    """
+    labels = {}
+    if feedback_store is not None:
+        for entry in feedback_store.iter_entries():
+            labels[entry['url']] = entry['label']  # vale o rótulo mais recente
+
+    groups = {}
+    skipped_kit_matches = 0
+    for entry in observations:
+        if entry.get('classification') not in HIGH_RISK_CLASSIFICATIONS:
+            continue
+        if entry.get('source') == 'kit_match':
+            skipped_kit_matches += 1
+            continue
+        group = groups.setdefault(entry['exact'], {
+            'simhash': entry['simhash'], 'domains': set(), 'confirmed': False, 'rejected': False
+        })
+        group['domains'].add(entry['domain'])
+        label = labels.get(entry['url'])
+        if label == 'phishing':
+            group['confirmed'] = True
+        elif label == 'legitimate':
+            group['rejected'] = True
+
+    kits = [
+        {'exact': exact, 'simhash': group['simhash'], 'domains': len(group['domains'])}
+        for exact, group in groups.items()
+        if not group['rejected'] and (group['confirmed'] or len(group['domains']) >= min_domains)
+    ]
+
+    known = {kit['exact'] for kit in kits}
+    rejected = {exact for exact, group in groups.items() if group['rejected']}
+    for entry in extra or ():
+        if entry['exact'] not in known and entry['exact'] not in rejected:
+            known.add(entry['exact'])
+            kits.append({'exact': entry['exact'], 'simhash': entry['simhash'], 'domains': int(entry.get('domains', 1))})
+
+    stats = {
+        'observed_fingerprints': len(groups),
+        'skipped_kit_matches': skipped_kit_matches,
+        'rejected_by_analysts': len(rejected),
+        'kits': len(kits)
+    }
+    return kits, stats
+
+
+def build_kit_index(observation_log=None, feedback_store=None, min_domains=2, extra_path=None,
+                    store=None, activate=True):
+    """Construir e publicar uma nova versão do índice de kits"""
+    start = time.perf_counter()
+    observation_log = observation_log or KitObservationLog()
+    extra = iter_extra(extra_path) if extra_path else None
+
+    kits, stats = collect_kits(observation_log.iter_entries(), feedback_store, min_domains, extra)
+    index = KitIndex.build(
+        [int(kit['exact'], 16) for kit in kits],
+        [int(kit['simhash'], 16) for kit in kits],
+        [kit['domains'] for kit in kits]
+    )
+
+    store = store or ModelArtifactStore('models/kit_index')
+    metadata = dict(
+        stats,
+        min_domains=min_domains,
+        extra_source=extra_path,
+        built_at=datetime.now().isoformat(),
+        build_seconds=round(time.perf_counter() - start, 3)
+    )
+    version = store.publish(index, None, ['exact', 'simhash'], metadata=metadata, activate=activate)
+    return version, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--observations', default='data/kit_observations.jsonl')
+    parser.add_argument('--feedback', default='data/feedback.jsonl')
+    parser.add_argument('--min-domains', type=int, default=2, help='domínios distintos para considerar um kit')
+    parser.add_argument('--extra', help='JSONL com impressões digitais externas de kits')
+    parser.add_argument('--no-activate', action='store_true', help='publicar sem colocar em uso')
+    args = parser.parse_args()
+
+    version, metadata = build_kit_index(
+        KitObservationLog(args.observations),
+        FeedbackStore(args.feedback),
+        args.min_domains,
+        args.extra,
+        activate=not args.no_activate
+    )
+    print(f"📦 Índice de kits {version}: {metadata['kits']:,} kits "
+          f"({metadata['observed_fingerprints']:,} observados, {metadata['rejected_by_analysts']} rejeitados) "
+          f"em {metadata['build_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
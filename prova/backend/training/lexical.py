@@ -0,0 +1,115 @@
+"""
+Treinamento do modelo léxico de URL (analyzers/lexical_model.py)
+Treino incremental (SGD, log-loss) sobre matrizes esparsas de n-gramas,
+bloco a bloco, a partir de URLs rotuladas em CSV/JSONL ou de URLs sintéticas
+
+Uso (a partir de backend/):
+    python -m training.lexical                         # URLs sintéticas
+    python -m training.lexical logs/urls.jsonl --activate
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from analyzers.lexical_model import (
+    COUNT_FEATURES, DEFAULT_HASH_BITS, LexicalURLModel, build_matrix
+)
+from analyzers.model_store import ModelArtifactStore
+from training.streaming import LABEL_COLUMNS, iter_chunks, parse_label
+from training.synthetic import generate_urls
+
+
+def iter_labeled_urls(path, chunk_size):
+    """Blocos de (urls, rótulos) lidos de CSV/JSONL com colunas url + label/is_phishing"""
+    for kind, payload in iter_chunks(path, chunk_size):
+        if kind == 'jsonl':
+            records = []
+            for line in payload:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        else:
+            records = payload.to_dict('records')
+
+        urls, labels = [], []
+        for record in records:
+            label = next((parse_label(record[c]) for c in LABEL_COLUMNS if c in record), None)
+            if label is None or not isinstance(record.get('url'), str):
+                continue
+            urls.append(record['url'])
+            labels.append(label)
+        yield urls, np.asarray(labels, dtype=np.int8)
+
+
+def iter_synthetic_urls(n_per_class, chunk_size, seed=42):
+    for chunk in generate_urls(n_per_class, seed=seed, chunk_size=chunk_size):
+        yield [url for url, _, _ in chunk], np.asarray([label for _, label, _ in chunk], dtype=np.int8)
+
+
+def train_lexical_model(source=None, n_per_class=20000, hash_bits=DEFAULT_HASH_BITS, chunk_size=20000):
+    """
+    Treinar o modelo léxico
+
+    Returns:
+        (LexicalURLModel, relatório)
+    """
+    n_buckets = 2 ** hash_bits
+    model = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
+    chunks = iter_labeled_urls(source, chunk_size) if source else iter_synthetic_urls(n_per_class, chunk_size)
+
+    rows = correct = evaluated = 0
+    start = time.perf_counter()
+
+    for urls, labels in chunks:
+        if len(labels) == 0:
+            continue
+        X = build_matrix(urls, n_buckets)
+
+        # Validação progressiva: avaliar o bloco antes de treinar nele
+        if rows > 0:
+            correct += int((model.predict(X) == labels).sum())
+            evaluated += len(labels)
+
+        model.partial_fit(X, labels, classes=np.array([0, 1]))
+        rows += len(labels)
+
+    if rows == 0:
+        raise ValueError('Nenhuma URL rotulada encontrada para treinar o modelo léxico')
+
+    elapsed = time.perf_counter() - start
+    report = {
+        'source': source or 'synthetic',
+        'rows': rows,
+        'n_buckets': n_buckets,
+        'count_features': COUNT_FEATURES,
+        'validation_accuracy': correct / evaluated if evaluated else None,
+        'train_seconds': round(elapsed, 3),
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    return LexicalURLModel.from_sklearn(model, n_buckets), report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', help='CSV/JSONL com url + label (padrão: URLs sintéticas)')
+    parser.add_argument('--rows-per-class', type=int, default=20000, help='URLs sintéticas por classe')
+    parser.add_argument('--hash-bits', type=int, default=DEFAULT_HASH_BITS)
+    parser.add_argument('--activate', action='store_true', help='colocar a nova versão em uso')
+    args = parser.parse_args()
+
+    print(f"🎓 Treinando modelo léxico a partir de {args.path or 'URLs sintéticas'}...")
+    model, report = train_lexical_model(args.path, args.rows_per_class, args.hash_bits)
+    print(f"✅ {report['rows']:,} URLs em {report['train_seconds']}s | acurácia de validação: {report['validation_accuracy']}")
+
+    store = ModelArtifactStore('models/lexical_artifacts')
+    version = store.publish(model, None, ['char_ngrams'] + COUNT_FEATURES, metadata=report, activate=args.activate)
+    print(f"📦 Modelo léxico publicado como {version}{' (ativo)' if args.activate else ''}")
+
+
+if __name__ == '__main__':
+    main()
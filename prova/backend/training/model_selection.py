@@ -0,0 +1,237 @@
+"""
+Avaliação de modelos compactos: latência x acurácia
+Treina em paralelo (pool de processos) configurações menores que o Random
+Forest de produção e alunos destilados a partir dele, e reporta, num
+conjunto de validação separado: acurácia, ROC-AUC, tamanho do modelo e
+latência de uma linha e em lote. O modelo escolhido pode ser exportado
+como artefato de produção
+
+Uso (a partir de backend/):
+    python -m training.model_selection
+    python -m training.model_selection --export rf_50_d10 --activate
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from analyzers.inference_engine import compile_model
+from analyzers.ml_classifier import FEATURE_COLUMNS, FOREST_PARAMS
+from analyzers.model_store import ModelArtifactStore, ServingModel
+from training.dataset_cache import load_training_arrays
+
+TEACHER = 'rf_200_d15'
+
+# Candidatos: nome -> (tipo, parâmetros)
+CANDIDATES = {
+    TEACHER: ('forest', {}),
+    'rf_100_d12': ('forest', {'n_estimators': 100, 'max_depth': 12}),
+    'rf_50_d10': ('forest', {'n_estimators': 50, 'max_depth': 10}),
+    'rf_25_d8': ('forest', {'n_estimators': 25, 'max_depth': 8}),
+    'rf_10_d6': ('forest', {'n_estimators': 10, 'max_depth': 6}),
+    'logistic': ('linear', {}),
+    # Alunos treinados sobre as probabilidades do professor (TEACHER)
+    'distilled_rf_10_d6': ('distilled_forest', {'n_estimators': 10, 'max_depth': 6}),
+    'distilled_linear': ('distilled_linear', {})
+}
+
+
+def load_split(dataset_path, test_size, seed):
+    """Carregar o dataset (cache binário) e separar treino/validação de forma determinística"""
+    X, y, _ = load_training_arrays(dataset_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        np.asarray(X), np.asarray(y), test_size=test_size, random_state=seed, stratify=y
+    )
+    scaler = StandardScaler().fit(X_train)
+    return scaler.transform(X_train), scaler.transform(X_test), y_train, y_test, scaler
+
+
+def train_candidate(name, kind, params, dataset_path, test_size, seed, teacher_proba=None):
+    """
+    Executado no pool: cada worker carrega o dataset via memory-map
+    (sem copiar arrays pelo pipe) e treina um candidato
+    """
+    X_train, _, y_train, _, _ = load_split(dataset_path, test_size, seed)
+    start = time.perf_counter()
+
+    if kind in ('forest', 'distilled_forest'):
+        forest_params = dict(FOREST_PARAMS, n_jobs=1, **params)
+        model = RandomForestClassifier(**forest_params)
+        if kind == 'distilled_forest':
+            # Rótulos do professor em vez dos rótulos originais
+            model.fit(X_train, (teacher_proba >= 0.5).astype(int))
+        else:
+            model.fit(X_train, y_train)
+
+    elif kind == 'linear':
+        model = LogisticRegression(max_iter=1000).fit(X_train, y_train)
+
+    elif kind == 'distilled_linear':
+        # Entropia cruzada com rótulos suaves: cada linha aparece como
+        # phishing (peso p) e como legítima (peso 1 - p)
+        n = len(X_train)
+        model = LogisticRegression(max_iter=1000).fit(
+            np.vstack([X_train, X_train]),
+            np.concatenate([np.ones(n, dtype=int), np.zeros(n, dtype=int)]),
+            sample_weight=np.concatenate([teacher_proba, 1.0 - teacher_proba])
+        )
+
+    else:
+        raise ValueError(f'Tipo de candidato desconhecido: {kind}')
+
+    return name, model, time.perf_counter() - start
+
+
+def measure_latency(fn, repeat):
+    """Mediana da latência em microssegundos"""
+    fn()  # aquecimento
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1e6)
+
+
+def evaluate(name, model, train_seconds, scaler, X_test, y_test, batch_size, repeat):
+    """Métricas de qualidade, tamanho e latência usando o motor de produção"""
+    kind, engine = compile_model(model)
+    serving = ServingModel(name, engine, scaler.mean_, scaler.scale_, {})
+
+    # Entradas não normalizadas, como em MLClassifier.classify
+    X_raw = X_test * scaler.scale_ + scaler.mean_
+    proba = serving.predict_proba(X_raw)[:, 1]
+    predictions = (proba >= 0.5).astype(int)
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    rs = np.random.RandomState(0)
+    batch = X_raw[rs.randint(0, len(X_raw), batch_size)]
+    row = X_raw[:1]
+
+    return {
+        'name': name,
+        'kind': kind,
+        'accuracy': float(accuracy_score(y_test, predictions)),
+        'roc_auc': float(roc_auc_score(y_test, proba)) if len(np.unique(y_test)) > 1 else None,
+        'engine_bytes': int(engine.nbytes),
+        'pickle_bytes': len(buffer.getvalue()),
+        'single_row_us': measure_latency(lambda: serving.predict_proba(row), repeat),
+        'batch_us': measure_latency(lambda: serving.predict_proba(batch), max(3, repeat // 20)),
+        'train_seconds': round(train_seconds, 3)
+    }
+
+
+def run_selection(dataset_path='data/phishing_dataset.csv', candidates=None, workers=None,
+                  test_size=0.2, seed=42, batch_size=1000, repeat=200):
+    """
+    Treinar e avaliar os candidatos
+
+    Returns:
+        (relatório ordenado por latência de uma linha, modelos treinados, scaler)
+    """
+    candidates = candidates or list(CANDIDATES)
+    X_train, X_test, y_train, y_test, scaler = load_split(dataset_path, test_size, seed)
+    workers = workers or os.cpu_count()
+
+    independent = [name for name in candidates if not CANDIDATES[name][0].startswith('distilled')]
+    distilled = [name for name in candidates if CANDIDATES[name][0].startswith('distilled')]
+    if distilled and TEACHER not in independent:
+        independent.insert(0, TEACHER)
+
+    trained = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(train_candidate, name, *CANDIDATES[name], dataset_path, test_size, seed)
+            for name in independent
+        ]
+        for future in futures:
+            name, model, seconds = future.result()
+            trained[name] = (model, seconds)
+
+        # Segunda fase: alunos destilados dependem das probabilidades do professor
+        if distilled:
+            teacher_proba = compile_model(trained[TEACHER][0])[1].predict_proba(X_train)[:, 1]
+            futures = [
+                pool.submit(train_candidate, name, *CANDIDATES[name], dataset_path, test_size, seed, teacher_proba)
+                for name in distilled
+            ]
+            for future in futures:
+                name, model, seconds = future.result()
+                trained[name] = (model, seconds)
+
+    report = [
+        evaluate(name, model, seconds, scaler, X_test, y_test, batch_size, repeat)
+        for name, (model, seconds) in trained.items()
+        if name in candidates
+    ]
+    report.sort(key=lambda entry: entry['single_row_us'])
+
+    models = {name: model for name, (model, _) in trained.items()}
+    return report, models, scaler
+
+
+def export_model(name, model, scaler, report_entry, activate=False, store=None):
+    """Publicar o candidato escolhido como artefato de produção"""
+    store = store or ModelArtifactStore()
+    _, engine = compile_model(model)
+    metadata = dict(report_entry, source='training.model_selection', trained_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    return store.publish(engine, scaler, FEATURE_COLUMNS, metadata=metadata, sklearn_model=model, activate=activate)
+
+
+def print_report(report):
+    print(f"\n{'Modelo':<20} {'Acurácia':>9} {'ROC-AUC':>8} {'Tamanho':>10} {'1 linha':>10} {'Lote':>10} {'Treino':>8}")
+    for entry in report:
+        roc_auc = f"{entry['roc_auc']:.4f}" if entry['roc_auc'] is not None else '-'
+        print(
+            f"{entry['name']:<20} {entry['accuracy']:>9.4f} {roc_auc:>8} "
+            f"{entry['engine_bytes'] / 1024:>7.0f} KB {entry['single_row_us']:>7.0f} µs "
+            f"{entry['batch_us'] / 1000:>7.1f} ms {entry['train_seconds']:>7.1f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default='data/phishing_dataset.csv')
+    parser.add_argument('--candidates', nargs='+', choices=list(CANDIDATES), help='subconjunto de candidatos')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--json', help='gravar o relatório em JSON')
+    parser.add_argument('--export', choices=list(CANDIDATES), help='nome do candidato a publicar como artefato')
+    parser.add_argument('--activate', action='store_true', help='colocar o modelo exportado em uso')
+    args = parser.parse_args()
+
+    if args.export and args.candidates and args.export not in args.candidates:
+        args.candidates.append(args.export)
+
+    print(f"🎓 Avaliando {len(args.candidates or CANDIDATES)} configurações com {args.dataset}...")
+    report, models, scaler = run_selection(
+        args.dataset, args.candidates, args.workers, batch_size=args.batch_size
+    )
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Relatório salvo em {args.json}")
+
+    if args.export:
+        entry = next(entry for entry in report if entry['name'] == args.export)
+        version = export_model(args.export, models[args.export], scaler, entry, activate=args.activate)
+        print(f"\n📦 {args.export} publicado como {version}{' (ativo)' if args.activate else ''}")
+
+
+if __name__ == '__main__':
+    main()
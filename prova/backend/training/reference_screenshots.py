@@ -0,0 +1,175 @@
+"""
+Construção da base de hashes de referência (clones visuais)
+Renderiza as páginas de login de referência a partir de snapshots locais,
+sem acessar os sites reais, e publica uma nova versão de
+models/reference_hashes com phash/dhash/colorhash de cada marca, variante e
+viewport. As páginas são renderizadas com o mesmo perfil de Firefox das
+capturas de produção (launch_firefox), então os hashes comparam igual com
+igual: imagens e CSS externo ficam bloqueados como em produção, e só estilos
+inline e scripts dos snapshots entram na captura. Capturas prontas (.png)
+não são aceitas, pois trariam imagens e CSS que a produção não carrega
+
+Layout dos snapshots (uma pasta por marca, nome igual ao de
+ScreenshotAnalyzer.legitimate_sites):
+    data/reference_snapshots/<marca>/<variante>.html   renderizado em cada viewport
+Os arquivos são servidos por um servidor HTTP local durante o build
+
+Uso (a partir de backend/):
+    python -m training.reference_screenshots
+    python -m training.reference_screenshots --workers 4 --viewports 1920x1080 1366x768 390x844
+"""
+
+import argparse
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from analyzers.browser_pool import BrowserPool
+from analyzers.cpu_pool import CpuPool
+from analyzers.model_store import ModelArtifactStore
+from analyzers.reference_hashes import HASH_ALGORITHMS, ReferenceHashIndex, hashes_task
+from analyzers.screenshot_analyzer import RENDER_SETTLE_SECONDS
+
+DEFAULT_VIEWPORTS = [(1920, 1080), (1366, 768), (390, 844)]
+
+
+def parse_viewport(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def discover_snapshots(root):
+    """Páginas a renderizar [(marca, variante, caminho relativo)]"""
+    pages = []
+    for brand in sorted(os.listdir(root)):
+        brand_dir = os.path.join(root, brand)
+        if not os.path.isdir(brand_dir):
+            continue
+        for filename in sorted(os.listdir(brand_dir)):
+            variant, ext = os.path.splitext(filename)
+            if ext in ('.html', '.htm'):
+                pages.append((brand, variant, f'{brand}/{filename}'))
+    return pages
+
+
+class SnapshotServer:
+    """Servidor HTTP local (porta efêmera) para os arquivos dos snapshots"""
+
+    def __init__(self, root):
+        handler = functools.partial(_QuietHandler, directory=root)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='snapshot-server', daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def render_page(browser_pool, cpu_pool, url, viewports, settle=RENDER_SETTLE_SECONDS):
+    """Renderizar uma página em cada viewport com um navegador do pool; hashes no pool de CPU"""
+    captures = []
+    with browser_pool.lease() as browser:
+        for width, height in viewports:
+            browser.driver.set_window_size(width, height)
+            browser.driver.get(url)
+            time.sleep(settle)
+            captures.append(((width, height), browser.driver.get_screenshot_as_png()))
+    return [(viewport, cpu_pool.call(hashes_task, png)) for viewport, png in captures]
+
+
+def build_reference_hashes(snapshot_root='data/reference_snapshots', viewports=None, workers=4,
+                           store=None, activate=True, browser_pool=None, cpu_pool=None):
+    """Renderizar os snapshots em paralelo e publicar uma nova versão da base de referência"""
+    start = time.perf_counter()
+    viewports = viewports or DEFAULT_VIEWPORTS
+    pages = discover_snapshots(snapshot_root)
+
+    own_cpu_pool = cpu_pool is None
+    cpu_pool = cpu_pool or CpuPool(workers=workers)
+    # Um navegador por worker; as páginas esperam na fila (sem limite de espera no build)
+    own_browser_pool = browser_pool is None and bool(pages)
+    if own_browser_pool:
+        browser_pool = BrowserPool(size=workers, max_pages=1000, max_waiters=len(pages), checkout_timeout=3600)
+
+    entries, failures = [], []
+    try:
+        with SnapshotServer(snapshot_root) as server, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(render_page, browser_pool, cpu_pool, server.base_url + quote(path), viewports):
+                    (brand, variant, path)
+                for brand, variant, path in pages
+            }
+            for future in as_completed(futures):
+                brand, variant, path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures.append({'snapshot': path, 'error': str(e)})
+                    print(f"⚠️ {path}: {e}")
+                    continue
+                entries.extend(
+                    {'brand': brand, 'variant': variant, 'viewport': viewport, 'hashes': hashes}
+                    for viewport, hashes in result
+                )
+    finally:
+        if own_browser_pool:
+            browser_pool.close()
+        if own_cpu_pool:
+            cpu_pool.shutdown()
+
+    # Ordem estável entre builds (as_completed devolve na ordem de término)
+    entries.sort(key=lambda entry: (entry['brand'], entry['variant'], tuple(entry['viewport'])))
+    index = ReferenceHashIndex.build(entries)
+
+    store = store or ModelArtifactStore('models/reference_hashes')
+    metadata = {
+        'snapshot_root': snapshot_root,
+        'brands': len(index.brands),
+        'pages': len(pages),
+        'entries': len(index),
+        'viewports': [f'{width}x{height}' for width, height in viewports],
+        'failures': failures,
+        'built_at': datetime.now().isoformat(),
+        'build_seconds': round(time.perf_counter() - start, 3)
+    }
+    version = store.publish(index, None, list(HASH_ALGORITHMS), metadata=metadata, activate=activate)
+    return version, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--snapshots', default='data/reference_snapshots')
+    parser.add_argument('--viewports', type=parse_viewport, nargs='+', default=DEFAULT_VIEWPORTS,
+                        help='LARGURAxALTURA para renderizar cada página')
+    parser.add_argument('--workers', type=int, default=4, help='navegadores renderizando em paralelo')
+    parser.add_argument('--no-activate', action='store_true', help='publicar sem colocar em uso')
+    args = parser.parse_args()
+    if not os.path.isdir(args.snapshots):
+        parser.error(f'pasta de snapshots não encontrada: {args.snapshots} '
+                     f'(uma subpasta por marca com <variante>.html)')
+
+    version, metadata = build_reference_hashes(
+        args.snapshots, args.viewports, args.workers, activate=not args.no_activate
+    )
+    print(f"📸 Hashes de referência {version}: {metadata['entries']:,} capturas de {metadata['brands']} marcas "
+          f"({metadata['pages']} páginas, {len(metadata['failures'])} falhas) "
+          f"em {metadata['build_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
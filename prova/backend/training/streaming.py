@@ -0,0 +1,352 @@
+"""
+Treinamento out-of-core para grandes volumes de URLs rotuladas
+Lê CSV ou JSONL em blocos, extrai features em processos paralelos e treina
+um modelo incremental (SGD) ou um Random Forest sobre uma amostra de tamanho
+limitado (reservoir sampling), reportando vazão e pico de memória
+
+Formato de entrada (uma linha por URL):
+    JSONL: {"url": "http://...", "label": "phishing", "domain_age_days": 12}
+    CSV:   url,label[,domain_age_days]   ou as colunas de FEATURE_COLUMNS + is_phishing
+
+Uso (a partir de backend/):
+    python -m training.streaming logs/urls.jsonl --learner sgd --workers 4
+    python -m training.streaming logs/urls.csv --learner forest --max-samples 500000 --activate
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from analyzers.inference_engine import compile_model
+from analyzers.ml_classifier import (
+    DEFAULT_DOMAIN_AGE_DAYS, FEATURE_COLUMNS, FOREST_PARAMS, extract_url_features
+)
+from analyzers.model_store import ModelArtifactStore
+
+LABEL_COLUMNS = ('is_phishing', 'label')
+PHISHING_LABELS = {'1', '1.0', 'true', 'phishing', 'malicious', 'bad'}
+LEGITIMATE_LABELS = {'0', '0.0', 'false', 'legitimate', 'benign', 'good', 'safe'}
+
+
+def parse_label(value):
+    """Normalizar rótulo para 1 (phishing), 0 (legítima) ou None (inválido)"""
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    text = str(value).strip().lower()
+    if text in PHISHING_LABELS:
+        return 1
+    if text in LEGITIMATE_LABELS:
+        return 0
+    return None
+
+
+def detect_format(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def iter_chunks(path, chunk_size):
+    """
+    Ler o arquivo em blocos sem carregá-lo inteiro
+    JSONL é repassado como linhas cruas (o parse acontece nos workers)
+    """
+    if detect_format(path) == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = []
+            for line in f:
+                lines.append(line)
+                if len(lines) >= chunk_size:
+                    yield 'jsonl', lines
+                    lines = []
+            if lines:
+                yield 'jsonl', lines
+    else:
+        for frame in pd.read_csv(path, chunksize=chunk_size):
+            yield 'csv', frame
+
+
+def records_to_arrays(records):
+    """Converter registros (dicts) em matriz de features e vetor de rótulos"""
+    X = np.empty((len(records), len(FEATURE_COLUMNS)), dtype=np.float64)
+    y = np.empty(len(records), dtype=np.int8)
+    n = 0
+    skipped = 0
+
+    for record in records:
+        label = None
+        for column in LABEL_COLUMNS:
+            if column in record:
+                label = parse_label(record[column])
+                break
+
+        if label is None:
+            skipped += 1
+            continue
+
+        try:
+            if all(column in record for column in FEATURE_COLUMNS):
+                # Linha já contém as features (ex: dataset UCI-like)
+                X[n] = [float(record[column]) for column in FEATURE_COLUMNS]
+            else:
+                features = extract_url_features(str(record['url']))
+                age = record.get('domain_age_days')
+                if age is None or age != age:  # None ou NaN
+                    age = DEFAULT_DOMAIN_AGE_DAYS
+                features['domain_age_days'] = float(age)
+                X[n] = [features[column] for column in FEATURE_COLUMNS]
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+            continue
+
+        y[n] = label
+        n += 1
+
+    return X[:n], y[:n], skipped
+
+
+def featurize_chunk(chunk):
+    """Executado nos workers: parse + extração de features de um bloco"""
+    kind, payload = chunk
+
+    if kind == 'jsonl':
+        records = []
+        skipped = 0
+        for line in payload:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                skipped += 1
+        X, y, invalid = records_to_arrays(records)
+        return X, y, skipped + invalid
+
+    return records_to_arrays(payload.to_dict('records'))
+
+
+def peak_memory_mb():
+    """Pico de memória residente (MB) deste processo e dos workers já encerrados"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return own / divisor, children / divisor
+
+
+class StreamingTrainer:
+    def __init__(self, learner='sgd', chunk_size=50000, workers=None, max_samples=1000000,
+                 holdout_fraction=0.05, random_state=42, report_every=10):
+        if learner not in ('sgd', 'forest'):
+            raise ValueError(f'Learner desconhecido: {learner}')
+
+        self.learner = learner
+        self.chunk_size = chunk_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.max_in_flight = max(2, 2 * self.workers)
+        self.max_samples = max_samples
+        self.holdout_fraction = holdout_fraction
+        self.report_every = report_every
+        self.rng = np.random.default_rng(random_state)
+        self.random_state = random_state
+
+        self.scaler = StandardScaler()
+        self.model = None
+
+        # Estado do streaming
+        self.rows = 0
+        self.skipped = 0
+        self.chunks = 0
+        self.correct = 0
+        self.evaluated = 0
+        self.reservoir_X = None
+        self.reservoir_y = None
+        self.reservoir_size = 0
+
+        if learner == 'sgd':
+            self.model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=random_state)
+
+    def consume(self, X, y):
+        """Incorporar um bloco de features já extraídas"""
+        if len(y) == 0:
+            return
+
+        if self.learner == 'sgd':
+            # Validação progressiva: avaliar o bloco antes de treinar nele
+            if self.rows > 0:
+                predictions = self.model.predict(self.scaler.transform(X))
+                self.correct += int((predictions == y).sum())
+                self.evaluated += len(y)
+
+            self.scaler.partial_fit(X)
+            self.model.partial_fit(self.scaler.transform(X), y, classes=np.array([0, 1]))
+        else:
+            self.add_to_reservoir(X, y)
+
+        self.rows += len(y)
+
+    def add_to_reservoir(self, X, y):
+        """Reservoir sampling (algoritmo R) vetorizado: amostra uniforme de até max_samples linhas"""
+        if self.reservoir_X is None:
+            self.reservoir_X = np.empty((self.max_samples, X.shape[1]), dtype=np.float64)
+            self.reservoir_y = np.empty(self.max_samples, dtype=np.int8)
+
+        # Preencher enquanto houver espaço
+        free = self.max_samples - self.reservoir_size
+        if free > 0:
+            take = min(free, len(y))
+            self.reservoir_X[self.reservoir_size:self.reservoir_size + take] = X[:take]
+            self.reservoir_y[self.reservoir_size:self.reservoir_size + take] = y[:take]
+            self.reservoir_size += take
+            X, y = X[take:], y[take:]
+            seen = self.rows + take
+        else:
+            seen = self.rows
+
+        if len(y) == 0:
+            return
+
+        # O i-ésimo item visto substitui uma posição aleatória com probabilidade k / (i + 1)
+        positions = seen + np.arange(len(y))
+        slots = (self.rng.random(len(y)) * (positions + 1)).astype(np.int64)
+        accepted = slots < self.max_samples
+        # Atribuição em ordem: substituições posteriores prevalecem, como no algoritmo sequencial
+        self.reservoir_X[slots[accepted]] = X[accepted]
+        self.reservoir_y[slots[accepted]] = y[accepted]
+
+    def fit(self, path):
+        """Treinar a partir de um arquivo CSV/JSONL; retorna o relatório"""
+        start = time.perf_counter()
+        chunks = iter_chunks(path, self.chunk_size)
+
+        if self.workers > 0:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(featurize_chunk, chunk))
+                    # Limitar blocos em voo para manter a memória estável
+                    if len(pending) >= self.max_in_flight:
+                        self.handle_result(pending.popleft().result(), start)
+                while pending:
+                    self.handle_result(pending.popleft().result(), start)
+        else:
+            for chunk in chunks:
+                self.handle_result(featurize_chunk(chunk), start)
+
+        stream_seconds = time.perf_counter() - start
+
+        if self.learner == 'forest':
+            validation_accuracy = self.fit_forest()
+        else:
+            validation_accuracy = self.correct / self.evaluated if self.evaluated else None
+
+        elapsed = time.perf_counter() - start
+        own_mb, children_mb = peak_memory_mb()
+
+        return {
+            'learner': self.learner,
+            'source': path,
+            'rows': self.rows,
+            'skipped': self.skipped,
+            'chunks': self.chunks,
+            'workers': self.workers,
+            'stream_seconds': round(stream_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.rows / stream_seconds, 1) if stream_seconds > 0 else None,
+            'sample_size': self.reservoir_size if self.learner == 'forest' else self.rows,
+            'validation_accuracy': validation_accuracy,
+            'peak_rss_mb': round(own_mb, 1),
+            'peak_worker_rss_mb': round(children_mb, 1)
+        }
+
+    def handle_result(self, result, start):
+        X, y, skipped = result
+        self.skipped += skipped
+        self.chunks += 1
+        self.consume(X, y)
+
+        if self.report_every and self.chunks % self.report_every == 0:
+            elapsed = time.perf_counter() - start
+            own_mb, _ = peak_memory_mb()
+            print(f"   📦 {self.rows:,} linhas | {self.rows / elapsed:,.0f} linhas/s | pico RSS {own_mb:,.0f} MB")
+
+    def fit_forest(self):
+        """Treinar o Random Forest de produção sobre a amostra, com holdout para validação"""
+        if self.reservoir_size == 0:
+            raise ValueError('Nenhuma linha válida encontrada no arquivo de entrada')
+
+        X = self.reservoir_X[:self.reservoir_size]
+        y = self.reservoir_y[:self.reservoir_size]
+
+        order = self.rng.permutation(len(y))
+        n_holdout = int(len(y) * self.holdout_fraction)
+        holdout, train = order[:n_holdout], order[n_holdout:]
+
+        self.scaler.fit(X[train])
+        self.model = RandomForestClassifier(**FOREST_PARAMS)
+        self.model.fit(self.scaler.transform(X[train]), y[train])
+
+        if n_holdout == 0:
+            return None
+        return float(self.model.score(self.scaler.transform(X[holdout]), y[holdout]))
+
+    def publish(self, report, store=None, activate=False):
+        """Publicar o modelo treinado como artefato versionado"""
+        store = store or ModelArtifactStore()
+        _, engine = compile_model(self.model)
+        return store.publish(
+            engine,
+            self.scaler,
+            FEATURE_COLUMNS,
+            metadata=dict(report, trained_at=time.strftime('%Y-%m-%dT%H:%M:%S')),
+            sklearn_model=self.model,
+            activate=activate
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='arquivo CSV ou JSONL com URLs rotuladas')
+    parser.add_argument('--learner', choices=['sgd', 'forest'], default='sgd')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=None, help='processos de extração (0 = sem pool)')
+    parser.add_argument('--max-samples', type=int, default=1000000, help='tamanho da amostra do forest')
+    parser.add_argument('--no-publish', action='store_true', help='apenas treinar e reportar')
+    parser.add_argument('--activate', action='store_true', help='colocar a nova versão em uso')
+    args = parser.parse_args()
+
+    trainer = StreamingTrainer(
+        learner=args.learner,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_samples=args.max_samples
+    )
+
+    print(f"🎓 Treinamento em streaming ({args.learner}) a partir de {args.path}")
+    report = trainer.fit(args.path)
+
+    print(f"""
+✅ Linhas: {report['rows']:,} (ignoradas: {report['skipped']:,})
+⚡ Vazão: {report['rows_per_second']:,} linhas/s ({report['stream_seconds']}s de streaming)
+🎯 Acurácia de validação: {report['validation_accuracy']}
+💾 Pico de memória: {report['peak_rss_mb']} MB (principal), {report['peak_worker_rss_mb']} MB (workers)""")
+
+    if not args.no_publish:
+        version = trainer.publish(report, activate=args.activate)
+        print(f"📦 Modelo publicado como {version}{' (ativo)' if args.activate else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Gerador vetorizado de datasets sintéticos de phishing
+Cada coluna é gerada de uma vez como array NumPy (sem laços por linha),
+o que permite gerar dezenas de milhões de linhas em segundos
+
+Saídas suportadas:
+- DataFrame/CSV (compatível com data/phishing_dataset.csv)
+- formato colunar binário: um .npy por coluna + manifest.json (lido com memory-map)
+- URLs sintéticas cruas em JSONL, para benchmarks ponta a ponta
+"""
+
+import json
+import os
+
+import numpy as np
+
+from analyzers.ml_classifier import FEATURE_COLUMNS
+
+LABEL_COLUMN = 'is_phishing'
+
+# Especificação de cada coluna:
+#   ('randint', low, high)   inteiro uniforme em [low, high)
+#   ('const', value)         valor fixo
+#   ('choice', values, p)    valores com probabilidades p
+#   ('domain_length',)       comprimento do domínio sorteado
+#   ('domain_url', low, high) len('https://www.<domínio>/') + inteiro em [low, high)
+
+# Perfil usado por download_dataset.py (simula o UCI Phishing Websites)
+UCI_LIKE_PROFILE = {
+    'legitimate': {
+        'domains': [
+            'google.com', 'facebook.com', 'amazon.com', 'microsoft.com', 'apple.com',
+            'twitter.com', 'linkedin.com', 'github.com', 'stackoverflow.com', 'wikipedia.org',
+            'reddit.com', 'youtube.com', 'instagram.com', 'netflix.com', 'spotify.com',
+            'paypal.com', 'ebay.com', 'walmart.com', 'target.com', 'bestbuy.com'
+        ],
+        'columns': {
+            'url_length': ('domain_url', 0, 20),
+            'num_dots': ('randint', 1, 3),
+            'num_hyphens': ('randint', 0, 1),
+            'num_underscores': ('const', 0),
+            'num_special_chars': ('randint', 3, 8),
+            'num_digits': ('randint', 0, 4),
+            'has_ip': ('const', 0),
+            'domain_length': ('domain_length',),
+            'num_subdomains': ('randint', 0, 2),
+            'has_https': ('const', 1),
+            'domain_age_days': ('randint', 365, 7300)  # 1-20 anos
+        }
+    },
+    'phishing': {
+        'columns': {
+            'url_length': ('randint', 60, 200),
+            'num_dots': ('randint', 3, 8),
+            'num_hyphens': ('randint', 3, 12),
+            'num_underscores': ('randint', 1, 5),
+            'num_special_chars': ('randint', 15, 40),
+            'num_digits': ('randint', 5, 25),
+            'has_ip': ('choice', [0, 1], [0.7, 0.3]),  # 30% tem IP
+            'domain_length': ('randint', 25, 80),
+            'num_subdomains': ('randint', 2, 6),
+            'has_https': ('choice', [0, 1], [0.65, 0.35]),  # 35% tem HTTPS
+            'domain_age_days': ('randint', 0, 60)  # Domínios muito novos
+        }
+    }
+}
+
+# Perfil usado pelo MLClassifier quando não há dataset local
+CLASSIFIER_FALLBACK_PROFILE = {
+    'legitimate': {
+        'domains': [
+            'google.com', 'facebook.com', 'amazon.com', 'microsoft.com', 'apple.com',
+            'twitter.com', 'linkedin.com', 'github.com', 'stackoverflow.com', 'wikipedia.org',
+            'reddit.com', 'youtube.com', 'instagram.com', 'netflix.com', 'spotify.com'
+        ],
+        'columns': {
+            'url_length': ('randint', 20, 50),
+            'num_dots': ('randint', 1, 3),
+            'num_hyphens': ('randint', 0, 2),
+            'num_underscores': ('const', 0),
+            'num_special_chars': ('randint', 3, 8),
+            'num_digits': ('randint', 0, 5),
+            'has_ip': ('const', 0),
+            'domain_length': ('domain_length',),
+            'num_subdomains': ('randint', 0, 2),
+            'has_https': ('const', 1),
+            'domain_age_days': ('randint', 1000, 8000)
+        }
+    },
+    'phishing': {
+        'columns': {
+            'url_length': ('randint', 60, 150),
+            'num_dots': ('randint', 3, 8),
+            'num_hyphens': ('randint', 3, 10),
+            'num_underscores': ('randint', 2, 5),
+            'num_special_chars': ('randint', 15, 35),
+            'num_digits': ('randint', 8, 20),
+            'has_ip': ('choice', [0, 1], [0.7, 0.3]),
+            'domain_length': ('randint', 30, 70),
+            'num_subdomains': ('randint', 2, 6),
+            'has_https': ('choice', [0, 1], [0.6, 0.4]),
+            'domain_age_days': ('randint', 0, 30)  # Domínios novos
+        }
+    }
+}
+
+# Vocabulário para URLs sintéticas
+PHISHING_KEYWORDS = np.array([
+    'verify', 'secure', 'account', 'update', 'confirm', 'suspend',
+    'alert', 'unusual', 'activity', 'login', 'bank', 'payment'
+])
+PHISHING_TLDS = np.array(['tk', 'ml', 'ga', 'xyz', 'top', 'info', 'online', 'site'])
+LEGITIMATE_PATHS = np.array([
+    '', 'login', 'account', 'help', 'about', 'search', 'products', 'settings', 'news', 'docs'
+])
+
+
+def sample_column(spec, n, rng, domain_lengths=None):
+    """Gerar n valores de uma coluna de acordo com a especificação"""
+    kind = spec[0]
+    if kind == 'randint':
+        return rng.integers(spec[1], spec[2], n)
+    if kind == 'const':
+        return np.full(n, spec[1])
+    if kind == 'choice':
+        return rng.choice(spec[1], size=n, p=spec[2])
+    if kind == 'domain_length':
+        return domain_lengths
+    if kind == 'domain_url':
+        return len('https://www./') + domain_lengths + rng.integers(spec[1], spec[2], n)
+    raise ValueError(f'Especificação de coluna desconhecida: {spec}')
+
+
+def generate_class(class_profile, n, rng):
+    """Gerar n linhas de uma classe como dict coluna -> array"""
+    domain_lengths = None
+    if 'domains' in class_profile:
+        lengths = np.array([len(domain) for domain in class_profile['domains']])
+        domain_lengths = lengths[rng.integers(0, len(lengths), n)]
+
+    return {
+        column: sample_column(class_profile['columns'][column], n, rng, domain_lengths)
+        for column in FEATURE_COLUMNS
+    }
+
+
+def generate_dataset(n_per_class, profile=UCI_LIKE_PROFILE, seed=42, shuffle=True):
+    """
+    Gerar dataset balanceado (n_per_class linhas por classe) como arrays NumPy
+
+    Returns:
+        dict coluna -> array (FEATURE_COLUMNS + 'is_phishing'), tipos inteiros compactos
+    """
+    rng = np.random.default_rng(seed)
+    legitimate = generate_class(profile['legitimate'], n_per_class, rng)
+    phishing = generate_class(profile['phishing'], n_per_class, rng)
+
+    order = rng.permutation(2 * n_per_class) if shuffle else None
+    columns = {}
+    for column in FEATURE_COLUMNS:
+        values = np.concatenate([legitimate[column], phishing[column]])
+        values = compact_dtype(values)
+        columns[column] = values[order] if shuffle else values
+
+    labels = np.repeat(np.array([0, 1], dtype=np.uint8), n_per_class)
+    columns[LABEL_COLUMN] = labels[order] if shuffle else labels
+    return columns
+
+
+def compact_dtype(values):
+    """Converter para o menor tipo inteiro sem sinal que comporta os valores"""
+    if len(values) == 0:
+        return values.astype(np.uint8)
+    return values.astype(np.min_scalar_type(int(values.max())))
+
+
+def write_columnar(path, columns):
+    """
+    Gravar colunas em formato binário colunar: <path>/<coluna>.npy + manifest.json
+    Arquivos .npy podem ser lidos com memory-map (ver read_columnar)
+    """
+    os.makedirs(path, exist_ok=True)
+    rows = len(next(iter(columns.values())))
+    manifest = {'rows': rows, 'label_column': LABEL_COLUMN, 'columns': {}}
+
+    for name, values in columns.items():
+        np.save(os.path.join(path, f'{name}.npy'), values)
+        manifest['columns'][name] = str(values.dtype)
+
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def read_columnar(path, mmap=True):
+    """Ler colunas gravadas por write_columnar (memory-mapped por padrão)"""
+    with open(os.path.join(path, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+
+    mode = 'r' if mmap else None
+    return {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+        for name in manifest['columns']
+    }
+
+
+def generate_urls(n_per_class, seed=42, chunk_size=100000):
+    """
+    Gerar URLs sintéticas cruas (url, rótulo, idade do domínio) em blocos
+    Os sorteios de cada bloco são vetorizados; só a montagem das strings é por linha
+    """
+    rng = np.random.default_rng(seed)
+    legitimate_domains = np.array(UCI_LIKE_PROFILE['legitimate']['domains'])
+    total = 2 * n_per_class
+    # Blocos de tamanho par: metade de cada classe (o total também é par)
+    chunk_size = max(2, chunk_size - chunk_size % 2)
+
+    for start in range(0, total, chunk_size):
+        n = min(chunk_size, total - start)
+        n_legit = n_phish = n // 2
+
+        # Legítimas: https://www.<domínio>/<caminho>[?id=N]
+        domains = legitimate_domains[rng.integers(0, len(legitimate_domains), n_legit)]
+        paths = LEGITIMATE_PATHS[rng.integers(0, len(LEGITIMATE_PATHS), n_legit)]
+        ids = rng.integers(0, 10000, n_legit)
+        with_id = rng.random(n_legit) < 0.3
+        legit_ages = rng.integers(365, 7300, n_legit)
+
+        # Phishing: [http|https]://<sub>.<kw1>-<kw2>-<kw3><dígitos>.<tld>/<kw>_<token>/ ou IP
+        schemes = np.where(rng.random(n_phish) < 0.35, 'https', 'http')
+        keywords = PHISHING_KEYWORDS[rng.integers(0, len(PHISHING_KEYWORDS), (n_phish, 4))]
+        tlds = PHISHING_TLDS[rng.integers(0, len(PHISHING_TLDS), n_phish)]
+        digits = rng.integers(10, 99999, n_phish)
+        tokens = rng.integers(0, 2 ** 40, n_phish)
+        use_ip = rng.random(n_phish) < 0.3
+        octets = rng.integers(1, 255, (n_phish, 4))
+        phish_ages = rng.integers(0, 60, n_phish)
+
+        rows = []
+        for i in range(n_legit):
+            url = f'https://www.{domains[i]}/{paths[i]}'
+            if with_id[i]:
+                url += f'?id={ids[i]}'
+            rows.append((url, 0, int(legit_ages[i])))
+
+        for i in range(n_phish):
+            kw = keywords[i]
+            if use_ip[i]:
+                host = '.'.join(str(octet) for octet in octets[i])
+            else:
+                host = f'{kw[0]}.{kw[1]}-{kw[2]}-{kw[3]}{digits[i]}.{tlds[i]}'
+            url = f'{schemes[i]}://{host}/{kw[3]}_{tokens[i]:x}/{kw[0]}-{kw[1]}.php'
+            rows.append((url, 1, int(phish_ages[i])))
+
+        order = rng.permutation(n)
+        yield [rows[i] for i in order]
+
+
+def write_urls_jsonl(path, n_per_class, seed=42):
+    """Gravar URLs sintéticas em JSONL (entrada de training.streaming)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in generate_urls(n_per_class, seed=seed):
+            f.write(''.join(
+                json.dumps({'url': url, 'is_phishing': label, 'domain_age_days': age}) + '\n'
+                for url, label, age in chunk
+            ))
+            written += len(chunk)
+    return written
+